@@ -0,0 +1,340 @@
+from collections import deque
+import math
+import os
+import threading
+import time
+
+# Per-endpoint admission limits, keyed by Flask endpoint name:
+#   rate: sustained requests per second allowed for each client
+#   burst: requests a client may make back-to-back before being throttled
+#   concurrency: requests of this endpoint served at once across all clients
+#   queue: requests allowed to wait for a free slot before new ones are rejected
+#   wait: seconds a queued request waits for a slot before being rejected
+SUMMARY_LIMITS = {"rate": 0.5, "burst": 5, "concurrency": 8, "queue": 16, "wait": 15}
+ENDPOINT_LIMITS = {
+    "get_summaries": SUMMARY_LIMITS,
+    "stream_summaries": SUMMARY_LIMITS,
+    "get_resolutions": {
+        "rate": 1,
+        "burst": 10,
+        "concurrency": 8,
+        "queue": 16,
+        "wait": 10,
+    },
+    "get_download": {"rate": 0.2, "burst": 3, "concurrency": 2, "queue": 4, "wait": 30},
+    "get_bulk_download": {
+        "rate": 0.01,
+        "burst": 1,
+        "concurrency": 1,
+        "queue": 2,
+        "wait": 30,
+    },
+    "get_creater_info": {
+        "rate": 0.1,
+        "burst": 3,
+        "concurrency": 4,
+        "queue": 8,
+        "wait": 20,
+    },
+    "stream_comments": {
+        "rate": 1,
+        "burst": 10,
+        "concurrency": 8,
+        "queue": 16,
+        "wait": 10,
+    },
+}
+
+# Global OpenAI budget shared by every ChatGPT call of this process
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", 90000))
+
+# Seconds a client is asked to wait when an endpoint's queue is full
+BUSY_RETRY_AFTER = 5
+
+# Client buckets idle for this long are full again and can be forgotten
+IDLE_BUCKET_SECONDS = 10 * 60
+
+# Server threads kept free for the cheap, unlimited endpoints (e.g. /api/get-progress)
+CHEAP_ENDPOINT_THREADS = int(os.getenv("CHEAP_ENDPOINT_THREADS", 8))
+
+
+class TokenBucket:
+    """
+    Token bucket that refills at a constant rate up to its capacity.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def try_acquire(self, now=None):
+        """
+        Take a token from the bucket if one is available.
+
+        Args:
+            now (float, optional): The current monotonic time. Defaults to time.monotonic().
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until one is available.
+        """
+
+        now = time.monotonic() if now is None else now
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = max(now, self.updated_at)
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+
+        return (1 - self.tokens) / self.rate
+
+
+class ClientRateLimiter:
+    """
+    Per-client token buckets for each rate-limited endpoint.
+    """
+
+    def __init__(self, limits=ENDPOINT_LIMITS):
+        self.limits = limits
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def check(self, client_id, endpoint):
+        """
+        Charge one request of a client against its bucket for an endpoint.
+
+        Args:
+            client_id (str): The identity of the client, e.g. its IP address.
+            endpoint (str): The Flask endpoint name.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise the seconds the client should wait.
+        """
+
+        limit = self.limits.get(endpoint)
+        if limit is None:
+            return 0
+
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_prune > IDLE_BUCKET_SECONDS:
+                self._prune(now)
+
+            bucket = self._buckets.get((client_id, endpoint))
+            if bucket is None:
+                bucket = self._buckets[(client_id, endpoint)] = TokenBucket(
+                    limit["rate"], limit["burst"]
+                )
+            return bucket.try_acquire(now)
+
+    def _prune(self, now):
+        """
+        Forget the buckets of clients that have been idle long enough to be full again.
+        """
+
+        self._buckets = {
+            key: bucket
+            for key, bucket in self._buckets.items()
+            if now - bucket.updated_at < IDLE_BUCKET_SECONDS
+        }
+        self._last_prune = now
+
+
+class ConcurrencyLimiter:
+    """
+    Cap on the number of requests served at once, with a bounded wait queue.
+
+    Requests beyond the limit wait in a queue for a free slot until their deadline.
+    Once the queue is full, new requests are rejected immediately instead of piling
+    up on the server's worker threads.
+    """
+
+    def __init__(self, limit, max_queue, wait):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.wait = wait
+        self.active = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Take a slot, waiting in the queue if every slot is busy.
+
+        Returns:
+            bool: True if a slot was taken, False if the queue was full or the deadline passed.
+        """
+
+        with self._condition:
+            if self.active < self.limit:
+                self.active += 1
+                return True
+
+            if self.waiting >= self.max_queue:
+                return False
+
+            deadline = time.monotonic() + self.wait
+            self.waiting += 1
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+                self.active += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        """
+        Free a slot and wake up the next queued request.
+
+        Returns:
+            None
+        """
+
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+
+class TokenRateGovernor:
+    """
+    Sliding one-minute budget of OpenAI tokens.
+
+    Each call reserves its estimated token count (prompt plus maximum response) before
+    it is sent, waiting if the budget of the last minute is spent. Once the call
+    returns, the reservation is settled with the actual usage reported by OpenAI, so
+    the budget tracks real spend rather than estimates.
+    """
+
+    def __init__(self, tokens_per_minute=OPENAI_TOKENS_PER_MINUTE, window=60):
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self._entries = deque()
+        self._used = 0
+        self._condition = threading.Condition()
+
+    def _expire(self, now):
+        """
+        Drop the entries that have left the window from the running total.
+        """
+
+        while self._entries and now - self._entries[0][0] >= self.window:
+            _, reservation = self._entries.popleft()
+            self._used -= reservation[0]
+            reservation[1] = False
+
+    def used(self):
+        """
+        Return the tokens spent or reserved in the current window.
+
+        Returns:
+            int: The token count of the last minute.
+        """
+
+        with self._condition:
+            self._expire(time.monotonic())
+            return self._used
+
+    def reserve(self, tokens, timeout=30):
+        """
+        Reserve tokens from the budget, waiting until enough of the window has expired.
+
+        Args:
+            tokens (int): The estimated number of tokens of the call.
+            timeout (float, optional): The maximum seconds to wait. Defaults to 30.
+
+        Returns:
+            list: A reservation to pass to settle, or None if the budget stayed exhausted.
+        """
+
+        # A single call larger than the whole budget can never fit, so let it through alone
+        tokens = min(tokens, self.tokens_per_minute)
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                if self._used + tokens <= self.tokens_per_minute:
+                    reservation = [tokens, True]
+                    self._entries.append((now, reservation))
+                    self._used += tokens
+                    return reservation
+
+                # Sleep until the oldest entry leaves the window or the deadline passes
+                wake_at = self._entries[0][0] + self.window if self._entries else now
+                remaining = deadline - now
+                if remaining <= 0:
+                    return None
+                self._condition.wait(max(0.01, min(remaining, wake_at - now)))
+
+    def settle(self, reservation, tokens):
+        """
+        Replace the estimate of a reservation with the actual tokens used.
+
+        Args:
+            reservation (list): The reservation returned by reserve.
+            tokens (int): The actual number of tokens used, 0 if the call failed.
+
+        Returns:
+            None
+        """
+
+        if reservation is None:
+            return
+
+        with self._condition:
+            # Reservations that already left the window no longer count against it
+            if reservation[1]:
+                self._used += tokens - reservation[0]
+            reservation[0] = tokens
+            self._condition.notify_all()
+
+
+def get_retry_after(seconds):
+    """
+    Format a wait time as the value of a Retry-After header.
+
+    Args:
+        seconds (float): The seconds the client should wait.
+
+    Returns:
+        str: The wait time rounded up to whole seconds, at least 1.
+
+    Examples:
+        >>> get_retry_after(0.2)
+        '1'
+    """
+
+    return str(max(1, math.ceil(seconds)))
+
+
+def get_server_threads(limits=ENDPOINT_LIMITS, headroom=CHEAP_ENDPOINT_THREADS):
+    """
+    Return the number of server threads needed so the admission limits never exhaust them.
+
+    A request waiting in an endpoint's queue blocks a server thread just like a running
+    one, so every endpoint can hold up to its concurrency plus its queue. The headroom
+    keeps threads free for the endpoints without limits even when all of them are full.
+
+    Args:
+        limits (dict, optional): The admission limits, keyed by Flask endpoint name.
+        headroom (int, optional): The threads reserved for endpoints without limits.
+
+    Returns:
+        int: The number of threads to serve with.
+
+    Examples:
+        >>> get_server_threads({"get_download": {"concurrency": 2, "queue": 4}}, headroom=8)
+        14
+    """
+
+    return headroom + sum(
+        limit["concurrency"] + limit["queue"] for limit in limits.values()
+    )
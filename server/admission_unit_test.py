@@ -0,0 +1,61 @@
+import threading
+import time
+from admission import *
+
+
+def test_token_bucket_allows_burst_then_throttles():
+    bucket = TokenBucket(rate=1, capacity=2)
+    now = bucket.updated_at
+    assert bucket.try_acquire(now) == 0
+    assert bucket.try_acquire(now) == 0
+    assert bucket.try_acquire(now) == 1
+    assert bucket.try_acquire(now + 1) == 0
+
+
+def test_client_rate_limiter_is_per_client():
+    limiter = ClientRateLimiter({"get_download": {"rate": 0.1, "burst": 1}})
+    assert limiter.check("1.1.1.1", "get_download") == 0
+    assert limiter.check("1.1.1.1", "get_download") > 0
+    assert limiter.check("2.2.2.2", "get_download") == 0
+    assert limiter.check("1.1.1.1", "hello") == 0
+
+
+def test_concurrency_limiter_rejects_when_queue_full():
+    limiter = ConcurrencyLimiter(limit=1, max_queue=0, wait=1)
+    assert limiter.acquire()
+    assert not limiter.acquire()
+    limiter.release()
+    assert limiter.acquire()
+
+
+def test_concurrency_limiter_hands_slot_to_waiter():
+    limiter = ConcurrencyLimiter(limit=1, max_queue=1, wait=5)
+    assert limiter.acquire()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    limiter.release()
+    waiter.join()
+    assert results == [True]
+
+
+def test_token_rate_governor_settles_actual_usage():
+    governor = TokenRateGovernor(tokens_per_minute=1000)
+    reservation = governor.reserve(900)
+    assert governor.reserve(200, timeout=0) is None
+    governor.settle(reservation, 300)
+    assert governor.used() == 300
+    assert governor.reserve(200, timeout=0) is not None
+
+
+def test_server_threads_cover_limited_endpoints_and_headroom():
+    limits = {
+        "get_download": {"concurrency": 2, "queue": 4},
+        "get_summaries": {"concurrency": 8, "queue": 16},
+    }
+    assert get_server_threads(limits, headroom=8) == 38
+    assert all(
+        limit["concurrency"] < get_server_threads()
+        for limit in ENDPOINT_LIMITS.values()
+    )
@@ -1,50 +1,229 @@
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, send_file, after_this_request
+from flask import (
+    Flask,
+    Response,
+    g,
+    has_request_context,
+    request,
+    jsonify,
+    send_file,
+    after_this_request,
+    stream_with_context,
+)
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+from concurrent.futures import ThreadPoolExecutor
 from itertools import islice
 import json
-from openai import OpenAI, OpenAIError
 import os
 import re
 import requests
 from requests.exceptions import HTTPError
+import shutil
 import subprocess
-import tiktoken
 from waitress import serve
-from youtube_comment_downloader import YoutubeCommentDownloader, SORT_BY_POPULAR
-from youtube_transcript_api import YouTubeTranscriptApi
-import yt_dlp
 from datetime import datetime
 import time
+import threading
+import copy
+from admission import (
+    BUSY_RETRY_AFTER,
+    ENDPOINT_LIMITS,
+    ClientRateLimiter,
+    ConcurrencyLimiter,
+    TokenRateGovernor,
+    get_retry_after,
+    get_server_threads,
+)
+from avatar_cache import DEFAULT_AVATAR_URL, AvatarValidator
+from bulk_download import (
+    BULK_MAX_ENTRIES,
+    BulkProgress,
+    ZipStream,
+    get_channel_videos_url,
+    get_playlist_entries,
+    run_bulk_downloads,
+)
+from cancellation import (
+    NEVER_CANCELLED,
+    REQUEST_DEADLINES,
+    CancellationToken,
+    RequestCancelled,
+)
+from comment_dedup import format_collapsed_comments
+from comment_pages import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    CommentStreams,
+    decode_cursor,
+)
+from download_progress import (
+    STAGE_WEIGHTS,
+    DownloadProgress,
+    make_ytdlp_hook,
+    record_ffmpeg_progress,
+)
+from format_ladder import (
+    build_format_ladder,
+    estimate_download_size,
+    find_format,
+    get_ladder_resolutions,
+)
+from hedging import HedgedRequests
+from lazy import Lazy, LazyModule, preload
+from llm_accounting import LLMUsageLedger
+from llm_cache import LLMCache, LLM_CACHE_DISABLED, get_cache_key
+from model_router import ModelRouter
+from mux_scheduler import (
+    MUX_PRIORITY_BULK,
+    MUX_PRIORITY_INTERACTIVE,
+    DiskGuard,
+    SCRATCH_PREFIX,
+    InsufficientDiskSpace,
+    MuxScheduler,
+)
+from prefetch import Prefetcher
+from profile_store import PROFILE_HARD_TTL, ProfileStore
+from proxy_pool import ProxyPool, get_proxy_urls
+from replay import Recorder, to_namespace
+from single_flight import SingleFlight
+from state_store import STATE_BACKEND, get_state_store
+from transcript_languages import (
+    DEFAULT_TRANSCRIPT_LANGUAGES,
+    describe_transcript,
+    get_transcript_key,
+    parse_languages,
+    select_transcript,
+)
+from transcript_search import cache_transcript_index, get_transcript_index
+
+# Heavy third-party modules are imported on first use so the server starts serving quickly
+openai = LazyModule("openai")
+tiktoken = LazyModule("tiktoken")
+yt_dlp = LazyModule("yt_dlp")
+youtube_comment_downloader = LazyModule("youtube_comment_downloader")
+youtube_transcript_api = LazyModule("youtube_transcript_api")
+presummarize = LazyModule("presummarize")
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
 
-# Initialize OpenAI API client
-client = OpenAI()
+# Number of reverse proxies in front of the server that append to X-Forwarded-For. Only then is the
+# header trusted for the client address; otherwise any client could forge a fresh identity per request.
+TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", 0))
+if TRUSTED_PROXIES > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
 
-# Initialize YouTube Comment Downloader
-downloader = YoutubeCommentDownloader()
+# Initialize OpenAI API client on first use
+openai_client = Lazy(lambda: openai.OpenAI())
+
+# Record or replay outbound calls, for deterministic offline end-to-end benchmarks
+recorder = Recorder()
+
+# Initialize ChatGPT response cache
+# Responses are shared through SQLite on one host, or through the networked store across hosts
+llm_cache = LLMCache(store=get_state_store("llm") if STATE_BACKEND == "redis" else None)
+
+# Token usage, cost, latency and retries of every ChatGPT call
+llm_usage = LLMUsageLedger()
+
+# Model, response limit and context limit of each ChatGPT task
+model_router = ModelRouter(tasks=("summary", "analysis", "score"))
+
+# Coalesce identical in-flight summary and creator analysis requests
+summary_flights = SingleFlight()
+creator_flights = SingleFlight()
+
+# Look up video titles next to the transcript and comments of a streamed summary
+title_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="video-title")
+
+# Admission control for expensive endpoints and the OpenAI tokens-per-minute budget
+rate_limiter = ClientRateLimiter()
+concurrency_limiters = {
+    endpoint: ConcurrencyLimiter(limit["concurrency"], limit["queue"], limit["wait"])
+    for endpoint, limit in ENDPOINT_LIMITS.items()
+}
+openai_governor = TokenRateGovernor()
+
+# Warm the caches for a video in the background, pausing whenever requests are queued
+prefetcher = Prefetcher(
+    should_run=lambda: all(
+        limiter.waiting == 0 for limiter in concurrency_limiters.values()
+    )
+)
+
+# Validate channel avatar URLs in the background with a cached result
+avatar_validator = AvatarValidator(
+    lambda url: recorder.call(
+        "avatar", url, lambda: requests.head(url, timeout=5).status_code == 200
+    )
+)
 
 # Initialize YouTube API key
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 
-# Rotating residential proxies to avoid IP bans for web-scraping
-proxies = {
-    "http": os.getenv("ROTATING_RESIDENTIAL_PROXY", ""),
-    "https": os.getenv("ROTATING_RESIDENTIAL_PROXY", ""),
-}
+# Pool of rotating residential proxies to avoid IP bans for web-scraping
+proxy_pool = ProxyPool(get_proxy_urls())
+
+# Backup transcript attempts through a second exit when the first one is slow
+transcript_hedger = HedgedRequests()
+
+# Cache of yt-dlp video metadata and format ladders, kept shorter than the lifetime of stream URLs
+VIDEO_METADATA_TTL = 60 * 60
+video_metadata_cache = get_state_store(
+    "video_metadata", VIDEO_METADATA_TTL, max_entries=256
+)
+
+# Caches of scraped transcripts and comments, shared with the background prefetcher
+TRANSCRIPT_CACHE_TTL = 60 * 60
+COMMENTS_CACHE_TTL = 10 * 60
+transcript_cache = get_state_store("transcripts", TRANSCRIPT_CACHE_TTL, max_entries=256)
 
-# Global variables for tracking download progress
-combined_progress = 0
-progress = {"video": 0, "audio": 0, "ffmpeg": 0}
+# Cache of the transcript tracks of each video, kept shorter than the lifetime of their caption URLs
+TRANSCRIPT_LIST_TTL = 60 * 60
+transcript_list_cache = get_state_store(
+    "transcript_lists", TRANSCRIPT_LIST_TTL, max_entries=256
+)
+comments_cache = get_state_store("comments", COMMENTS_CACHE_TTL, max_entries=256)
+scraping_flights = SingleFlight()
+
+
+def open_comment_stream(video_id):
+    """
+    Start scraping the popular comments of a video through a proxy, pulling them as they are read.
+    """
 
-# ChatGPT-3.5-turbo Model
-CHATGPT_TOKEN_LIMIT = 16385
-RESPONSE_TOKEN_LIMIT = 500
-REQUEST_TOKEN_LIMIT = CHATGPT_TOKEN_LIMIT - RESPONSE_TOKEN_LIMIT
+    downloader = youtube_comment_downloader.YoutubeCommentDownloader()
+    proxy = proxy_pool.select()
+    if proxy is not None:
+        downloader.session.proxies.update(proxy.as_proxies())
+    video_url = f"https://www.youtube.com/watch?v={video_id}"
+    # Pages read from the stream vary, so its fixtures are kept apart from fixed-size fetches
+    return recorder.stream(
+        "comment_stream",
+        video_url,
+        lambda: downloader.get_comments_from_url(
+            video_url, sort_by=youtube_comment_downloader.SORT_BY_POPULAR
+        ),
+    )
+
+
+# Open comment generators of recently paged videos, so deeper pages continue where the last stopped
+comment_streams = CommentStreams(open_comment_stream)
+
+# Progress of download jobs, stored by job ID so any process can serve the progress polls
+DOWNLOAD_PROGRESS_TTL = 60 * 60
+DEFAULT_JOB_ID = "latest"
+progress_store = get_state_store("download_progress", DOWNLOAD_PROGRESS_TTL)
+
+# Cap concurrent ffmpeg merges to the cores, reserve disk space for downloads,
+# and sweep the temporary files of crashed downloads on startup and periodically
+mux_scheduler = MuxScheduler()
+disk_guard = DiskGuard("downloads")
+
+# ChatGPT system roles
 CHATGPT_SUMMARIZING_ROLE = """
     You are a summarizing assistant for YouTube videos that restates the main 
     points of the video and summarizes viewer comments.
@@ -91,37 +270,177 @@ def extract_video_id(url):
     return match.group(1) if match else None
 
 
-def fetch_transcript(video_id):
+def get_transcript_tracks(video_id):
+    """
+    List the transcripts of a YouTube video, at most once per TRANSCRIPT_LIST_TTL.
+
+    Args:
+        video_id (str): The ID of the YouTube video.
+
+    Returns:
+        list: The track descriptions from describe_transcript, or None if they could not be listed.
+    """
+
+    cached_tracks = transcript_list_cache.get(video_id)
+    if cached_tracks is not None:
+        return cached_tracks
+
+    # Share a listing already in flight, e.g. one started for another language
+    tracks, _ = scraping_flights.do(
+        ("transcript_list", video_id), download_transcript_tracks, video_id
+    )
+    return tracks
+
+
+def download_transcript_tracks(video_id):
+    """
+    List the transcripts of a YouTube video and store them in the transcript list cache.
+
+    Args:
+        video_id (str): The ID of the YouTube video.
+
+    Returns:
+        list: The track descriptions from describe_transcript, or None on failure.
+    """
+
+    def attempt(proxy):
+        return proxy_pool.call(
+            lambda proxy: recorder.call(
+                "transcript_list",
+                video_id,
+                lambda: [
+                    describe_transcript(transcript)
+                    for transcript in youtube_transcript_api.YouTubeTranscriptApi.list_transcripts(
+                        video_id, proxies=proxy.as_proxies() if proxy else None
+                    )
+                ],
+            ),
+            endpoint=proxy,
+            ok_errors=(
+                youtube_transcript_api.TranscriptsDisabled,
+                youtube_transcript_api.VideoUnavailable,
+            ),
+        )
+
+    try:
+        # A hedge goes through another exit, or directly if the pool has no other
+        primary_proxy = proxy_pool.select()
+        tracks = transcript_hedger.run(
+            lambda: attempt(primary_proxy),
+            lambda: attempt(proxy_pool.select(exclude=(primary_proxy,))),
+        )
+    except:
+        return None
+
+    transcript_list_cache.set(video_id, tracks)
+    return tracks
+
+
+def fetch_transcript(video_id, languages=DEFAULT_TRANSCRIPT_LANGUAGES):
     """
-    Fetch captions for a given YouTube video ID.
+    Fetch captions for a given YouTube video ID in the preferred languages.
 
-    This function uses the YouTubeTranscriptApi to retrieve the captions (subtitles) for a specified YouTube video.
-    If the captions cannot be retrieved, it returns None.
+    This function lists the transcripts of the video and picks a manually created one in the preferred
+    languages, then an auto-generated one, then YouTube's translation of one into the first language
+    it can be translated to. The list and each (video, language) transcript are cached separately, so
+    switching languages costs one fetch and repeating one costs none. If the captions cannot be
+    retrieved, it returns None.
 
     Args:
         video_id (str): The ID of the YouTube video.
+        languages (tuple, optional): The language codes, most preferred first. Defaults to
+            DEFAULT_TRANSCRIPT_LANGUAGES.
 
     Returns:
-        list: A list of caption dictionaries if captions are found.
+        tuple: The list of caption dictionaries and the joined transcript if captions are found.
         None: If an error occurs or captions are not available.
 
     Examples:
         >>> fetch_transcript("abc123XYZ")
-        [{'start': 0.0, 'duration': 4.0, 'text': 'Hello world'}, ...]
+        ([{'start': 0.0, 'duration': 4.0, 'text': 'Hello world'}, ...], 'Hello world ...')
         >>> fetch_transcript("invalid_id")
         None
     """
 
+    tracks = get_transcript_tracks(video_id)
+    if not tracks:
+        return None
+    selection = select_transcript(tracks, languages)
+
+    transcript_key = get_transcript_key(video_id, selection["language"])
+    cached_transcript = transcript_cache.get(transcript_key)
+    if cached_transcript is not None:
+        return cached_transcript
+
+    # Share a fetch already in flight, e.g. one started by the prefetcher
+    result, _ = scraping_flights.do(
+        ("transcript", transcript_key), download_transcript, video_id, selection
+    )
+    return result
+
+
+def download_transcript(video_id, selection):
+    """
+    Download the captions of a YouTube video and store them in the transcript cache.
+
+    Args:
+        video_id (str): The ID of the YouTube video.
+        selection (dict): The track to fetch and the language to translate it to, from select_transcript.
+
+    Returns:
+        tuple: The list of caption dictionaries and the joined transcript, or None on failure.
+    """
+
+    track = selection["track"]
+
+    def fetch(proxy):
+        # Fetch from the listed caption URL instead of listing the transcripts again
+        http_client = requests.Session()
+        if proxy is not None:
+            http_client.proxies.update(proxy.as_proxies())
+        transcript = youtube_transcript_api.Transcript(
+            http_client,
+            video_id,
+            track["url"],
+            track["language"],
+            track["language_code"],
+            track["is_generated"],
+            track["translation_languages"],
+        )
+        if selection["translate_to"] is not None:
+            transcript = transcript.translate(selection["translate_to"])
+        return transcript.fetch()
+
+    def attempt(proxy):
+        return proxy_pool.call(
+            lambda proxy: recorder.call(
+                "transcript",
+                [video_id, track["language_code"], selection["translate_to"]],
+                lambda: fetch(proxy),
+            ),
+            endpoint=proxy,
+            ok_errors=(
+                youtube_transcript_api.NoTranscriptFound,
+                youtube_transcript_api.TranscriptsDisabled,
+                youtube_transcript_api.VideoUnavailable,
+            ),
+        )
+
     try:
-        if os.getenv("ENV", "") == "development":
-            captions = YouTubeTranscriptApi.get_transcript(video_id)
-        else:
-            captions = YouTubeTranscriptApi.get_transcript(video_id, proxies=proxies)
+        # A hedge goes through another exit, or directly if the pool has no other
+        primary_proxy = proxy_pool.select()
+        captions = transcript_hedger.run(
+            lambda: attempt(primary_proxy),
+            lambda: attempt(proxy_pool.select(exclude=(primary_proxy,))),
+        )
 
         transcript = " ".join([caption["text"] for caption in captions])
     except:
         return None
 
+    transcript_cache.set(
+        get_transcript_key(video_id, selection["language"]), (captions, transcript)
+    )
     return captions, transcript
 
 
@@ -130,7 +449,9 @@ def get_comments(video_url, comment_count=100):
     Fetch and format popular comments from a given YouTube video URL.
 
     This function retrieves a specified number of popular comments from a YouTube video and formats them
-    into a list and a concatenated string.
+    into a list and a concatenated string. Near-duplicate comments are collapsed into a single line of the
+    string with a count (e.g. "(x14)") so the summary prompt only pays for distinct opinions. Results are cached
+    per video for a few minutes.
 
     Args:
         video_url (str): The URL of the YouTube video.
@@ -144,20 +465,56 @@ def get_comments(video_url, comment_count=100):
 
     Examples:
         >>> get_comments("https://www.youtube.com/watch?v=abc123XYZ")
-        ([{'text': 'Great video!'}, ...], '1) Great video!\n2) Very informative!\n...')
+        ([{'text': 'Great video!'}, ...], '1) Great video! (x3)\n2) Very informative!\n...')
         >>> get_comments("invalid_url")
         (None, None)
     """
 
+    cache_key = f"{extract_video_id(video_url) or video_url}:{comment_count}"
+    cached_comments = comments_cache.get(cache_key)
+    if cached_comments is not None:
+        return cached_comments
+
+    # Share a fetch already in flight, e.g. one started by the prefetcher
+    result, _ = scraping_flights.do(
+        ("comments", cache_key), download_comments, video_url, comment_count
+    )
+    return result
+
+
+def download_comments(video_url, comment_count):
+    """
+    Download and format the popular comments of a YouTube video and store them in the comments cache.
+
+    Args:
+        video_url (str): The URL of the YouTube video.
+        comment_count (int): The number of comments to retrieve.
+
+    Returns:
+        tuple: The list of comment dictionaries and the formatted comments, or (None, None) on failure.
+    """
+
+    def scrape_comments(proxy):
+        downloader = youtube_comment_downloader.YoutubeCommentDownloader()
+        if proxy is not None:
+            downloader.session.proxies.update(proxy.as_proxies())
+        popular_comments = recorder.stream(
+            "comments",
+            [video_url, comment_count],
+            lambda: downloader.get_comments_from_url(
+                video_url, sort_by=youtube_comment_downloader.SORT_BY_POPULAR
+            ),
+        )
+        return list(islice(popular_comments, comment_count))
+
     try:
-        popular_comments = downloader.get_comments_from_url(
-            video_url, sort_by=SORT_BY_POPULAR
+        comments = proxy_pool.call(scrape_comments)
+        comments_str = format_collapsed_comments(
+            [comment["text"] for comment in comments]
         )
-        comments, comments_str = [], ""
-        for index, comment in enumerate(islice(popular_comments, comment_count)):
-            comments.append(comment)
-            comments_str += str(index + 1) + ") " + comment["text"] + "\n"
 
+        cache_key = f"{extract_video_id(video_url) or video_url}:{comment_count}"
+        comments_cache.set(cache_key, (comments, comments_str.strip()))
         return comments, comments_str.strip()
     except:
         return None, None
@@ -186,21 +543,83 @@ def get_token_count(prompt, encoding_name):
     return num_tokens
 
 
-def ask_chatgpt(prompt, system_role):
+def get_usage_endpoint():
+    """
+    Return the endpoint to charge a ChatGPT call to.
+
+    Returns:
+        str: The Flask endpoint of the current request, or "background" outside of a request
+            (e.g. prefetching or refreshing creator profiles).
+    """
+
+    if has_request_context() and request.endpoint:
+        return request.endpoint
+    return "background"
+
+
+def get_cancellation():
+    """
+    Return the cancellation token of the current request.
+
+    Returns:
+        CancellationToken: The token created by admit_request, or one that is never cancelled outside
+            of a request (e.g. prefetching or refreshing creator profiles).
+    """
+
+    if has_request_context():
+        return g.get("cancellation", NEVER_CANCELLED)
+    return NEVER_CANCELLED
+
+
+def route_prompt(task, prompt, system_role):
+    """
+    Choose the model route of a prompt from its task and token count.
+
+    Args:
+        task (str): The task of the prompt, e.g. "summary" or "score".
+        prompt (str): The user's input prompt.
+        system_role (str): The role of the system for context setting in the conversation.
+
+    Returns:
+        tuple:
+            - dict: The route from the model router, or None if the prompt is too long for every model.
+            - int: The tokens of the system role and prompt.
+    """
+
+    prompt_tokens = get_token_count(
+        system_role + prompt, model_router.counting_model(task)
+    )
+    return model_router.route(task, prompt_tokens), prompt_tokens
+
+
+def ask_chatgpt(
+    prompt, system_role, use_cache=True, call_site="other", attempt=0, task="analysis"
+):
     """
     Send a prompt to ChatGPT and retrieve the response.
 
     This function sends a prompt to the OpenAI ChatGPT model with a specified system role and returns the response.
+    The model and response limit are chosen by the model router from the task and the prompt size.
+    Successful responses are cached by a hash of the request parameters, so repeating a prompt returns the
+    cached response without another OpenAI round-trip.
 
     Args:
         prompt (str): The user's input prompt.
         system_role (str): The role of the system for context setting in the conversation.
+        use_cache (bool, optional): Whether to look up the response in the cache. When False, ChatGPT is always
+            prompted and the fresh response replaces the cached one. Defaults to True.
+        call_site (str, optional): The step of the pipeline the call is accounted to, e.g. "credibility".
+        attempt (int, optional): The index of the attempt in a retry loop, 0 for the first attempt.
+        task (str, optional): The task used to route the prompt, e.g. "summary" or "score". Defaults to "analysis".
 
     Returns:
         tuple:
             - str: The response from ChatGPT if successful.
             - str: None if successful, or an error message if an error occurs.
 
+    Raises:
+        RequestCancelled: If the request making the call was abandoned or ran past its deadline.
+
     Examples:
         >>> ask_chatgpt("Tell me a joke.", "You are a friendly assistant.")
         ('Why don't scientists trust atoms? Because they make up everything!', None)
@@ -208,273 +627,1458 @@ def ask_chatgpt(prompt, system_role):
         (None, 'OpenAIError: Invalid request')
     """
 
+    route, request_tokens = route_prompt(task, prompt, system_role)
+    if route is None:
+        return None, "The prompt is too long for every model!"
+
+    model, temperature, max_tokens = (
+        route["model"],
+        route["temperature"],
+        route["max_tokens"],
+    )
+    cache_key = get_cache_key(model, system_role, prompt, temperature, max_tokens)
+    endpoint = get_usage_endpoint()
+    if use_cache and not LLM_CACHE_DISABLED:
+        cached_response = llm_cache.get(cache_key)
+        if cached_response is not None:
+            llm_usage.record(
+                endpoint,
+                call_site,
+                model,
+                cached=True,
+                retry=attempt > 0,
+                route=route["name"],
+            )
+            return cached_response, None
+
+    # Stop before spending tokens on an abandoned request, and never wait past its deadline
+    cancellation = get_cancellation()
+    cancellation.check()
+    remaining = cancellation.remaining()
+    request_timeout = {"timeout": remaining} if remaining is not None else {}
+
+    # Wait for room in the tokens-per-minute budget before calling OpenAI
+    reservation = openai_governor.reserve(
+        request_tokens + max_tokens,
+        timeout=30 if remaining is None else min(30, remaining),
+    )
+    if reservation is None:
+        cancellation.check()
+        return None, "OpenAI token budget exhausted, please try again later!"
+
+    used_tokens = prompt_tokens = completion_tokens = 0
+    failed = True
+    start = time.monotonic()
     try:
-        completion = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        request_options = {
+            "model": model,
+            "messages": [
                 {"role": "system", "content": system_role},
                 {"role": "user", "content": prompt},
             ],
-            max_tokens=RESPONSE_TOKEN_LIMIT,
-            temperature=0.7,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        completion = recorder.call(
+            "openai",
+            request_options,
+            lambda: openai_client.get().chat.completions.create(
+                **request_options, **request_timeout
+            ),
+            encode=lambda completion: completion.model_dump(),
+            decode=to_namespace,
         )
-        return completion.choices[0].message.content, None
-    except OpenAIError as e:
+        if completion.usage is not None:
+            used_tokens = completion.usage.total_tokens
+            prompt_tokens = completion.usage.prompt_tokens
+            completion_tokens = completion.usage.completion_tokens
+        response = completion.choices[0].message.content
+        if response is not None and not LLM_CACHE_DISABLED:
+            llm_cache.set(cache_key, response)
+        failed = False
+        return response, None
+    except openai.OpenAIError as e:
         return None, f"OpenAIError: {str(e)}"
     except Exception as e:
         return None, {str(e)}
+    finally:
+        openai_governor.settle(reservation, used_tokens)
+        llm_usage.record(
+            endpoint,
+            call_site,
+            model,
+            prompt_tokens,
+            completion_tokens,
+            time.monotonic() - start,
+            error=failed,
+            retry=attempt > 0,
+            route=route["name"],
+        )
 
 
-def get_youtube_video_title(video_url):
+def ask_chatgpt_stream(prompt, system_role, call_site="other", task="summary"):
     """
-    Retrieve the title of a YouTube video from its URL.
+    Send a prompt to ChatGPT and yield the response as it is generated.
 
-    This function uses the yt-dlp library to extract the title of a YouTube video from the provided URL.
+    This function is the streaming counterpart of ask_chatgpt. It requests a streamed completion
+    and yields each piece of content as soon as OpenAI sends it, so callers can forward tokens
+    to the client instead of waiting for the full response.
 
     Args:
-        video_url (str): The URL of the YouTube video.
+        prompt (str): The user's input prompt.
+        system_role (str): The role of the system for context setting in the conversation.
+        call_site (str, optional): The step of the pipeline the call is accounted to, e.g. "video_summary".
+        task (str, optional): The task used to route the prompt. Defaults to "summary".
 
-    Returns:
-        str: The title of the YouTube video if successful, or None if the title could not be retrieved.
+    Yields:
+        str: The next piece of the response from ChatGPT.
+
+    Raises:
+        OpenAIError: If the request fails, the stream is interrupted, the prompt is too long for every model,
+            or the OpenAI token budget is exhausted.
+        RequestCancelled: If the request making the call was abandoned or ran past its deadline.
+
+    Examples:
+        >>> "".join(ask_chatgpt_stream("Tell me a joke.", "You are a friendly assistant."))
+        'Why don't scientists trust atoms? Because they make up everything!'
     """
 
-    ydl_opts = {
-        "quiet": True,
-        "no_warnings": True,
-        "skip_download": True,
-        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-    }
+    route, request_tokens = route_prompt(task, prompt, system_role)
+    if route is None:
+        raise openai.OpenAIError("The prompt is too long for every model!")
+
+    # Stop before spending tokens on an abandoned request, and never wait past its deadline
+    cancellation = get_cancellation()
+    cancellation.check()
+    remaining = cancellation.remaining()
+    request_timeout = {"timeout": remaining} if remaining is not None else {}
+
+    # Wait for room in the tokens-per-minute budget before calling OpenAI
+    reservation = openai_governor.reserve(
+        request_tokens + route["max_tokens"],
+        timeout=30 if remaining is None else min(30, remaining),
+    )
+    if reservation is None:
+        cancellation.check()
+        raise openai.OpenAIError(
+            "OpenAI token budget exhausted, please try again later!"
+        )
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info_dict = ydl.extract_info(video_url, download=False)
-        video_title = info_dict.get("title", None)
-        return video_title
+    endpoint = get_usage_endpoint()
+    used_tokens = prompt_tokens = completion_tokens = 0
+    failed = True
+    start = time.monotonic()
+    try:
+        request_options = {
+            "model": route["model"],
+            "messages": [
+                {"role": "system", "content": system_role},
+                {"role": "user", "content": prompt},
+            ],
+            "max_tokens": route["max_tokens"],
+            "temperature": route["temperature"],
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        stream = recorder.stream(
+            "openai",
+            request_options,
+            lambda: openai_client.get().chat.completions.create(
+                **request_options, **request_timeout
+            ),
+            encode=lambda chunk: chunk.model_dump(),
+            decode=to_namespace,
+        )
+        for chunk in stream:
+            cancellation.check()
+            # The final chunk carries the usage of the whole completion
+            if chunk.usage is not None:
+                used_tokens = chunk.usage.total_tokens
+                prompt_tokens = chunk.usage.prompt_tokens
+                completion_tokens = chunk.usage.completion_tokens
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        failed = False
+    finally:
+        openai_governor.settle(reservation, used_tokens)
+        llm_usage.record(
+            endpoint,
+            call_site,
+            route["model"],
+            prompt_tokens,
+            completion_tokens,
+            time.monotonic() - start,
+            error=failed,
+            route=route["name"],
+        )
 
 
-def sanitize_title(title):
+def format_sse(event, data):
     """
-    Sanitize the video title by removing invalid characters.
-
-    This function removes characters that are not allowed in file names from the provided video title.
+    Format a server-sent event.
 
     Args:
-        title (str): The original video title.
+        event (str): The name of the event.
+        data (dict): The JSON-serializable payload of the event.
 
     Returns:
-        str: The sanitized video title with invalid characters removed.
+        str: The event encoded in the text/event-stream format.
 
     Examples:
-        >>> sanitize_title("My Video: How to *Make* Money?")
-        'My Video How to Make Money'
-        >>> sanitize_title("Invalid/Characters|In*Title")
-        'InvalidCharactersInTitle'
+        >>> format_sse("video_summary", {"token": "Hello"})
+        'event: video_summary\ndata: {"token": "Hello"}\n\n'
     """
-    return re.sub(r'[\/:*?"<>|]', "", title)
+
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
-def update_combined_progress():
+def shrink_transcript(captions):
     """
-    Update the combined progress of the download.
+    Pre-summarize a transcript to its most informative spans before the summary prompt.
 
-    This function calculates the combined progress based on the individual
-    progress of video, audio, and ffmpeg tasks. The combined progress is
-    updated as a global variable.
+    The spans are selected locally with TextRank over TF-IDF vectors until the token budget is spent,
+    so ChatGPT processes a fraction of the filler-heavy caption text.
+
+    Args:
+        captions (list): The caption dictionaries of the video.
 
     Returns:
-        None
+        str: The whole transcript if it fits the budget, otherwise the selected spans in order. None
+            if the transcript is too long to pre-summarize.
     """
 
-    global combined_progress
-    global progress
-    video_progress = min(40.0, progress["video"] * 0.4)
-    audio_progress = min(40.0, progress["audio"] * 0.4)
-    ffmpeg_progress = min(20.0, progress["ffmpeg"] * 0.2)
-    combined_progress = video_progress + audio_progress + ffmpeg_progress
+    model = model_router.counting_model("summary")
+    try:
+        return presummarize.presummarize(
+            [caption["text"] for caption in captions],
+            count_tokens=lambda text: get_token_count(text, model),
+        )
+    except presummarize.TranscriptTooLong as e:
+        print(f"Transcript too long to pre-summarize: {str(e)}")
+        return None
 
 
-def clean_hook_str(ansi_str):
+def build_transcript_prompt(transcript):
     """
-    Clean the ANSI escape codes from the progress string.
-
-    This function removes any ANSI escape codes from the progress string
-    and extracts the numeric part of the string.
+    Write the ChatGPT prompt for generating a video summary.
 
     Args:
-        ansi_str (str): The progress string containing ANSI escape codes.
+        transcript (str): The full transcript of the video.
 
     Returns:
-        str: The cleaned progress string containing only numeric characters and a decimal point.
-
-    Examples:
-        >>> clean_str = clean_hook_str(' 45.4%')
-        '45.4'
+        str: The video summary prompt.
     """
 
-    clean_str = ""
-    for char in ansi_str:
-        if char.isnumeric() or char == ".":
-            clean_str += char
-
-    if os.getenv("OS", "") == "macOS":
-        return clean_str[3:]
-
-    return clean_str
+    return f"""
+        Summarize the following YouTube transcript in 200-250 words: {transcript}
+        Do not include any details about the comments.
+    """
 
 
-def video_progress_hook(d):
+def build_comments_prompt(video_summary, comments_str):
     """
-    Update the video download progress.
-
-    This function is called during the video download process to update
-    the progress of the video download. It cleans the progress string,
-    converts it to a float, and updates the global progress dictionary.
+    Write the ChatGPT prompt for generating a comments summary.
 
     Args:
-        d (dict): A dictionary containing the download status and progress.
+        video_summary (str): The summary of the video transcript.
+        comments_str (str): The formatted comments of the video.
 
     Returns:
-        None
+        str: The comments summary prompt.
     """
 
-    global progress
-    if d["status"] == "downloading":
-        try:
-            progress["video"] = float(clean_hook_str(d["_percent_str"]))
-            update_combined_progress()
-        except ValueError as e:
-            print(f"Error converting video progress to float: {e}")
-            progress["video"] = 0
+    return f"""
+            Here is a summary of a YouTube transcript: {video_summary}
+            Summarize the following comments section for this video: {comments_str}
+            Do not include any details about the transcript, only the comments.
+            Do not give a list, but a paragraph.
+        """
 
 
-def audio_progress_hook(d):
+def get_video_metadata(video_id):
     """
-    Update the audio download progress.
+    Retrieve the metadata and format ladder of a YouTube video, extracting it at most once per hour.
 
-    This function is called during the audio download process to update
-    the progress of the audio download. It cleans the progress string,
-    converts it to a float, and updates the global progress dictionary.
+    This function uses the yt-dlp library to extract the info of a YouTube video and caches it together
+    with the video's format ladder, so the title, resolutions, and downloads all share one extraction.
 
     Args:
-        d (dict): A dictionary containing the download status and progress.
+        video_id (str): The ID of the YouTube video.
 
     Returns:
-        None
+        dict:
+            - "title": The title of the video.
+            - "duration": The duration of the video in seconds.
+            - "ladder": The format ladder from build_format_ladder.
+            - "info_dict": The raw yt-dlp info dictionary, used to download without re-extracting.
+            - "proxy": The proxy URL the info was extracted through, or None. Stream URLs can be bound
+                to the extracting IP, so downloads reuse it.
     """
 
-    global progress
-    if d["status"] == "downloading":
-        try:
-            progress["audio"] = float(clean_hook_str(d["_percent_str"]))
-            update_combined_progress()
-        except ValueError as e:
-            print(f"Error converting audio progress to float: {e}")
-            progress["audio"] = 0
-
+    metadata = video_metadata_cache.get(video_id)
+    if metadata is not None:
+        return metadata
 
-def ffmpeg_progress_hook(line, estimated_duration):
-    """
-    Update the ffmpeg processing progress.
+    video_url = f"https://www.youtube.com/watch?v={video_id}"
+    ydl_opts = {
+        "quiet": True,
+        "no_warnings": True,
+        "skip_download": True,
+        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    }
 
-    This function is called during the ffmpeg processing to update the
-    progress of the ffmpeg task. It extracts the time from the ffmpeg
-    output line, calculates the progress, and updates the global progress
-    dictionary.
+    def extract_info(proxy):
+        proxy_opts = {"proxy": proxy.url} if proxy is not None else {}
 
-    Args:
-        line (str): A line of output from the ffmpeg process.
-        estimated_duration (float): The estimated duration of the ffmpeg process in seconds.
+        def extract():
+            with yt_dlp.YoutubeDL({**ydl_opts, **proxy_opts}) as ydl:
+                # Sanitize the info so it can be stored in a shared backend as JSON
+                return ydl.sanitize_info(ydl.extract_info(video_url, download=False))
 
-    Returns:
-        None
+        return recorder.call("yt_dlp", video_url, extract), proxy
 
-    Examples:
-        >>> line = 'frame=  100 fps=0.0 q=-1.0 Lsize=    1024kB time=00:00:05.00 bitrate=1677.8kbits/s speed=  10x'
-        >>> estimated_duration = 10.0
-        >>> ffmpeg_progress_hook(line, estimated_duration)
-    """
+    info_dict, proxy = proxy_pool.call(extract_info)
 
-    global progress
-    match = re.search(r"time=(\d+:\d+:\d+.\d+)", line)
-    if match:
-        time_str = match.group(1)
-        h, m, s = map(float, time_str.split(":"))
-        total_seconds = h * 3600 + m * 60 + s
-        progress["ffmpeg"] = (total_seconds / estimated_duration) * 100
-        update_combined_progress()
+    metadata = {
+        "title": info_dict.get("title", None),
+        "duration": info_dict.get("duration", 0),
+        "ladder": build_format_ladder(info_dict),
+        "info_dict": info_dict,
+        "proxy": proxy.url if proxy is not None else None,
+    }
+    video_metadata_cache.set(video_id, metadata)
+    return metadata
 
 
-def extract_youtube_handle(url):
+def get_playlist_info(url, max_entries=BULK_MAX_ENTRIES):
     """
-    Extract YouTube handle or channel ID from different URL formats:
-        - https://youtube.com/@username
-        - https://www.youtube.com/@username
-        - https://youtube.com/c/username
-        - https://youtube.com/user/username
-        - https://www.youtube.com/channel/UCxxxxxxxxxx
-        - @username
+    Resolve the videos of a playlist or channel with a single flat yt-dlp extraction.
+
+    The entries are listed without extracting each video, so resolving a playlist costs one request
+    no matter how many videos it has.
 
     Args:
-        url (str): The URL of the YouTube channel.
+        url (str): The URL of a playlist or channel.
+        max_entries (int, optional): The most entries to resolve.
 
     Returns:
-        tuple: (handle or None, channel_id or None)
-        If handle is found, returns (handle, None)
-        If channel ID is found, returns (None, channel_id)
-        If neither is found, returns (None, None)
+        tuple:
+            - str: The title of the playlist or channel.
+            - list: The "id" and "title" of each video, in playlist order.
     """
-    # If URL is empty
-    if not url:
-        return None, None
-
-    # If it's already in @handle format
-    if url.startswith("@"):
-        return url, None
-
-    # Try to extract channel ID first
-    channel_id_pattern = r"youtube\.com/channel/([\w-]+)"
-    channel_match = re.search(channel_id_pattern, url)
-    if channel_match:
-        return None, channel_match.group(1)
 
-    # Try to extract handle from URL
-    handle_patterns = [
-        r"youtube\.com/(@[\w-]+)",  # matches @username in URL
-        r"youtube\.com/c/([\w-]+)",  # matches /c/username format
-        r"youtube\.com/user/([\w-]+)",  # matches /user/username format
-    ]
+    url = get_channel_videos_url(url)
+    ydl_opts = {
+        "quiet": True,
+        "no_warnings": True,
+        "skip_download": True,
+        "extract_flat": "in_playlist",
+        "playlistend": max_entries,
+        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    }
 
-    for pattern in handle_patterns:
-        match = re.search(pattern, url)
-        if match:
-            handle = match.group(1)
-            # Add @ prefix if not present (for /c/ and /user/ formats)
-            return handle if handle.startswith("@") else f"@{handle}", None
+    def extract_info(proxy):
+        proxy_opts = {"proxy": proxy.url} if proxy is not None else {}
 
-    return None, None
+        def extract():
+            with yt_dlp.YoutubeDL({**ydl_opts, **proxy_opts}) as ydl:
+                return ydl.sanitize_info(ydl.extract_info(url, download=False))
 
+        return recorder.call("yt_dlp_playlist", [url, max_entries], extract)
 
-@app.route("/")
-def hello():
-    return "You have reached the Youtube Rehashed Flask backend server!"
+    info = proxy_pool.call(extract_info)
+    return info.get("title") or "playlist", get_playlist_entries(info, max_entries)
 
 
-@app.route("/api/get-summaries", methods=["GET"])
-def get_summaries():
+def get_youtube_video_title(video_url):
     """
-    Return video details, comments, and summaries for given YouTube video.
+    Retrieve the title of a YouTube video from its URL.
 
-    HTTP Method: GET
+    This function looks up the title in the cached metadata of the video, extracting it with yt-dlp on a miss.
 
-    Request Parameters:
-        video_url (str): The URL of the YT video to generate summaries for. (required)
+    Args:
+        video_url (str): The URL of the YouTube video.
 
-    Responses:
-        200: Video ID, video title, comments, and summaries for the given video.
-        400: Missing parameters, invalid video URL or ID, or video is too long.
-        500: An error occurred when fetching the comments or prompting ChatGPT.
+    Returns:
+        str: The title of the YouTube video if successful, or None if the title could not be retrieved.
+    """
 
-    Example:
+    video_id = extract_video_id(video_url)
+    if video_id is None:
+        return None
+
+    try:
+        return get_video_metadata(video_id)["title"]
+    except Exception as e:
+        print(f"Error retrieving video title: {str(e)}")
+        return None
+
+
+def sanitize_title(title):
+    """
+    Sanitize the video title by removing invalid characters.
+
+    This function removes characters that are not allowed in file names from the provided video title.
+
+    Args:
+        title (str): The original video title.
+
+    Returns:
+        str: The sanitized video title with invalid characters removed.
+
+    Examples:
+        >>> sanitize_title("My Video: How to *Make* Money?")
+        'My Video How to Make Money'
+        >>> sanitize_title("Invalid/Characters|In*Title")
+        'InvalidCharactersInTitle'
+    """
+    return re.sub(r'[\/:*?"<>|]', "", title)
+
+
+def parse_timestamp(value):
+    """
+    Parse a clip timestamp into seconds.
+
+    Args:
+        value (str): A number of seconds or a timestamp in [HH:]MM:SS format.
+
+    Returns:
+        float: The timestamp in seconds.
+
+    Raises:
+        ValueError: If the timestamp is malformed or negative.
+
+    Examples:
+        >>> parse_timestamp("90")
+        90.0
+        >>> parse_timestamp("1:02:03.5")
+        3723.5
+    """
+
+    parts = value.split(":")
+    if len(parts) > 3:
+        raise ValueError(f"Invalid timestamp: {value}")
+
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+
+    if seconds < 0:
+        raise ValueError(f"Invalid timestamp: {value}")
+    return seconds
+
+
+def format_clip_label(start, end):
+    """
+    Format a clip's time range for use in a file name.
+
+    Args:
+        start (float): The start of the clip in seconds.
+        end (float): The end of the clip in seconds.
+
+    Returns:
+        str: The time range, e.g. "0-30 to 1-15" for 0:30 to 1:15.
+
+    Examples:
+        >>> format_clip_label(30, 75)
+        '0-30 to 1-15'
+    """
+
+    def format_time(seconds):
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        if hours:
+            return f"{hours}-{minutes:02d}-{seconds:02d}"
+        return f"{minutes}-{seconds:02d}"
+
+    return f"{format_time(start)} to {format_time(end)}"
+
+
+def remove_downloaded_file(output_file):
+    """
+    Delete a downloaded file and its scratch directory, logging instead of raising if it cannot be removed.
+
+    Args:
+        output_file (str): The path of the downloaded file.
+
+    Returns:
+        None
+    """
+
+    try:
+        os.remove(output_file)
+        # The scratch directory of the download is empty once its output is gone
+        directory = os.path.dirname(output_file)
+        if os.path.basename(directory).startswith(SCRATCH_PREFIX):
+            os.rmdir(directory)
+    except Exception as e:
+        print(f"Error removing file: {str(e)}")
+
+
+def send_downloaded_file(output_file, download_name):
+    """
+    Stream a downloaded file back to the user and delete it once the response is sent.
+
+    Args:
+        output_file (str): The path of the downloaded file.
+        download_name (str): The file name the user saves the download as.
+
+    Returns:
+        Response: The file as an attachment.
+    """
+
+    @after_this_request
+    def remove_file(response):
+        remove_downloaded_file(output_file)
+        return response
+
+    return send_file(output_file, as_attachment=True, download_name=download_name)
+
+
+def remove_partial_downloads(*paths):
+    """
+    Delete the files of an abandoned download, including yt-dlp's .part files.
+
+    Args:
+        *paths (str): The paths of the files the download was writing.
+
+    Returns:
+        None
+    """
+
+    for path in paths:
+        for partial in (path, f"{path}.part"):
+            if os.path.exists(partial):
+                remove_downloaded_file(partial)
+
+
+def merge_streams(
+    video_file,
+    audio_file,
+    output_file,
+    download_progress,
+    duration,
+    priority=MUX_PRIORITY_INTERACTIVE,
+    cancellation=NEVER_CANCELLED,
+):
+    """
+    Merge a video stream and an audio stream with ffmpeg without re-encoding.
+
+    The merge waits for a slot of the mux scheduler, so no more ffmpeg processes run at once than
+    there are cores, and deletes the separate streams once it is done.
+
+    Args:
+        video_file (str): The path of the video stream.
+        audio_file (str): The path of the audio stream.
+        output_file (str): The path of the merged file.
+        download_progress (DownloadProgress): The progress to update, with an "ffmpeg" stage.
+        duration (float): The duration of the media being merged, in seconds.
+        priority (int, optional): The priority of the merge in the mux scheduler; lower runs first.
+        cancellation (CancellationToken, optional): Stops waiting for a slot, or terminates ffmpeg, when cancelled.
+
+    Returns:
+        None
+
+    Raises:
+        RequestCancelled: If the token was cancelled, after removing the streams and the partial output.
+    """
+
+    # Merge video and audio using ffmpeg without re-encoding,
+    # reporting machine-readable progress on stdout
+    ffmpeg_command = [
+        "ffmpeg",
+        "-hide_banner",
+        "-nostats",
+        "-progress",
+        "pipe:1",
+        "-i",
+        video_file,
+        "-i",
+        audio_file,
+        "-c:v",
+        "copy",
+        "-c:a",
+        "copy",
+        output_file,
+    ]
+
+    try:
+        with mux_scheduler.slot(priority, cancellation):
+            print("Starting ffmpeg merge")
+            print(f"FFmpeg command: {' '.join(ffmpeg_command)}")
+            process = subprocess.Popen(
+                ffmpeg_command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+            )
+            try:
+                # ffmpeg writes progress about twice a second, so a cancelled merge stops within half a second
+                for line in process.stdout:
+                    cancellation.check()
+                    if not record_ffmpeg_progress(download_progress, line, duration):
+                        print(f"FFmpeg output: {line.strip()}")
+                process.wait()
+            except RequestCancelled:
+                print("Terminating ffmpeg merge of a cancelled download")
+                process.terminate()
+                process.wait()
+                raise
+    except RequestCancelled:
+        remove_partial_downloads(video_file, audio_file, output_file)
+        raise
+    print(f"FFmpeg process completed with return code: {process.returncode}")
+
+    # Cleanup: Delete the separate video and audio files
+    print("Cleaning up temporary files")
+    os.remove(video_file)
+    os.remove(audio_file)
+
+
+def download_media(
+    metadata,
+    download_progress,
+    mode="video",
+    video_format=None,
+    video_resolution=None,
+    clip=None,
+    cancellation=NEVER_CANCELLED,
+    priority=MUX_PRIORITY_INTERACTIVE,
+):
+    """
+    Download a video (merged with its audio) or its audio only from the cached metadata.
+
+    Space for the download is reserved in the downloads directory before it starts, from the
+    estimated sizes of its streams. Every download writes to its own scratch directory with files
+    named by video ID, so concurrent downloads of the same video or of videos with the same title
+    never overwrite each other; the title is only used for the name the file is saved as.
+
+    Args:
+        metadata (dict): The metadata of the video from get_video_metadata.
+        download_progress (DownloadProgress): The progress to update, with the stages of the mode.
+        mode (str, optional): "video" for the merged video and audio, or "audio" for the audio only.
+        video_format (str, optional): The yt-dlp format of the video stream. Required for video mode.
+        video_resolution (str, optional): The resolution of the video stream, used in the file name.
+        clip (tuple, optional): The (start, end) seconds of a clip to download instead of the whole video.
+        cancellation (CancellationToken, optional): Stops the downloads and the merge when cancelled.
+        priority (int, optional): The priority of the merge in the mux scheduler; lower runs first.
+
+    Returns:
+        tuple: The path of the downloaded file in its scratch directory, and the file name to save it as.
+
+    Raises:
+        yt_dlp.utils.DownloadError: If a stream could not be downloaded.
+        InsufficientDiskSpace: If the download would not leave enough free space.
+        RequestCancelled: If the token was cancelled, after removing the partial files.
+    """
+
+    video_url = metadata["info_dict"].get("webpage_url")
+    video_id = metadata["info_dict"]["id"]
+    sanitized_title = sanitize_title(metadata["title"] or video_id)
+    estimated_duration = metadata["duration"]
+
+    # Estimate the bytes of the streams, only the clipped share of them for a clip
+    estimated_size = (
+        estimate_download_size(metadata["ladder"], video_resolution, video_format)
+        if mode == "video"
+        else estimate_download_size(metadata["ladder"])
+    ) or 0
+    if clip is not None:
+        if estimated_duration:
+            estimated_size = int(
+                estimated_size * (clip[1] - clip[0]) / estimated_duration
+            )
+        estimated_duration = clip[1] - clip[0]
+
+    # Common options for both video and audio downloads
+    common_opts = {
+        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "quiet": True,
+    }
+    if metadata["proxy"] is not None:
+        common_opts["proxy"] = metadata["proxy"]
+
+    # Only download the requested section of each stream, cut at keyframes without re-encoding
+    if clip is not None:
+        common_opts["download_ranges"] = yt_dlp.utils.download_range_func(None, [clip])
+        common_opts["force_keyframes_at_cuts"] = False
+
+    clip_label = f" [{format_clip_label(*clip)}]" if clip is not None else ""
+
+    # yt-dlp calls its progress hooks between chunks, so raising from one stops the download
+    def check_cancellation(d):
+        cancellation.check()
+
+    scratch_dir = disk_guard.make_scratch_dir()
+    try:
+        # Audio only: download the audio stream straight to the output file, no video and no merge
+        if mode == "audio":
+            output_file = os.path.join(scratch_dir, f"{video_id}.m4a")
+            audio_opts = {
+                **common_opts,
+                "format": "bestaudio[ext=m4a]",  # Choose best audio
+                "outtmpl": output_file,
+                "progress_hooks": [
+                    make_ytdlp_hook(download_progress, "audio"),
+                    check_cancellation,
+                ],
+            }
+
+            with disk_guard.reservation(estimated_size, [scratch_dir]):
+                print(f"Starting audio-only download for {video_url}")
+                with yt_dlp.YoutubeDL(audio_opts) as ydl:
+                    ydl.process_ie_result(
+                        copy.deepcopy(metadata["info_dict"]), download=True
+                    )
+                    print("Audio download completed")
+
+            download_progress.finish("audio")
+            return output_file, f"{sanitized_title}{clip_label}.m4a"
+
+        # Paths to the downloaded files
+        video_file = os.path.join(scratch_dir, f"{video_id}_video.mp4")
+        audio_file = os.path.join(scratch_dir, f"{video_id}_audio.m4a")
+        output_file = os.path.join(scratch_dir, f"{video_id}.mp4")
+
+        # Options for downloading video only
+        video_opts = {
+            **common_opts,
+            "format": video_format,
+            "outtmpl": video_file,
+            "progress_hooks": [
+                make_ytdlp_hook(download_progress, "video"),
+                check_cancellation,
+            ],
+        }
+
+        # Options for downloading audio only
+        audio_opts = {
+            **common_opts,
+            "format": "bestaudio[ext=m4a]",  # Choose best audio
+            "outtmpl": audio_file,
+            "progress_hooks": [
+                make_ytdlp_hook(download_progress, "audio"),
+                check_cancellation,
+            ],
+        }
+
+        # The separate streams and the merged copy of them are on disk together until the merge ends
+        with disk_guard.reservation(2 * estimated_size, [scratch_dir]):
+            # Download video from the cached info instead of extracting it again
+            print(
+                f"Starting video download for {video_url}, duration: {estimated_duration}"
+            )
+            with yt_dlp.YoutubeDL(video_opts) as ydl:
+                ydl.process_ie_result(
+                    copy.deepcopy(metadata["info_dict"]), download=True
+                )
+                print("Video download completed")
+
+            # Download audio
+            print("Starting audio download")
+            with yt_dlp.YoutubeDL(audio_opts) as ydl:
+                ydl.process_ie_result(
+                    copy.deepcopy(metadata["info_dict"]), download=True
+                )
+                print("Audio download completed")
+
+            print(
+                f"Checking if files exist: video={os.path.exists(video_file)}, audio={os.path.exists(audio_file)}"
+            )
+
+            merge_streams(
+                video_file,
+                audio_file,
+                output_file,
+                download_progress,
+                estimated_duration,
+                priority,
+                cancellation,
+            )
+
+        return output_file, f"{sanitized_title} [{video_resolution}]{clip_label}.mp4"
+    except BaseException:
+        # Failed and cancelled downloads leave nothing behind in their scratch directory
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+        raise
+
+
+def get_youtube_api(url):
+    """
+    Call the YouTube Data API.
+
+    Args:
+        url (str): The full request URL, including the API key.
+
+    Returns:
+        dict: The JSON response.
+    """
+
+    # The API key is left out of the fixture key so fixtures replay with any key
+    fixture_key = re.sub(r"&key=[^&]*", "", url)
+    return recorder.call("googleapis", fixture_key, lambda: requests.get(url).json())
+
+
+def extract_youtube_handle(url):
+    """
+    Extract YouTube handle or channel ID from different URL formats:
+        - https://youtube.com/@username
+        - https://www.youtube.com/@username
+        - https://youtube.com/c/username
+        - https://youtube.com/user/username
+        - https://www.youtube.com/channel/UCxxxxxxxxxx
+        - @username
+
+    Args:
+        url (str): The URL of the YouTube channel.
+
+    Returns:
+        tuple: (handle or None, channel_id or None)
+        If handle is found, returns (handle, None)
+        If channel ID is found, returns (None, channel_id)
+        If neither is found, returns (None, None)
+    """
+    # If URL is empty
+    if not url:
+        return None, None
+
+    # If it's already in @handle format
+    if url.startswith("@"):
+        return url, None
+
+    # Try to extract channel ID first
+    channel_id_pattern = r"youtube\.com/channel/([\w-]+)"
+    channel_match = re.search(channel_id_pattern, url)
+    if channel_match:
+        return None, channel_match.group(1)
+
+    # Try to extract handle from URL
+    handle_patterns = [
+        r"youtube\.com/(@[\w-]+)",  # matches @username in URL
+        r"youtube\.com/c/([\w-]+)",  # matches /c/username format
+        r"youtube\.com/user/([\w-]+)",  # matches /user/username format
+    ]
+
+    for pattern in handle_patterns:
+        match = re.search(pattern, url)
+        if match:
+            handle = match.group(1)
+            # Add @ prefix if not present (for /c/ and /user/ formats)
+            return handle if handle.startswith("@") else f"@{handle}", None
+
+    return None, None
+
+
+def summarize_video(video_url, video_id, languages=DEFAULT_TRANSCRIPT_LANGUAGES):
+    """
+    Fetch the transcript and comments of a YouTube video and summarize both with ChatGPT.
+
+    Args:
+        video_url (str): The URL of the YouTube video.
+        video_id (str): The ID of the YouTube video.
+        languages (tuple, optional): The preferred transcript languages, most preferred first.
+
+    Returns:
+        tuple:
+            - dict: Video ID, video title, captions, comments, and summaries, or an error message.
+            - int: The HTTP status code for the response.
+    """
+
+    # Fetch YouTube transcript using YouTubeTranscriptAPI
+    result = fetch_transcript(video_id, languages)
+    if result is None:
+        return (
+            {"error": "YouTube video does not exist or is missing a transcript!"},
+            400,
+        )
+    captions, transcript = result
+
+    # Index the captions so keyword searches for this video skip the transcript fetch
+    cache_transcript_index(get_transcript_key(video_id, ",".join(languages)), captions)
+
+    # Get web-scraped comments from the YouTube Comment Downloader API
+    comments, comments_str = get_comments(video_url)
+    if comments is None:
+        return {"error": "Comments could not be retrieved for this video!"}, 500
+
+    # Reject transcripts too long to pre-summarize on the request thread
+    shrunk_transcript = shrink_transcript(captions)
+    if shrunk_transcript is None:
+        return {"error": "This video is too long to summarize!"}, 400
+
+    # Write ChatGPT prompt for generating video summary
+    transcript_prompt = build_transcript_prompt(shrunk_transcript)
+
+    # Ensure that some model's context fits the transcript, counted with OpenAI's Tiktoken tokenizer
+    if (
+        route_prompt("summary", transcript_prompt, CHATGPT_SUMMARIZING_ROLE)[0]
+        is not None
+    ):
+
+        # Generate transcript summary
+        video_summary, transcript_error = ask_chatgpt(
+            transcript_prompt,
+            CHATGPT_SUMMARIZING_ROLE,
+            call_site="video_summary",
+            task="summary",
+        )
+
+        if transcript_error is not None:
+            return {"error": transcript_error}, 500
+
+        # Write ChatGPT prompt for generating comment summary
+        comments_prompt = build_comments_prompt(video_summary, comments_str)
+
+        # Ensure that transcript summary and comments together fit some model's context
+        if (
+            route_prompt("summary", comments_prompt, CHATGPT_SUMMARIZING_ROLE)[0]
+            is not None
+        ):
+
+            # Generate comments summary
+            comments_summary, comments_error = ask_chatgpt(
+                comments_prompt,
+                CHATGPT_SUMMARIZING_ROLE,
+                call_site="comments_summary",
+                task="summary",
+            )
+
+            if comments_error is not None:
+                return {"error": comments_error}, 500
+            else:
+                return {
+                    "video_id": video_id,
+                    "video_title": get_youtube_video_title(video_url),
+                    "captions": captions,
+                    "comments": comments,
+                    "video_summary": video_summary,
+                    "comments_summary": comments_summary,
+                }, 200
+        else:
+            return {"error": "This video is too long to summarize!"}, 400
+    else:
+        return {"error": "This video is too long to summarize!"}, 400
+
+
+def analyze_creator(channel_url, handle, channel_id):
+    """
+    Fetch the statistics of a YouTube channel and analyze its creator with ChatGPT.
+
+    Args:
+        channel_url (str): The URL of the creator's YouTube channel.
+        handle (str): The creator's handle extracted from the URL, or None.
+        channel_id (str): The channel ID extracted from the URL, or None.
+
+    Returns:
+        tuple:
+            - dict: The creator info with statistics, background, and scores, or an error message.
+            - int: The HTTP status code for the response.
+    """
+
+    creator_info = {"channel": channel_url}
+
+    try:
+        # If we have a channel ID, fetch the handle first
+        if channel_id:
+            channel_response = get_youtube_api(
+                f"https://www.googleapis.com/youtube/v3/channels?part=snippet&id={channel_id}&key={YOUTUBE_API_KEY}"
+            )
+
+            if "items" in channel_response and len(channel_response["items"]) > 0:
+                custom_url = channel_response["items"][0]["snippet"].get("customUrl")
+                if custom_url:
+                    handle = (
+                        custom_url if custom_url.startswith("@") else f"@{custom_url}"
+                    )
+                creator_info["id"] = channel_id
+                creator_info["handle"] = handle
+            else:
+                return {"error": "Channel not found!"}, 400
+        else:
+            # Use handle to get channel ID
+            id_response = get_youtube_api(
+                f"https://www.googleapis.com/youtube/v3/channels?part=id&forHandle={handle[1:]}&key={YOUTUBE_API_KEY}"
+            )
+
+            if "items" in id_response and len(id_response["items"]) > 0:
+                channel_id = id_response["items"][0]["id"]
+                creator_info["id"] = channel_id
+                creator_info["handle"] = handle
+            else:
+                return {"error": "Creator handle does not exist!"}, 400
+
+    except Exception as e:
+        print(f"Error fetching channel info: {str(e)}")
+        return {"error": "Failed to fetch channel information"}, 500
+
+    # Fetch channel statistics based on ID
+    try:
+        statistics_response = get_youtube_api(
+            f"https://www.googleapis.com/youtube/v3/channels?part=statistics&id={channel_id}&key={YOUTUBE_API_KEY}"
+        )
+
+        if "items" in statistics_response and len(statistics_response["items"]) > 0:
+            creator_info["statistics"] = statistics_response["items"][0]["statistics"]
+        else:
+            return {"error": f"Channel statistics do not exist for {handle}!"}, 500
+    except:
+        return {"error": f"Channel statistics could not be fetched!"}, 500
+
+    # Fetch channel avatar
+    try:
+        avatar_response = get_youtube_api(
+            f"https://www.googleapis.com/youtube/v3/channels?part=snippet&id={channel_id}&key={YOUTUBE_API_KEY}"
+        )
+
+        if "items" in avatar_response and len(avatar_response["items"]) > 0:
+            thumbnails = avatar_response["items"][0]["snippet"]["thumbnails"]
+            # Try different thumbnail sizes in order of preference
+            if "maxres" in thumbnails:
+                creator_info["avatar"] = thumbnails["maxres"]["url"]
+            elif "high" in thumbnails:
+                creator_info["avatar"] = thumbnails["high"]["url"]
+            elif "medium" in thumbnails:
+                creator_info["avatar"] = thumbnails["medium"]["url"]
+            elif "default" in thumbnails:
+                creator_info["avatar"] = thumbnails["default"]["url"]
+            else:
+                creator_info["avatar"] = DEFAULT_AVATAR_URL
+        else:
+            print(f"No avatar found for channel ID: {channel_id}")
+            creator_info["avatar"] = DEFAULT_AVATAR_URL
+    except Exception as e:
+        print(f"Error fetching avatar: {str(e)}")
+        creator_info["avatar"] = DEFAULT_AVATAR_URL
+
+    # Use the cached accessibility of the avatar URL, verifying unknown URLs in the background
+    creator_info["avatar"] = avatar_validator.resolve(creator_info["avatar"])
+
+    # Fetch Channel Title
+    try:
+        title_response = get_youtube_api(
+            f"https://www.googleapis.com/youtube/v3/channels?part=snippet&id={channel_id}&key={YOUTUBE_API_KEY}"
+        )
+        if "items" in title_response and len(title_response["items"]) > 0:
+            creator_info["title"] = title_response["items"][0]["snippet"]["title"]
+        else:
+            return {"error": f"Channel title does not exist for {handle}!"}, 500
+    except:
+        return {"error": "Channel title could not be fetched!"}, 500
+
+    # Generate Background Information
+    try:
+        background_prompt = f"""
+        Give a parapgraph of background information about the following creator:
+        {creator_info["title"]} ({creator_info["handle"]})
+        """
+
+        background_response, _ = ask_chatgpt(
+            background_prompt, CHATGPT_ANALYZING_ROLE, call_site="background"
+        )
+        creator_info["background"] = background_response
+    except RequestCancelled:
+        raise
+    except:
+        return {"error": "Background information could not be fetched!"}, 500
+
+    # Generate Credibility Points and Score
+    # Retries skip the cache so an unparseable cached response gets replaced
+    max_attempts = 5
+    attempt = 0
+    while attempt < max_attempts:
+        try:
+            credibility_prompt = f"""
+            You are a YouTube channel credibility analyzer. Analyze the credibility of this creator:
+            Channel: {creator_info["title"]} ({creator_info["handle"]})
+            Subscriber Count: {creator_info["statistics"].get("subscriberCount", "Unknown")}
+            Video Count: {creator_info["statistics"].get("videoCount", "Unknown")}
+            Total Views: {creator_info["statistics"].get("viewCount", "Unknown")}
+
+            Provide a factual, well-researched analysis focusing on:
+            1. Content accuracy and fact-checking practices
+            2. Professional background and expertise in their field
+            3. Transparency about sponsorships and potential biases
+            4. Track record of corrections when mistakes are made
+            5. Quality of sources and research methods
+            6. Community engagement and response to criticism
+            7. Consistency and reliability of information
+            8. Industry recognition and peer reviews
+
+            Return your analysis in the following JSON format:
+            {{
+                "points": [
+                    // 3-5 specific, factual points about the creator's credibility
+                    // Each point must be based on verifiable information
+                    // Focus on objective measures rather than subjective opinions
+                    // Include both strengths and areas of concern
+                    // Cite specific examples where possible
+                    // Do not use objects or nested structures, only strings
+                    // Don't put the actual score deduction in the points, just the points
+                ],
+                "score": // A number between 0 and 100 representing credibility
+            }}
+
+            Scoring Guidelines:
+            - Start at 70 as a baseline for established creators
+            - Add or subtract points based on VERIFIED information only
+            - Do not speculate or make assumptions
+            - Consider the following factors:
+              * Verified expertise and credentials (+10-20)
+              * Consistent fact-checking practices (+10-15)
+              * Transparent disclosure of sponsorships/biases (+5-10)
+              * Professional affiliations and certifications (+5-10)
+              * Documented instances of misinformation (-20-30)
+              * Lack of transparency about qualifications (-10-15)
+              * Pattern of unverified claims (-15-20)
+              * Failure to correct proven errors (-10-15)
+
+            The score should be conservative and based only on verifiable information.
+            If certain information cannot be verified, do not include it in the scoring.
+            """
+
+            credibility_response, _ = ask_chatgpt(
+                credibility_prompt,
+                CHATGPT_ANALYZING_ROLE,
+                use_cache=attempt == 0,
+                call_site="credibility",
+                attempt=attempt,
+            )
+            credibility_data = json.loads(credibility_response)
+            creator_info["credibilityPoints"] = credibility_data["points"]
+            creator_info["credibilityScore"] = credibility_data["score"]
+            break  # Success, exit the loop
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            attempt += 1
+            print(f"Credibility analysis attempt {attempt} failed: {str(e)}")
+            if attempt == max_attempts:
+                return {"error": "Credibility analysis failed after 5 attempts"}, 500
+            # Wait a short time before retrying, unless the request is abandoned meanwhile
+            get_cancellation().sleep(1)
+
+    # Generate Content Quality Score
+    max_attempts = 5
+    attempt = 0
+    while attempt < max_attempts:
+        try:
+            content_quality_prompt = f"""
+            Return a score between 0 and 100 for the following creator's content quality:
+            {creator_info["title"]} ({creator_info["handle"]})
+
+            You need to conduct your own research to gather the necessary data using the web.
+
+            Take the following into account:
+            - Quality and accuracy of the content
+            - Creativity and uniqueness of the content
+            - Reasonable upload frequency for their format of content
+
+            Make sure you return only a single floating point number between 0 and 100.
+            Do not return any text other than the score.
+            """
+
+            content_quality_response, _ = ask_chatgpt(
+                content_quality_prompt,
+                CHATGPT_SCORE_ROLE,
+                use_cache=attempt == 0,
+                call_site="content_quality",
+                attempt=attempt,
+                task="score",
+            )
+            creator_info["contentQualityScore"] = re.search(
+                r"\d+", content_quality_response
+            ).group()
+            break  # Success, exit the loop
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            attempt += 1
+            print(f"Content quality analysis attempt {attempt} failed: {str(e)}")
+            if attempt == max_attempts:
+                return (
+                    {"error": "Content quality analysis failed after 5 attempts"},
+                    500,
+                )
+            # Wait a short time before retrying, unless the request is abandoned meanwhile
+            get_cancellation().sleep(1)
+
+    # Generate Engagement Score
+    attempt = 0
+    while attempt < max_attempts:
+        try:
+            engagement_prompt = f"""
+            Calculate a score between 0 and 100 for the following creator's engagement:
+            {creator_info["title"]} ({creator_info["handle"]})
+
+            You need to conduct your own research to gather the necessary data using the web.
+
+            Take the following into account:
+            - Number of views, likes, comments, and shares
+            - Engagement rate (comments per view, likes per view, shares per view)
+            - Overall impact and reach of the content
+
+            Make sure you return only a single floating point number between 0 and 100.
+            Do not return any text other than the score.
+            """
+
+            engagement_response, _ = ask_chatgpt(
+                engagement_prompt,
+                CHATGPT_SCORE_ROLE,
+                use_cache=attempt == 0,
+                call_site="engagement",
+                attempt=attempt,
+                task="score",
+            )
+            creator_info["engagementScore"] = re.search(
+                r"\d+", engagement_response
+            ).group()
+            break  # Success, exit the loop
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            attempt += 1
+            print(f"Engagement analysis attempt {attempt} failed: {str(e)}")
+            if attempt == max_attempts:
+                return {"error": "Engagement analysis failed after 5 attempts"}, 500
+            # Wait a short time before retrying, unless the request is abandoned meanwhile
+            get_cancellation().sleep(1)
+
+    return {"creator_info": creator_info}, 200
+
+
+def prefetch_video(video_id):
+    """
+    Warm the transcript, top comments, and formats of a video in the background.
+
+    Args:
+        video_id (str): The ID of the YouTube video.
+
+    Returns:
+        bool: True if the prefetch was queued.
+    """
+
+    video_url = f"https://www.youtube.com/watch?v={video_id}"
+    return prefetcher.submit(
+        video_id,
+        [
+            lambda: fetch_transcript(video_id),
+            lambda: get_comments(video_url),
+            lambda: get_video_metadata(video_id),
+        ],
+    )
+
+
+def cancel_prefetch(video_id):
+    """
+    Drop the rest of a video's prefetch once a foreground request fetches the video itself.
+
+    A prefetch step that is already running is shared with the request through the scraping
+    flights, so only the steps that have not started yet are dropped.
+
+    Args:
+        video_id (str): The ID of the YouTube video.
+
+    Returns:
+        bool: True if a pending prefetch was cancelled.
+    """
+
+    return prefetcher.cancel(video_id)
+
+
+def do_flight(flights, key, fn, *args):
+    """
+    Run fn once for all concurrent callers with the same key, unless the caller running it is cancelled.
+
+    Callers waiting on a computation whose request was abandoned take it over instead of failing
+    with the other request's cancellation.
+
+    Args:
+        flights (SingleFlight): The in-flight computations to coalesce with.
+        key (hashable): The key identifying identical work.
+        fn (callable): The function to run.
+        *args: Positional arguments for fn.
+
+    Returns:
+        tuple: The result of fn, and True if this caller shared another caller's computation.
+
+    Raises:
+        RequestCancelled: If this caller's own request is cancelled.
+    """
+
+    while True:
+        try:
+            return flights.do(key, fn, *args)
+        except RequestCancelled:
+            get_cancellation().check()
+            print(f"Taking over the cancelled computation of: {key}")
+
+
+def get_client_id():
+    """
+    Identify the client of the current request for rate limiting.
+
+    Behind TRUSTED_PROXIES reverse proxies, ProxyFix has already replaced the remote address with
+    the client address the proxies appended to X-Forwarded-For.
+
+    Returns:
+        str: The IP address of the client.
+    """
+
+    return request.remote_addr or "unknown"
+
+
+@app.before_request
+def admit_request():
+    """
+    Apply per-client rate limits and per-endpoint concurrency limits to expensive endpoints, and
+    give every request a cancellation token that fires at its deadline or when the client disconnects.
+
+    Responses:
+        429: The client exceeded its rate limit or the endpoint's wait queue is full,
+            with a Retry-After header telling the client when to try again.
+    """
+
+    endpoint = request.endpoint
+    # waitress only reports disconnects when serving with channel_request_lookahead
+    g.cancellation = CancellationToken(
+        REQUEST_DEADLINES.get(endpoint),
+        request.environ.get("waitress.client_disconnected"),
+    )
+
+    if endpoint not in ENDPOINT_LIMITS:
+        return None
+
+    retry_after = rate_limiter.check(get_client_id(), endpoint)
+    if retry_after > 0:
+        return (
+            jsonify({"error": "Too many requests! Please try again later."}),
+            429,
+            {"Retry-After": get_retry_after(retry_after)},
+        )
+
+    limiter = concurrency_limiters[endpoint]
+    if not limiter.acquire():
+        return (
+            jsonify({"error": "The server is busy! Please try again later."}),
+            429,
+            {"Retry-After": get_retry_after(BUSY_RETRY_AFTER)},
+        )
+    g.concurrency_limiter = limiter
+
+
+@app.teardown_request
+def release_request(exception):
+    """
+    Release the concurrency slot taken by admit_request once the response is complete.
+    """
+
+    limiter = g.pop("concurrency_limiter", None)
+    if limiter is not None:
+        limiter.release()
+
+
+@app.errorhandler(RequestCancelled)
+def handle_cancelled_request(e):
+    """
+    Answer a request whose work was cancelled. A client that disconnected never reads the answer.
+
+    Responses:
+        504: The request ran past its deadline.
+    """
+
+    return jsonify({"error": f"The request was cancelled: {str(e)}"}), 504
+
+
+@app.route("/")
+def hello():
+    return "You have reached the Youtube Rehashed Flask backend server!"
+
+
+@app.route("/api/get-summaries", methods=["GET"])
+def get_summaries():
+    """
+    Return video details, comments, and summaries for given YouTube video.
+
+    HTTP Method: GET
+
+    Request Parameters:
+        video_url (str): The URL of the YT video to generate summaries for. (required)
+        lang (str): The preferred transcript languages, comma-separated and most preferred first. (optional, defaults to "en")
+
+    Responses:
+        200: Video ID, video title, comments, and summaries for the given video.
+        400: Missing parameters, invalid video URL, ID or languages, or video is too long.
+        500: An error occurred when fetching the comments or prompting ChatGPT.
+
+    Example:
         GET /api/get-summaries?video_url=https://www.youtube.com/watch?v=dQw4w9WgXcQ
+        GET /api/get-summaries?video_url=https://www.youtube.com/watch?v=dQw4w9WgXcQ&lang=de,en
+    """
+
+    # Save parameters from request
+    video_url = request.args.get("video_url")
+
+    # Check for missing parameters
+    if not video_url:
+        return jsonify({"error": "Video URL is missing!"}), 400
+
+    # Extract video ID from video URL
+    video_id = extract_video_id(video_url)
+    if video_id is None:
+        return jsonify({"error": "Please enter a valid YouTube URL!"}), 400
+
+    # Parse the preferred transcript languages
+    try:
+        languages = parse_languages(request.args.get("lang"))
+    except ValueError:
+        return jsonify({"error": "Transcript languages are invalid!"}), 400
+
+    cancel_prefetch(video_id)
+
+    # Coalesce concurrent requests for the same video and languages into one computation
+    (body, status), shared = do_flight(
+        summary_flights,
+        (video_id, languages),
+        summarize_video,
+        video_url,
+        video_id,
+        languages,
+    )
+    if shared:
+        print(f"Shared in-flight summaries for video ID: {video_id}")
+
+    return jsonify(body), status
+
+
+@app.route("/api/stream-summaries", methods=["GET"])
+def stream_summaries():
+    """
+    Stream video details and summaries for given YouTube video as server-sent events.
+
+    The video details are sent first, followed by the tokens of the video summary as
+    ChatGPT generates them and then the tokens of the comments summary, so the client
+    can render text as soon as the first token arrives.
+
+    HTTP Method: GET
+
+    Request Parameters:
+        video_url (str): The URL of the YT video to generate summaries for. (required)
+        lang (str): The preferred transcript languages, comma-separated and most preferred first. (optional, defaults to "en")
+
+    Responses:
+        200: A text/event-stream with the following events:
+            - details: Video ID, captions, and comments.
+            - title: {"video_title": str} once the title is known, None if it could not be retrieved.
+              Sent during the video summary, and at the latest right after it.
+            - video_summary: {"token": str} for each generated piece of the video summary.
+            - comments_summary: {"token": str} for each generated piece of the comments summary.
+            - error: {"error": str} if the video is too long or summarizing fails.
+            - done: Sent once both summaries are complete.
+        400: Missing parameters, invalid video URL, ID or languages, or video is missing a transcript.
+        500: An error occurred when fetching the comments.
+
+    Example:
+        GET /api/stream-summaries?video_url=https://www.youtube.com/watch?v=dQw4w9WgXcQ
     """
 
     # Save parameters from request
@@ -489,15 +2093,28 @@ def get_summaries():
     if video_id is None:
         return jsonify({"error": "Please enter a valid YouTube URL!"}), 400
 
+    # Parse the preferred transcript languages
+    try:
+        languages = parse_languages(request.args.get("lang"))
+    except ValueError:
+        return jsonify({"error": "Transcript languages are invalid!"}), 400
+
+    # The title needs a full metadata extraction on a cold cache, so it is looked up alongside the
+    # transcript and comments and sent whenever it is ready instead of delaying the first token
+    video_title = title_executor.submit(get_youtube_video_title, video_url)
+    cancel_prefetch(video_id)
+
     # Fetch YouTube transcript using YouTubeTranscriptAPI
-    captions, transcript = fetch_transcript(video_id)
-    if transcript is None:
+    result = fetch_transcript(video_id, languages)
+    if result is None:
         return (
             jsonify(
                 {"error": "YouTube video does not exist or is missing a transcript!"}
             ),
             400,
         )
+    captions, transcript = result
+    cache_transcript_index(get_transcript_key(video_id, ",".join(languages)), captions)
 
     # Get web-scraped comments from the YouTube Comment Downloader API
     comments, comments_str = get_comments(video_url)
@@ -507,65 +2124,239 @@ def get_summaries():
             500,
         )
 
-    # Write ChatGPT prompt for generating video summary
-    transcript_prompt = f"""
-        Summarize the following YouTube transcript in 200-250 words: {transcript}
-        Do not include any details about the comments.
+    def generate():
+        title_sent = False
+
+        def title_event(wait=False):
+            nonlocal title_sent
+            if title_sent or not (wait or video_title.done()):
+                return []
+            title_sent = True
+            return [format_sse("title", {"video_title": video_title.result()})]
+
+        try:
+            yield format_sse(
+                "details",
+                {"video_id": video_id, "captions": captions, "comments": comments},
+            )
+            yield from title_event()
+
+            # Stream the video summary first since the comments prompt depends on it
+            shrunk_transcript = shrink_transcript(captions)
+            if shrunk_transcript is None:
+                yield format_sse(
+                    "error", {"error": "This video is too long to summarize!"}
+                )
+                return
+            transcript_prompt = build_transcript_prompt(shrunk_transcript)
+            if (
+                route_prompt("summary", transcript_prompt, CHATGPT_SUMMARIZING_ROLE)[0]
+                is None
+            ):
+                yield format_sse(
+                    "error", {"error": "This video is too long to summarize!"}
+                )
+                return
+
+            video_summary = ""
+            try:
+                for token in ask_chatgpt_stream(
+                    transcript_prompt,
+                    CHATGPT_SUMMARIZING_ROLE,
+                    call_site="video_summary",
+                ):
+                    video_summary += token
+                    yield format_sse("video_summary", {"token": token})
+                    yield from title_event()
+            except openai.OpenAIError as e:
+                yield format_sse("error", {"error": f"OpenAIError: {str(e)}"})
+                return
+            except RequestCancelled as e:
+                yield format_sse(
+                    "error", {"error": f"The request was cancelled: {str(e)}"}
+                )
+                return
+            yield from title_event(wait=True)
+
+            # Stream the comments summary once the video summary is complete
+            comments_prompt = build_comments_prompt(video_summary, comments_str)
+            if (
+                route_prompt("summary", comments_prompt, CHATGPT_SUMMARIZING_ROLE)[0]
+                is None
+            ):
+                yield format_sse(
+                    "error", {"error": "This video is too long to summarize!"}
+                )
+                return
+
+            try:
+                for token in ask_chatgpt_stream(
+                    comments_prompt,
+                    CHATGPT_SUMMARIZING_ROLE,
+                    call_site="comments_summary",
+                ):
+                    yield format_sse("comments_summary", {"token": token})
+            except openai.OpenAIError as e:
+                yield format_sse("error", {"error": f"OpenAIError: {str(e)}"})
+                return
+            except RequestCancelled as e:
+                yield format_sse(
+                    "error", {"error": f"The request was cancelled: {str(e)}"}
+                )
+                return
+
+            yield format_sse("done", {})
+        except Exception as e:
+            # Headers are already sent, so failures must reach the client as an event
+            print(f"Error streaming summaries: {str(e)}")
+            yield format_sse("error", {"error": f"Unexpected error: {str(e)}"})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/api/search-transcript", methods=["GET"])
+def search_transcript():
     """
+    Return the caption timestamps where a word or phrase is mentioned in a video.
 
-    # Ensure that transcript is under token limit with OpenAI's Tiktoken tokenizer
-    if get_token_count(transcript_prompt, "gpt-3.5-turbo") < REQUEST_TOKEN_LIMIT:
+    HTTP Method: GET
 
-        # Generate transcript summary
-        video_summary, transcript_error = ask_chatgpt(
-            transcript_prompt, CHATGPT_SUMMARIZING_ROLE
+    Request Parameters:
+        video_id (str): The video id of the video to search. (required)
+        query (str): The word or phrase to look up. (required)
+        limit (int): The maximum number of hits to return. (optional)
+        lang (str): The preferred transcript languages, comma-separated and most preferred first. (optional, defaults to "en")
+
+    Responses:
+        200: The matching captions with their offsets, start times, and durations.
+        400: Missing parameters, invalid limit or languages, or video is missing a transcript.
+
+    Example:
+        GET /api/search-transcript?video_id=dQw4w9WgXcQ&query=never gonna
+    """
+
+    # Save parameters from request
+    video_id = request.args.get("video_id")
+    query = request.args.get("query")
+    limit = request.args.get("limit")
+
+    # Check for missing parameters
+    if not video_id:
+        return jsonify({"error": "Video ID is missing!"}), 400
+    if not query:
+        return jsonify({"error": "Search query is missing!"}), 400
+
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            return jsonify({"error": "Limit must be an integer!"}), 400
+        if limit < 1:
+            return jsonify({"error": "Limit must be at least 1!"}), 400
+
+    # Parse the preferred transcript languages
+    try:
+        languages = parse_languages(request.args.get("lang"))
+    except ValueError:
+        return jsonify({"error": "Transcript languages are invalid!"}), 400
+
+    # Build the index from the transcript once, then serve every query from memory
+    def load_captions(index_key):
+        result = fetch_transcript(video_id, languages)
+        return result[0] if result is not None else None
+
+    index = get_transcript_index(
+        get_transcript_key(video_id, ",".join(languages)), load_captions
+    )
+    if index is None:
+        return (
+            jsonify(
+                {"error": "YouTube video does not exist or is missing a transcript!"}
+            ),
+            400,
         )
 
-        if transcript_error is not None:
-            return jsonify({"error": transcript_error}), 500
+    hits = index.search(query, limit=limit)
+    return jsonify({"video_id": video_id, "query": query, "hits": hits}), 200
 
-        # Write ChatGPT prompt for generating comment summary
-        comments_prompt = f"""
-            Here is a summary of a YouTube transcript: {video_summary}
-            Summarize the following comments section for this video: {comments_str}
-            Do not include any details about the transcript, only the comments.
-            Do not give a list, but a paragraph.
-        """
 
-        # Ensure that transcript summary and comments together are under token limit
-        if get_token_count(comments_prompt, "gpt-3.5-turbo") < REQUEST_TOKEN_LIMIT:
+@app.route("/api/stream-comments", methods=["GET"])
+def stream_comments():
+    """
+    Stream pages of a video's popular comments as newline-delimited JSON.
 
-            # Generate comments summary
-            comments_summary, comments_error = ask_chatgpt(
-                comments_prompt, CHATGPT_SUMMARIZING_ROLE
-            )
+    Comments are scraped lazily: each page only pulls the comments it needs, and the scraper of a
+    recently paged video is kept open so a cursor continues where the previous page stopped instead
+    of re-scraping from the top.
 
-            if comments_error is not None:
-                return jsonify({"error": comments_error}), 500
-            else:
-                return (
-                    jsonify(
-                        {
-                            "video_id": video_id,
-                            "video_title": get_youtube_video_title(video_url),
-                            "captions": captions,
-                            "comments": comments,
-                            "video_summary": video_summary,
-                            "comments_summary": comments_summary,
-                        }
-                    ),
-                    200,
-                )
-        else:
-            return jsonify({"error": "This video is too long to summarize!"}), 400
-    else:
-        return jsonify({"error": "This video is too long to summarize!"}), 400
+    HTTP Method: GET
+
+    Request Parameters:
+        video_id (str): The video id of the video. (required unless cursor is given)
+        cursor (str): The cursor of the next page from a previous response. (optional)
+        page_size (int): The comments per page, at most 100. (optional, defaults to 20)
+        pages (int): The number of pages to stream, at most 10. (optional, defaults to 1)
+
+    Responses:
+        200: One JSON object per line, each with the "comments" of a page and the "cursor" of the
+            next page (null after the last page). A line with an "error" ends the stream on failure.
+        400: Missing video ID, invalid cursor, or invalid page size or page count.
+
+    Example:
+        GET /api/stream-comments?video_id=dQw4w9WgXcQ&page_size=20
+        GET /api/stream-comments?cursor=eyJ2IjoiZFF3NHc5V2dYY1EiLCJvIjoyMH0.5o3zXx1vGg2tVQ9mY0aQ8w
+    """
+
+    # Save parameters from request
+    video_id = request.args.get("video_id")
+    cursor = request.args.get("cursor")
+
+    try:
+        page_size = int(request.args.get("page_size", DEFAULT_PAGE_SIZE))
+        pages = int(request.args.get("pages", 1))
+    except ValueError:
+        return jsonify({"error": "Page size and pages must be integers!"}), 400
+    if not 1 <= page_size <= MAX_PAGE_SIZE or not 1 <= pages <= 10:
+        return jsonify({"error": "Page size or pages out of range!"}), 400
+
+    offset = 0
+    if cursor:
+        try:
+            video_id, offset = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor!"}), 400
+    if not video_id:
+        return jsonify({"error": "Video ID is missing!"}), 400
+
+    cancellation = get_cancellation()
+
+    def generate():
+        try:
+            for page in comment_streams.pages(
+                video_id, offset, page_size, pages, cancellation
+            ):
+                yield json.dumps(page) + "\n"
+        except RequestCancelled as e:
+            yield json.dumps({"error": f"The request was cancelled: {str(e)}"}) + "\n"
+        except Exception as e:
+            print(f"Error streaming comments: {str(e)}")
+            yield json.dumps({"error": f"Failed to fetch comments: {str(e)}"}) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/api/get-resolutions", methods=["GET"])
 def get_resolutions():
     """
-    Return list of resolutions for available video streams based on given video ID.
+    Return list of resolutions and the format ladder for available video streams based on given video ID.
 
     HTTP Method: GET
 
@@ -573,7 +2364,8 @@ def get_resolutions():
         video_id (str): The video id of the video to fetch streams for. (required)
 
     Responses:
-        200: A list of resolutions with video streams available to download.
+        200: A list of resolutions with video streams available to download, and the format ladder
+            with the format ID, codec, fps, bitrate, and estimated download size of every stream.
         400: Missing parameters, invalid video ID, or video unavailable.
         500: An error occurred when fetching the available streams.
 
@@ -587,28 +2379,20 @@ def get_resolutions():
     if not video_id:
         return jsonify({"error": "Video ID is missing!"}), 400
 
-    try:
-        video_url = f"https://www.youtube.com/watch?v={video_id}"
-        ydl_opts = {
-            "quiet": True,
-            "no_warnings": True,
-            "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        }
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = ydl.extract_info(video_url, download=False)
-            formats = info_dict.get("formats", [])
-
-            resolutions = []
-
-            for f in formats:
-                height = f.get("height")
-                if height is not None and 144 <= height <= 1080:
-                    resolutions.append(f"{height}p")
+    cancel_prefetch(video_id)
 
-            resolutions = sorted(set(resolutions), key=lambda x: int(x[:-1]))
-
-            return jsonify({"resolutions": resolutions}), 200
+    try:
+        ladder = get_video_metadata(video_id)["ladder"]
+        return (
+            jsonify(
+                {
+                    "resolutions": get_ladder_resolutions(ladder),
+                    "formats": ladder["formats"],
+                    "audio": ladder["audio"],
+                }
+            ),
+            200,
+        )
 
     except yt_dlp.utils.DownloadError as e:
         return jsonify({"error": f"DownloadError: {str(e)}"}), 400
@@ -625,159 +2409,321 @@ def get_download():
     """
     Return download URL based on given video ID and resolution.
 
+    Besides the full video, the download can be limited to the audio stream (no video stream and no merge)
+    and/or to a time range, in which case only that section of each stream is downloaded and trimmed
+    without re-encoding.
+
     HTTP Method: GET
 
     Request Parameters:
         video_id (str): The video id of the video to get the download URL. (required)
-        video_resolution (str): The resolution of the video stream to fetch. (required)
+        video_resolution (str): The resolution of the video stream to fetch. (required for video mode unless format_id is given)
+        format_id (str): The exact format ID of a video stream from the format ladder. (optional)
+        mode (str): "video" for the merged video and audio, or "audio" for the audio only. (optional, defaults to "video")
+        start (str): The start of the clip in seconds or [HH:]MM:SS. (optional)
+        end (str): The end of the clip in seconds or [HH:]MM:SS. (optional)
+        job_id (str): The ID under which the progress of the download is tracked. (optional, defaults to "latest")
 
     Responses:
         200: A download URL for the requested video and the resolution of the video.
-        400: Missing parameters, invalid video ID, video unavailable, or no streams available.
+        400: Missing parameters, invalid video ID, video unavailable, no streams available, or invalid time range.
         500: An error occurred when fetching the available streams.
+        507: The server does not have enough free disk space for the download.
 
     Example:
         GET /api/get-download?video_id=dQw4w9WgXcQ&video_resolution=360p
+        GET /api/get-download?video_id=dQw4w9WgXcQ&mode=audio&start=0:30&end=1:15
     """
-    # Reset progress at the start of the download
-    global combined_progress
-    global progress
-    combined_progress = 0
-    progress = {"video": 0, "audio": 0, "ffmpeg": 0}
-
     # Save parameters from request
     video_id = request.args.get("video_id")
     video_resolution = request.args.get("video_resolution")
+    format_id = request.args.get("format_id")
+    mode = request.args.get("mode", "video")
+    start = request.args.get("start")
+    end = request.args.get("end")
+    job_id = request.args.get("job_id", DEFAULT_JOB_ID)
 
     # Check for missing parameters
     if not video_id:
         return jsonify({"error": "Video ID is missing!"}), 400
-    if not video_resolution:
+    if mode not in ("video", "audio"):
+        return jsonify({"error": "Download mode must be video or audio!"}), 400
+    if mode == "video" and not video_resolution and not format_id:
         return jsonify({"error": "Video resolution is missing!"}), 400
 
+    # Reset the progress of the job at the start of the download
+    download_progress = DownloadProgress(
+        {"audio": 1.0} if mode == "audio" else STAGE_WEIGHTS,
+        publish=lambda snapshot: progress_store.set(job_id, snapshot),
+    )
+    download_progress.flush()
+
+    cancel_prefetch(video_id)
+
     try:
-        video_url = f"https://www.youtube.com/watch?v={video_id}"
-        sanitized_title = get_youtube_video_title(video_url)
+        metadata = get_video_metadata(video_id)
+        estimated_duration = metadata["duration"]
+
+        # Validate the time range of a clip
+        clip = None
+        if start is not None or end is not None:
+            # Live streams and premieres report no duration to validate the range against
+            if not estimated_duration:
+                return (
+                    jsonify({"error": "Clips need a video with a known duration!"}),
+                    400,
+                )
+            try:
+                clip_start = parse_timestamp(start) if start else 0.0
+                clip_end = parse_timestamp(end) if end else float(estimated_duration)
+            except ValueError:
+                return (
+                    jsonify({"error": "Clip times must be seconds or HH:MM:SS!"}),
+                    400,
+                )
+            if not 0 <= clip_start < clip_end <= estimated_duration:
+                return jsonify({"error": "Clip time range is invalid!"}), 400
+            clip = (clip_start, clip_end)
+
+        # Download the exact stream chosen from the format ladder, or the best one for the resolution
+        video_format = None
+        if mode == "video":
+            if format_id:
+                rung = find_format(metadata["ladder"], format_id)
+                if rung is None:
+                    return (
+                        jsonify({"error": "Format is not available for this video!"}),
+                        400,
+                    )
+                video_format = format_id
+                video_resolution = rung["resolution"]
+            else:
+                video_format = f"bestvideo[height<={video_resolution[:-1]}][vcodec^=avc1]"  # Limit resolution and choose best video with H.264 codec
+
+        output_file, download_name = download_media(
+            metadata,
+            download_progress,
+            mode,
+            video_format,
+            video_resolution,
+            clip,
+            get_cancellation(),
+        )
 
-        # Common options for both video and audio downloads
-        common_opts = {
-            "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "quiet": True,
-        }
+        # Stream the downloaded file back to the user
+        return send_downloaded_file(output_file, download_name)
 
-        # Options for downloading video only
-        video_opts = {
-            **common_opts,
-            "format": f"bestvideo[height<={video_resolution[:-1]}][vcodec^=avc1]",  # Limit resolution and choose best video with H.264 codec
-            "outtmpl": f"downloads/{sanitized_title}_video.mp4",
-            "progress_hooks": [video_progress_hook],
-        }
+    except yt_dlp.utils.DownloadError as e:
+        return jsonify({"error": f"DownloadError: {str(e)}"})
+    except yt_dlp.utils.ExtractorError as e:
+        return jsonify({"error": f"ExtractorError: {str(e)}"})
+    except yt_dlp.utils.PostProcessingError as e:
+        return jsonify({"error": f"PostProcessingError: {str(e)}"})
+    except subprocess.CalledProcessError as e:
+        return jsonify({"error": f"FFmpeg error: {str(e)}"})
+    except InsufficientDiskSpace as e:
+        return (
+            jsonify({"error": f"Not enough disk space for this download: {str(e)}"}),
+            507,
+        )
+    except RequestCancelled:
+        raise
+    except Exception as e:
+        return jsonify({"error": f"Unexpected error: {str(e)}"})
+
+
+@app.route("/api/get-bulk-download", methods=["GET"])
+def get_bulk_download():
+    """
+    Download every video of a playlist or channel as a ZIP archive streamed while the videos complete.
+
+    The entries are resolved with one flat extraction, downloaded and merged a few at a time, and each
+    one is added to the archive as soon as it is ready, so the client starts receiving data after the
+    first video instead of after the last. Videos that fail are listed in an errors.txt member.
+
+    HTTP Method: GET
+
+    Request Parameters:
+        url (str): The URL of a playlist or channel. (required)
+        video_resolution (str): The resolution of the video streams to fetch. (required for video mode)
+        mode (str): "video" for the merged video and audio, or "audio" for the audio only. (optional, defaults to "video")
+        max_entries (int): The most videos to download. (optional, defaults to BULK_MAX_ENTRIES)
+        job_id (str): The ID under which the aggregate progress of the job is tracked. (optional, defaults to "latest")
+
+    Responses:
+        200: A ZIP archive with a file per video.
+        400: Missing parameters, invalid entry count, or a playlist without videos.
+        500: An error occurred when resolving the playlist.
+
+    Example:
+        GET /api/get-bulk-download?url=https://www.youtube.com/playlist?list=PL123&video_resolution=720p
+        GET /api/get-bulk-download?url=https://www.youtube.com/@veritasium&mode=audio&max_entries=10
+    """
+    # Save parameters from request
+    url = request.args.get("url")
+    video_resolution = request.args.get("video_resolution")
+    mode = request.args.get("mode", "video")
+    job_id = request.args.get("job_id", DEFAULT_JOB_ID)
+
+    # Check for missing parameters
+    if not url:
+        return jsonify({"error": "Playlist or channel URL is missing!"}), 400
+    if mode not in ("video", "audio"):
+        return jsonify({"error": "Download mode must be video or audio!"}), 400
+    if mode == "video" and not video_resolution:
+        return jsonify({"error": "Video resolution is missing!"}), 400
+    try:
+        max_entries = int(request.args.get("max_entries", BULK_MAX_ENTRIES))
+    except ValueError:
+        return jsonify({"error": "Max entries must be an integer!"}), 400
+    if not 1 <= max_entries <= BULK_MAX_ENTRIES:
+        return jsonify({"error": "Max entries out of range!"}), 400
+
+    try:
+        playlist_title, entries = get_playlist_info(url, max_entries)
+    except Exception as e:
+        print(f"Error resolving playlist: {str(e)}")
+        return jsonify({"error": f"Failed to resolve playlist: {str(e)}"}), 500
+    if not entries:
+        return jsonify({"error": "No videos found for this URL!"}), 400
+
+    video_format = (
+        f"bestvideo[height<={video_resolution[:-1]}][vcodec^=avc1]"
+        if mode == "video"
+        else None
+    )
+    bulk_progress = BulkProgress(
+        entries,
+        {"audio": 1.0} if mode == "audio" else STAGE_WEIGHTS,
+        publish=lambda snapshot: progress_store.set(job_id, snapshot),
+    )
+    bulk_progress.flush()
+
+    # Workers run outside of the request context, so they are handed its token
+    cancellation = get_cancellation()
+
+    def download_entry(entry):
+        download_progress = bulk_progress.start(entry["id"])
+        try:
+            metadata = get_video_metadata(entry["id"])
+            output_file, download_name = download_media(
+                metadata,
+                download_progress,
+                mode,
+                video_format,
+                video_resolution,
+                cancellation=cancellation,
+                priority=MUX_PRIORITY_BULK,
+            )
+        except Exception as e:
+            bulk_progress.finish(entry["id"], error=str(e))
+            raise
+        bulk_progress.finish(entry["id"])
+        return output_file, download_name
+
+    def generate():
+        zip_stream = ZipStream()
+        failures = []
+        try:
+            for entry, download, error in run_bulk_downloads(
+                entries,
+                download_entry,
+                discard=lambda download: remove_downloaded_file(download[0]),
+            ):
+                if error is not None:
+                    print(f"Error downloading {entry['id']}: {str(error)}")
+                    failures.append(f"{entry['id']} {entry['title']}: {str(error)}")
+                    continue
+                output_file, download_name = download
+                try:
+                    yield from zip_stream.add_file(download_name, output_file)
+                finally:
+                    remove_downloaded_file(output_file)
+
+            if failures:
+                yield from zip_stream.add_bytes(
+                    "errors.txt", "\n".join(failures).encode("utf-8")
+                )
+            yield from zip_stream.close()
+        finally:
+            # Stop the downloads still running once the client stops reading the archive
+            cancellation.cancel("download stream closed")
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{sanitize_title(playlist_title)}.zip"',
+            "X-Accel-Buffering": "no",
+        },
+    )
 
-        # Options for downloading audio only
-        audio_opts = {
-            **common_opts,
-            "format": "bestaudio[ext=m4a]",  # Choose best audio
-            "outtmpl": f"downloads/{sanitized_title}_audio.m4a",
-            "progress_hooks": [audio_progress_hook],
-        }
 
-        # Download video
-        print(f"Starting video download for {video_url}")
-        with yt_dlp.YoutubeDL(video_opts) as ydl:
-            info_dict = ydl.extract_info(video_url, download=False)
-            estimated_duration = info_dict.get("duration", 0)
-            print(f"Video info extracted, duration: {estimated_duration}")
-            ydl.download([video_url])
-            print("Video download completed")
-
-        # Download audio
-        print("Starting audio download")
-        with yt_dlp.YoutubeDL(audio_opts) as ydl:
-            ydl.download([video_url])
-            print("Audio download completed")
+@app.route("/api/get-progress", methods=["GET"])
+def get_progress():
+    """
+    Return the current combined progress of a download job.
 
-        # Paths to the downloaded files
-        video_file = f"downloads/{sanitized_title}_video.mp4"
-        audio_file = f"downloads/{sanitized_title}_audio.m4a"
-        output_file = f"downloads/{sanitized_title} [{video_resolution}].mp4"
+    HTTP Method: GET
 
-        print(
-            f"Checking if files exist: video={os.path.exists(video_file)}, audio={os.path.exists(audio_file)}"
-        )
+    Request Parameters:
+        job_id (str): The ID passed to /api/get-download or /api/get-bulk-download. (optional, defaults to "latest")
 
-        # Merge video and audio using ffmpeg without re-encoding
-        print("Starting ffmpeg merge")
-        ffmpeg_command = [
-            "ffmpeg",
-            "-i",
-            video_file,
-            "-i",
-            audio_file,
-            "-c:v",
-            "copy",
-            "-c:a",
-            "copy",
-            output_file,
-        ]
-        print(f"FFmpeg command: {' '.join(ffmpeg_command)}")
-        process = subprocess.Popen(
-            ffmpeg_command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-        )
-        for line in process.stdout:
-            print(f"FFmpeg output: {line.strip()}")
-            ffmpeg_progress_hook(line, estimated_duration)
-        process.wait()
-        print(f"FFmpeg process completed with return code: {process.returncode}")
-
-        # Cleanup: Delete the separate video and audio files
-        print("Cleaning up temporary files")
-        os.remove(video_file)
-        os.remove(audio_file)
-
-        @after_this_request
-        def remove_file(response):
-            global combined_progress
-            global progress
-            try:
-                os.remove(output_file)
-            except Exception as e:
-                print(f"Error removing file: {str(e)}")
-            return response
+    Responses:
+        200: The combined progress and ETA of the download, with the bytes (or seconds muxed),
+            smoothed throughput, and ETA of the video, audio, and ffmpeg stages. For a bulk job,
+            the average progress and the status and progress of every entry.
+        500: An error occurred while fetching the progress.
 
-        # Stream the merged video file back to the user
-        return send_file(output_file, as_attachment=True)
+    Example:
+        GET /api/get-progress?job_id=3f2a9c
+    """
+    snapshot = progress_store.get(request.args.get("job_id", DEFAULT_JOB_ID))
+    if snapshot is None:
+        snapshot = DownloadProgress().snapshot()
+    return jsonify(snapshot), 200
 
-    except yt_dlp.utils.DownloadError as e:
-        return jsonify({"error": f"DownloadError: {str(e)}"})
-    except yt_dlp.utils.ExtractorError as e:
-        return jsonify({"error": f"ExtractorError: {str(e)}"})
-    except yt_dlp.utils.PostProcessingError as e:
-        return jsonify({"error": f"PostProcessingError: {str(e)}"})
-    except subprocess.CalledProcessError as e:
-        return jsonify({"error": f"FFmpeg error: {str(e)}"})
-    except Exception as e:
-        return jsonify({"error": f"Unexpected error: {str(e)}"})
 
+@app.route("/api/get-proxy-metrics", methods=["GET"])
+def get_proxy_metrics():
+    """
+    Return the health and performance metrics of every scraping proxy.
 
-@app.route("/api/get-progress", methods=["GET"])
-def get_progress():
+    HTTP Method: GET
+
+    Responses:
+        200: One entry per proxy with its health, EWMA latency, and request and failure counts,
+            plus the transcript hedging counters.
+
+    Example:
+        GET /api/get-proxy-metrics
     """
-    Return the current combined progress of the download.
+    return (
+        jsonify(
+            {
+                "proxies": proxy_pool.metrics(),
+                "hedging": transcript_hedger.metrics(),
+            }
+        ),
+        200,
+    )
+
+
+@app.route("/api/get-llm-usage", methods=["GET"])
+def get_llm_usage():
+    """
+    Return the token usage, cost, latency and retries of the ChatGPT calls of this process.
 
     HTTP Method: GET
 
     Responses:
-        200: The current value of combined_progress.
-        500: An error occurred while fetching the progress.
+        200: The usage of each call site of each endpoint and of each model route since startup,
+            and of each endpoint in each recent time window.
 
     Example:
-        GET /api/get-progress
+        GET /api/get-llm-usage
     """
-    global combined_progress
-    return jsonify({"progress": combined_progress}), 200
+    return jsonify(llm_usage.report()), 200
 
 
 @app.route("/api/get-video-info", methods=["GET"])
@@ -813,6 +2759,10 @@ def get_video_info():
             return jsonify({"error": "Please enter a valid YouTube URL!"}), 400
 
         video_title = get_youtube_video_title(video_url)
+
+        # The client usually asks for summaries or resolutions next, so warm their inputs now
+        prefetch_video(video_id)
+
         return jsonify({"video_id": video_id, "video_title": video_title}), 200
     except Exception as e:
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
@@ -829,7 +2779,8 @@ def get_creater_info():
         channel_url (str): The URL of the creator's YouTube channel.
 
     Responses:
-        200: Channel info including statistics, background, and credibility score
+        200: Channel info including statistics, background, and credibility score. A stored profile
+            is returned immediately, even when stale, and refreshed in the background.
         400: Missing parameters or invalid link.
         500: An error occurred when fetching channel info or analyzing credibility.
 
@@ -843,280 +2794,97 @@ def get_creater_info():
 
     # Extract handle or channel ID from URL
     handle, channel_id = extract_youtube_handle(channel_url)
-    creator_info = {"channel": channel_url}
-
-    try:
-        # If we have a channel ID, fetch the handle first
-        if channel_id:
-            channel_response = requests.get(
-                f"https://www.googleapis.com/youtube/v3/channels?part=snippet&id={channel_id}&key={YOUTUBE_API_KEY}"
-            ).json()
-
-            if "items" in channel_response and len(channel_response["items"]) > 0:
-                custom_url = channel_response["items"][0]["snippet"].get("customUrl")
-                if custom_url:
-                    handle = (
-                        custom_url if custom_url.startswith("@") else f"@{custom_url}"
-                    )
-                creator_info["id"] = channel_id
-                creator_info["handle"] = handle
-            else:
-                return jsonify({"error": "Channel not found!"}), 400
-        else:
-            # Use handle to get channel ID
-            id_response = requests.get(
-                f"https://www.googleapis.com/youtube/v3/channels?part=id&forHandle={handle[1:]}&key={YOUTUBE_API_KEY}"
-            ).json()
-
-            if "items" in id_response and len(id_response["items"]) > 0:
-                channel_id = id_response["items"][0]["id"]
-                creator_info["id"] = channel_id
-                creator_info["handle"] = handle
-            else:
-                return jsonify({"error": "Creator handle does not exist!"}), 400
-
-    except Exception as e:
-        print(f"Error fetching channel info: {str(e)}")
-        return jsonify({"error": "Failed to fetch channel information"}), 500
-
-    # Fetch channel statistics based on ID
-    try:
-        statistics_response = requests.get(
-            f"https://www.googleapis.com/youtube/v3/channels?part=statistics&id={channel_id}&key={YOUTUBE_API_KEY}"
-        ).json()
-
-        if "items" in statistics_response and len(statistics_response["items"]) > 0:
-            creator_info["statistics"] = statistics_response["items"][0]["statistics"]
-        else:
-            return (
-                jsonify({"error": f"Channel statistics do not exist for {handle}!"}),
-                500,
-            )
-    except:
-        return (
-            jsonify({"error": f"Channel statistics could not be fetched!"}),
-            500,
-        )
-
-    # Fetch channel avatar
-    try:
-        avatar_response = requests.get(
-            f"https://www.googleapis.com/youtube/v3/channels?part=snippet&id={channel_id}&key={YOUTUBE_API_KEY}"
-        ).json()
-
-        if "items" in avatar_response and len(avatar_response["items"]) > 0:
-            thumbnails = avatar_response["items"][0]["snippet"]["thumbnails"]
-            # Try different thumbnail sizes in order of preference
-            if "maxres" in thumbnails:
-                creator_info["avatar"] = thumbnails["maxres"]["url"]
-            elif "high" in thumbnails:
-                creator_info["avatar"] = thumbnails["high"]["url"]
-            elif "medium" in thumbnails:
-                creator_info["avatar"] = thumbnails["medium"]["url"]
-            elif "default" in thumbnails:
-                creator_info["avatar"] = thumbnails["default"]["url"]
-            else:
-                creator_info["avatar"] = (
-                    "https://www.youtube.com/img/desktop/yt_1200.png"
-                )
-        else:
-            print(f"No avatar found for channel ID: {channel_id}")
-            creator_info["avatar"] = "https://www.youtube.com/img/desktop/yt_1200.png"
-    except Exception as e:
-        print(f"Error fetching avatar: {str(e)}")
-        creator_info["avatar"] = "https://www.youtube.com/img/desktop/yt_1200.png"
-
-    # Verify the avatar URL is accessible
-    try:
-        avatar_check = requests.head(creator_info["avatar"], timeout=5)
-        if avatar_check.status_code != 200:
-            print(f"Avatar URL not accessible: {creator_info['avatar']}")
-            creator_info["avatar"] = "https://www.youtube.com/img/desktop/yt_1200.png"
-    except Exception as e:
-        print(f"Error checking avatar URL: {str(e)}")
-        creator_info["avatar"] = "https://www.youtube.com/img/desktop/yt_1200.png"
-
-    # Fetch Channel Title
-    try:
-        title_response = requests.get(
-            f"https://www.googleapis.com/youtube/v3/channels?part=snippet&id={channel_id}&key={YOUTUBE_API_KEY}"
-        ).json()
-        if "items" in title_response and len(title_response["items"]) > 0:
-            creator_info["title"] = title_response["items"][0]["snippet"]["title"]
-        else:
-            return (
-                jsonify({"error": f"Channel title does not exist for {handle}!"}),
-                500,
-            )
-    except:
-        return jsonify({"error": "Channel title could not be fetched!"}), 500
-
-    # Generate Background Information
-    try:
-        background_prompt = f"""
-        Give a parapgraph of background information about the following creator:
-        {creator_info["title"]} ({creator_info["handle"]})
-        """
-
-        background_response, _ = ask_chatgpt(background_prompt, CHATGPT_ANALYZING_ROLE)
-        creator_info["background"] = background_response
-    except:
-        return jsonify({"error": "Background information could not be fetched!"}), 500
-
-    # Generate Credibility Points and Score
-    max_attempts = 5
-    attempt = 0
-    while attempt < max_attempts:
-        try:
-            credibility_prompt = f"""
-            You are a YouTube channel credibility analyzer. Analyze the credibility of this creator:
-            Channel: {creator_info["title"]} ({creator_info["handle"]})
-            Subscriber Count: {creator_info["statistics"].get("subscriberCount", "Unknown")}
-            Video Count: {creator_info["statistics"].get("videoCount", "Unknown")}
-            Total Views: {creator_info["statistics"].get("viewCount", "Unknown")}
 
-            Provide a factual, well-researched analysis focusing on:
-            1. Content accuracy and fact-checking practices
-            2. Professional background and expertise in their field
-            3. Transparency about sponsorships and potential biases
-            4. Track record of corrections when mistakes are made
-            5. Quality of sources and research methods
-            6. Community engagement and response to criticism
-            7. Consistency and reliability of information
-            8. Industry recognition and peer reviews
+    # Coalesce concurrent requests for the same creator into one computation
+    flight_key = channel_id or (handle.lower() if handle else channel_url)
+    # Serve the stored profile, even when stale, and leave refreshing to the scheduler
+    body, status = creator_profiles.get(flight_key, channel_url, handle, channel_id)
+    return jsonify(body), status
 
-            Return your analysis in the following JSON format:
-            {{
-                "points": [
-                    // 3-5 specific, factual points about the creator's credibility
-                    // Each point must be based on verifiable information
-                    // Focus on objective measures rather than subjective opinions
-                    // Include both strengths and areas of concern
-                    // Cite specific examples where possible
-                    // Do not use objects or nested structures, only strings
-                    // Don't put the actual score deduction in the points, just the points
-                ],
-                "score": // A number between 0 and 100 representing credibility
-            }}
 
-            Scoring Guidelines:
-            - Start at 70 as a baseline for established creators
-            - Add or subtract points based on VERIFIED information only
-            - Do not speculate or make assumptions
-            - Consider the following factors:
-              * Verified expertise and credentials (+10-20)
-              * Consistent fact-checking practices (+10-15)
-              * Transparent disclosure of sponsorships/biases (+5-10)
-              * Professional affiliations and certifications (+5-10)
-              * Documented instances of misinformation (-20-30)
-              * Lack of transparency about qualifications (-10-15)
-              * Pattern of unverified claims (-15-20)
-              * Failure to correct proven errors (-10-15)
+def compute_creator_profile(flight_key, channel_url, handle, channel_id):
+    """
+    Analyze a creator, coalescing concurrent analyses of the same creator into one computation.
 
-            The score should be conservative and based only on verifiable information.
-            If certain information cannot be verified, do not include it in the scoring.
-            """
+    Returns:
+        tuple: The creator info or an error message, and the HTTP status code.
+    """
 
-            credibility_response, _ = ask_chatgpt(
-                credibility_prompt, CHATGPT_ANALYZING_ROLE
-            )
-            credibility_data = json.loads(credibility_response)
-            creator_info["credibilityPoints"] = credibility_data["points"]
-            creator_info["credibilityScore"] = credibility_data["score"]
-            break  # Success, exit the loop
-        except Exception as e:
-            attempt += 1
-            print(f"Credibility analysis attempt {attempt} failed: {str(e)}")
-            if attempt == max_attempts:
-                return (
-                    jsonify({"error": "Credibility analysis failed after 5 attempts"}),
-                    500,
-                )
-            # Wait a short time before retrying
-            time.sleep(1)
+    (body, status), shared = do_flight(
+        creator_flights, flight_key, analyze_creator, channel_url, handle, channel_id
+    )
+    if shared:
+        print(f"Shared in-flight creator analysis for: {flight_key}")
+    return body, status
 
-    # Generate Content Quality Score
-    max_attempts = 5
-    attempt = 0
-    while attempt < max_attempts:
-        try:
-            content_quality_prompt = f"""
-            Return a score between 0 and 100 for the following creator's content quality:
-            {creator_info["title"]} ({creator_info["handle"]})
 
-            You need to conduct your own research to gather the necessary data using the web.
+# Creator profiles served stale-while-revalidate; persisted in SQLite unless state is shared otherwise
+creator_profiles = ProfileStore(
+    get_state_store(
+        "creator_profiles",
+        PROFILE_HARD_TTL,
+        backend="sqlite" if STATE_BACKEND == "memory" else STATE_BACKEND,
+    ),
+    compute_creator_profile,
+)
 
-            Take the following into account:
-            - Quality and accuracy of the content
-            - Creativity and uniqueness of the content
-            - Reasonable upload frequency for their format of content
 
-            Make sure you return only a single floating point number between 0 and 100.
-            Do not return any text other than the score.
-            """
+def start_background_tasks():
+    """
+    Start the proxy health checks, the download sweeper and the profile refresh scheduler.
 
-            content_quality_response, _ = ask_chatgpt(
-                content_quality_prompt, CHATGPT_SCORE_ROLE
-            )
-            creator_info["contentQualityScore"] = re.search(
-                r"\d+", content_quality_response
-            ).group()
-            break  # Success, exit the loop
-        except Exception as e:
-            attempt += 1
-            print(f"Content quality analysis attempt {attempt} failed: {str(e)}")
-            if attempt == max_attempts:
-                return (
-                    jsonify(
-                        {"error": "Content quality analysis failed after 5 attempts"}
-                    ),
-                    500,
-                )
-            # Wait a short time before retrying
-            time.sleep(1)
+    They start with the server rather than on import, so tests and benchmarks that import the app
+    do not run them.
 
-    # Generate Engagement Score
-    attempt = 0
-    while attempt < max_attempts:
-        try:
-            engagement_prompt = f"""
-            Calculate a score between 0 and 100 for the following creator's engagement:
-            {creator_info["title"]} ({creator_info["handle"]})
+    Returns:
+        None
+    """
 
-            You need to conduct your own research to gather the necessary data using the web.
+    proxy_pool.start_health_checks(
+        lambda proxy: requests.get(
+            "https://www.youtube.com/generate_204",
+            proxies=proxy.as_proxies(),
+            timeout=5,
+        ).status_code
+        == 204
+    )
+    disk_guard.start_sweeper()
+    creator_profiles.start()
 
-            Take the following into account:
-            - Number of views, likes, comments, and shares
-            - Engagement rate (comments per view, likes per view, shares per view)
-            - Overall impact and reach of the content
 
-            Make sure you return only a single floating point number between 0 and 100.
-            Do not return any text other than the score.
-            """
+def warm_up():
+    """
+    Import the heavy modules in the background so the first requests do not pay for them.
 
-            engagement_response, _ = ask_chatgpt(engagement_prompt, CHATGPT_SCORE_ROLE)
-            creator_info["engagementScore"] = re.search(
-                r"\d+", engagement_response
-            ).group()
-            break  # Success, exit the loop
-        except Exception as e:
-            attempt += 1
-            print(f"Engagement analysis attempt {attempt} failed: {str(e)}")
-            if attempt == max_attempts:
-                return (
-                    jsonify({"error": "Engagement analysis failed after 5 attempts"}),
-                    500,
-                )
-            # Wait a short time before retrying
-            time.sleep(1)
+    Returns:
+        None
+    """
 
-    return jsonify({"creator_info": creator_info}), 200
+    preload(
+        openai,
+        tiktoken,
+        yt_dlp,
+        youtube_comment_downloader,
+        youtube_transcript_api,
+        presummarize,
+    )
 
 
 if __name__ == "__main__":
+    start_background_tasks()
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
     # development
     if os.getenv("ENV", "") == "development":
         app.run(host="0.0.0.0", port=8000, debug=True)
     # production
     else:
-        serve(app, host="0.0.0.0", port=8000)
+        # Look ahead on each connection so waitress notices clients that disconnect mid-request,
+        # with enough threads that queued requests of limited endpoints never starve the others
+        serve(
+            app,
+            host="0.0.0.0",
+            port=8000,
+            threads=get_server_threads(),
+            channel_request_lookahead=5,
+        )
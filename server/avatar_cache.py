@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from ttl_cache import TTLCache
+
+# Fallback shown when a channel avatar is missing or unreachable
+DEFAULT_AVATAR_URL = "https://www.youtube.com/img/desktop/yt_1200.png"
+
+# Reachable avatars are remembered for hours, unreachable ones only briefly
+AVATAR_VALID_TTL = 6 * 60 * 60
+AVATAR_INVALID_TTL = 10 * 60
+
+# Concurrent HEAD requests allowed against the thumbnail CDN
+AVATAR_VALIDATION_WORKERS = 4
+
+
+class AvatarValidator:
+    """
+    Cache of avatar URL reachability, validated off the request path.
+
+    resolve returns a candidate URL immediately: a URL known to be reachable is
+    returned as is, a URL known to be unreachable is replaced with the default
+    avatar, and an unknown URL is returned optimistically while a bounded pool
+    checks it in the background for later requests. Both outcomes are cached, the
+    unreachable ones with a shorter TTL.
+    """
+
+    def __init__(
+        self,
+        check,
+        default_url=DEFAULT_AVATAR_URL,
+        valid_ttl=AVATAR_VALID_TTL,
+        invalid_ttl=AVATAR_INVALID_TTL,
+        workers=AVATAR_VALIDATION_WORKERS,
+    ):
+        self.check = check
+        self.default_url = default_url
+        self.invalid_ttl = invalid_ttl
+        self._results = TTLCache(valid_ttl, max_entries=4096)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="avatar"
+        )
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _validate(self, url):
+        """
+        Check a URL and cache whether it is reachable.
+
+        Returns:
+            bool: True if the URL is reachable.
+        """
+
+        try:
+            valid = bool(self.check(url))
+        except Exception as e:
+            print(f"Error checking avatar URL: {str(e)}")
+            valid = False
+
+        if not valid:
+            print(f"Avatar URL not accessible: {url}")
+        self._results.set(url, valid, ttl=None if valid else self.invalid_ttl)
+
+        with self._lock:
+            self._pending.pop(url, None)
+        return valid
+
+    def _schedule(self, url):
+        """
+        Start validating a URL in the background unless it is already being validated.
+
+        Returns:
+            Future: The pending validation of the URL.
+        """
+
+        with self._lock:
+            future = self._pending.get(url)
+            if future is None:
+                future = self._pending[url] = self._executor.submit(self._validate, url)
+            return future
+
+    def resolve(self, url):
+        """
+        Return the avatar URL to show without waiting on the network.
+
+        Args:
+            url (str): The candidate avatar URL.
+
+        Returns:
+            str: The candidate URL, or the default avatar if the candidate is known to be unreachable.
+        """
+
+        if not url or url == self.default_url:
+            return self.default_url
+
+        valid = self._results.get(url)
+        if valid is None:
+            self._schedule(url)
+            return url
+
+        return url if valid else self.default_url
+
+    def validate_many(self, urls, timeout=None):
+        """
+        Validate a batch of avatar URLs with bounded concurrency.
+
+        Args:
+            urls (list): The candidate avatar URLs.
+            timeout (float, optional): The maximum seconds to wait for each validation. Defaults to no limit.
+
+        Returns:
+            dict: Each candidate URL mapped to the URL to show.
+        """
+
+        futures = {}
+        for url in set(urls):
+            if url and url != self.default_url and self._results.get(url) is None:
+                futures[url] = self._schedule(url)
+
+        for url, future in futures.items():
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+
+        return {url: self.resolve(url) for url in urls}
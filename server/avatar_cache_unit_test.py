@@ -0,0 +1,28 @@
+from avatar_cache import *
+
+
+avatar_url = "https://yt3.ggpht.com/avatar=s800"
+
+
+def test_unknown_avatar_is_returned_immediately_and_validated_once():
+    checks = []
+    validator = AvatarValidator(lambda url: checks.append(url) or True)
+    assert validator.resolve(avatar_url) == avatar_url
+    assert validator.validate_many([avatar_url]) == {avatar_url: avatar_url}
+    assert validator.resolve(avatar_url) == avatar_url
+    assert checks == [avatar_url]
+
+
+def test_unreachable_avatar_falls_back_to_default():
+    validator = AvatarValidator(lambda url: False)
+    assert validator.validate_many([avatar_url]) == {avatar_url: DEFAULT_AVATAR_URL}
+    assert validator.resolve(avatar_url) == DEFAULT_AVATAR_URL
+
+
+def test_check_errors_are_cached_as_unreachable():
+    def check(url):
+        raise TimeoutError("CDN timed out")
+
+    validator = AvatarValidator(check)
+    validator.validate_many([avatar_url])
+    assert validator.resolve(avatar_url) == DEFAULT_AVATAR_URL
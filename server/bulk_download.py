@@ -0,0 +1,360 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import re
+import threading
+import time
+import zipfile
+from download_progress import PUBLISH_INTERVAL, STAGE_WEIGHTS, DownloadProgress
+
+# Entries of a playlist or channel downloaded at once, and the most entries of one job
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", 2))
+BULK_MAX_ENTRIES = int(os.getenv("BULK_MAX_ENTRIES", 50))
+
+# Bytes read from a finished file per write into the archive
+ZIP_CHUNK_SIZE = 1024 * 1024
+
+# Channel URLs without a tab, which list the channel's tabs instead of its videos
+_CHANNEL_ROOT = re.compile(
+    r"^(https?://(?:www\.|m\.)?youtube\.com/(?:@[^/?#]+|channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+))/?$"
+)
+
+
+def get_channel_videos_url(url):
+    """
+    Point a channel URL at the channel's videos tab.
+
+    Args:
+        url (str): A playlist or channel URL.
+
+    Returns:
+        str: The URL of the channel's videos tab, or the URL unchanged if it is not a channel root.
+
+    Examples:
+        >>> get_channel_videos_url("https://www.youtube.com/@veritasium")
+        'https://www.youtube.com/@veritasium/videos'
+        >>> get_channel_videos_url("https://www.youtube.com/playlist?list=PL123")
+        'https://www.youtube.com/playlist?list=PL123'
+    """
+
+    match = _CHANNEL_ROOT.match(url.strip())
+    return f"{match.group(1)}/videos" if match else url
+
+
+def get_playlist_entries(info, max_entries=BULK_MAX_ENTRIES):
+    """
+    Return the videos of a flat yt-dlp playlist extraction.
+
+    Args:
+        info (dict): The result of extract_info with extract_flat set to "in_playlist".
+        max_entries (int, optional): The most entries to return.
+
+    Returns:
+        list: A dictionary with the "id" and "title" of each video, in playlist order. Entries that
+            are not videos (e.g. nested playlists) are skipped.
+    """
+
+    entries = []
+    for entry in info.get("entries") or []:
+        if len(entries) >= max_entries:
+            break
+        if (
+            not entry
+            or not entry.get("id")
+            or entry.get("ie_key", "Youtube") != "Youtube"
+        ):
+            continue
+        entries.append({"id": entry["id"], "title": entry.get("title") or entry["id"]})
+    return entries
+
+
+class BulkProgress:
+    """
+    Aggregate progress of the entries of a bulk download job.
+
+    Every entry has its own DownloadProgress; the job's progress is the average of
+    the entries, with finished and failed entries counting as complete. Snapshots
+    are handed to the publish callback at most every publish_interval seconds, and
+    immediately when an entry finishes.
+    """
+
+    def __init__(
+        self,
+        entries,
+        stages=STAGE_WEIGHTS,
+        publish=None,
+        publish_interval=PUBLISH_INTERVAL,
+    ):
+        self.titles = {entry["id"]: entry["title"] for entry in entries}
+        self.status = {entry["id"]: "pending" for entry in entries}
+        self.errors = {}
+        self.publish = publish
+        self.publish_interval = publish_interval
+        self.progress = {
+            entry["id"]: DownloadProgress(
+                stages, publish=lambda snapshot: self._maybe_publish()
+            )
+            for entry in entries
+        }
+        self._published_at = None
+        self._lock = threading.Lock()
+
+    def start(self, video_id):
+        """
+        Mark an entry as downloading.
+
+        Args:
+            video_id (str): The ID of the entry.
+
+        Returns:
+            DownloadProgress: The progress of the entry, to pass to the download.
+        """
+
+        with self._lock:
+            self.status[video_id] = "downloading"
+        self.flush()
+        return self.progress[video_id]
+
+    def finish(self, video_id, error=None):
+        """
+        Mark an entry as done, or as failed with an error.
+
+        Args:
+            video_id (str): The ID of the entry.
+            error (str, optional): Why the entry failed.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self.status[video_id] = "failed" if error else "done"
+            if error:
+                self.errors[video_id] = error
+        self.flush()
+
+    def flush(self):
+        """
+        Publish the current snapshot regardless of the publish interval.
+
+        Returns:
+            None
+        """
+
+        self._maybe_publish(force=True)
+
+    def _maybe_publish(self, force=False):
+        """
+        Publish the current snapshot unless one was published within the interval.
+        """
+
+        if self.publish is None:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            if (
+                not force
+                and self._published_at is not None
+                and now - self._published_at < self.publish_interval
+            ):
+                return
+            self._published_at = now
+
+        self.publish(self.snapshot())
+
+    def snapshot(self):
+        """
+        Return the aggregate and per-entry progress as a JSON-serializable dictionary.
+
+        Returns:
+            dict: The combined percentage, the number of entries by status, and the title, status,
+                percentage and error of every entry.
+        """
+
+        with self._lock:
+            status = dict(self.status)
+            errors = dict(self.errors)
+
+        entries = {}
+        for video_id, entry_status in status.items():
+            percent = (
+                100.0
+                if entry_status in ("done", "failed")
+                else self.progress[video_id].snapshot()["progress"]
+            )
+            entries[video_id] = {
+                "title": self.titles[video_id],
+                "status": entry_status,
+                "progress": percent,
+                "error": errors.get(video_id),
+            }
+
+        statuses = list(status.values())
+        return {
+            "progress": (
+                round(
+                    sum(entry["progress"] for entry in entries.values()) / len(entries),
+                    1,
+                )
+                if entries
+                else 100.0
+            ),
+            "total": len(entries),
+            "done": statuses.count("done"),
+            "failed": statuses.count("failed"),
+            "entries": entries,
+        }
+
+
+def run_bulk_downloads(entries, download, workers=BULK_WORKERS, discard=None):
+    """
+    Download entries on a bounded pool, yielding each one as soon as it completes.
+
+    Closing the generator early cancels the entries that have not started, and hands
+    the files of entries that complete afterwards (or completed but were not yielded)
+    to discard so they do not stay on disk.
+
+    Args:
+        entries (list): The entries to download.
+        download (callable): Downloads an entry and returns its file, e.g. its path.
+        workers (int, optional): The most entries downloaded at once.
+        discard (callable, optional): Called with every file that is never yielded.
+
+    Yields:
+        tuple: (entry, file, error) in completion order, with file None and the exception as
+            error for an entry that failed.
+    """
+
+    executor = ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="bulk-download"
+    )
+    futures = {executor.submit(download, entry): entry for entry in entries}
+    yielded = set()
+
+    def discard_result(future):
+        if not future.cancelled() and future.exception() is None:
+            discard(future.result())
+
+    try:
+        for future in as_completed(futures):
+            yielded.add(future)
+            error = future.exception()
+            if error is not None:
+                yield futures[future], None, error
+            else:
+                yield futures[future], future.result(), None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if discard is not None:
+            for future in futures:
+                if future not in yielded:
+                    future.add_done_callback(discard_result)
+
+
+class _ZipBuffer:
+    """
+    Write-only, unseekable file object that collects what zipfile writes until it is drained.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ZipStream:
+    """
+    ZIP archive written incrementally and yielded as bytes, so it can be streamed to a
+    client while entries are still being produced.
+
+    Members are stored without compression, since video and audio are already
+    compressed, and with data descriptors, so nothing has to be seeked back to.
+    """
+
+    def __init__(self, chunk_size=ZIP_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._buffer = _ZipBuffer()
+        self._zip = zipfile.ZipFile(self._buffer, "w", zipfile.ZIP_STORED)
+        self._names = set()
+
+    def _unique_name(self, name):
+        """
+        Return the member name, numbered if a member of the same name was already added.
+        """
+
+        stem, extension = os.path.splitext(name)
+        unique, number = name, 1
+        while unique in self._names:
+            number += 1
+            unique = f"{stem} ({number}){extension}"
+        self._names.add(unique)
+        return unique
+
+    def add_file(self, name, path):
+        """
+        Add a file to the archive.
+
+        Args:
+            name (str): The name of the member.
+            path (str): The path of the file.
+
+        Yields:
+            bytes: The archive data written so far, chunk by chunk.
+        """
+
+        with open(path, "rb") as source, self._zip.open(
+            self._unique_name(name), "w", force_zip64=True
+        ) as member:
+            while True:
+                chunk = source.read(self.chunk_size)
+                if not chunk:
+                    break
+                member.write(chunk)
+                data = self._buffer.drain()
+                if data:
+                    yield data
+
+        data = self._buffer.drain()
+        if data:
+            yield data
+
+    def add_bytes(self, name, data):
+        """
+        Add a member from memory, e.g. a listing of failed entries.
+
+        Args:
+            name (str): The name of the member.
+            data (bytes): The contents of the member.
+
+        Yields:
+            bytes: The archive data of the member.
+        """
+
+        self._zip.writestr(self._unique_name(name), data)
+        yield self._buffer.drain()
+
+    def close(self):
+        """
+        Finish the archive.
+
+        Yields:
+            bytes: The central directory that ends the archive.
+        """
+
+        self._zip.close()
+        yield self._buffer.drain()
@@ -0,0 +1,112 @@
+import io
+import threading
+import zipfile
+from bulk_download import *
+
+
+def test_channel_root_points_at_videos_tab():
+    assert (
+        get_channel_videos_url("https://www.youtube.com/channel/UC123/")
+        == "https://www.youtube.com/channel/UC123/videos"
+    )
+    assert (
+        get_channel_videos_url("https://www.youtube.com/@handle/shorts")
+        == "https://www.youtube.com/@handle/shorts"
+    )
+
+
+def test_playlist_entries_skip_nested_playlists_and_cap():
+    info = {
+        "entries": [
+            {"id": "a", "title": "A", "ie_key": "Youtube"},
+            {"id": "tab", "ie_key": "YoutubeTab"},
+            None,
+            {"id": "b"},
+            {"id": "c", "title": "C"},
+        ]
+    }
+    assert get_playlist_entries(info, max_entries=2) == [
+        {"id": "a", "title": "A"},
+        {"id": "b", "title": "b"},
+    ]
+
+
+def test_bulk_progress_averages_entries():
+    published = []
+    progress = BulkProgress(
+        [{"id": "a", "title": "A"}, {"id": "b", "title": "B"}],
+        stages={"video": 1.0},
+        publish=published.append,
+    )
+    progress.start("a").update("video", 50, 100)
+    progress.finish("b", error="unavailable")
+
+    snapshot = progress.snapshot()
+    assert snapshot["progress"] == 75
+    assert snapshot["failed"] == 1 and snapshot["done"] == 0
+    assert snapshot["entries"]["a"]["status"] == "downloading"
+    assert snapshot["entries"]["b"]["error"] == "unavailable"
+    assert published[-1] == snapshot
+
+
+def test_bulk_downloads_yield_in_completion_order_with_errors():
+    release = threading.Event()
+
+    def download(entry):
+        if entry == "slow":
+            release.wait(5)
+        if entry == "bad":
+            raise ValueError("boom")
+        return f"{entry}.mp4"
+
+    results = run_bulk_downloads(["slow", "fast", "bad"], download, workers=3)
+    first = [next(results), next(results)]
+    release.set()
+    rest = list(results)
+
+    assert ("fast", "fast.mp4", None) in first
+    assert [entry for entry, _, _ in first + rest][-1] == "slow"
+    assert any(
+        entry == "bad" and isinstance(error, ValueError) for entry, _, error in first
+    )
+
+
+def test_closed_bulk_downloads_discard_files():
+    discarded = []
+    started, release = threading.Event(), threading.Event()
+
+    def download(entry):
+        if entry == "late":
+            started.set()
+            release.wait(5)
+        else:
+            started.wait(5)
+        return f"{entry}.mp4"
+
+    results = run_bulk_downloads(
+        ["early", "late"], download, workers=2, discard=discarded.append
+    )
+    next(results)
+    results.close()
+    release.set()
+    for _ in range(100):
+        if discarded:
+            break
+        threading.Event().wait(0.01)
+    assert discarded == ["late.mp4"]
+
+
+def test_zip_stream_is_a_valid_archive(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"x" * 2500)
+
+    stream = ZipStream(chunk_size=1000)
+    chunks = list(stream.add_file("video.mp4", str(path)))
+    chunks += list(stream.add_file("video.mp4", str(path)))
+    chunks += list(stream.add_bytes("errors.txt", b"b: unavailable"))
+    chunks += list(stream.close())
+
+    assert len(chunks) > 3
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.namelist() == ["video.mp4", "video (2).mp4", "errors.txt"]
+        assert archive.read("video (2).mp4") == b"x" * 2500
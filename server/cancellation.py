@@ -0,0 +1,129 @@
+import threading
+import time
+
+# Seconds each endpoint may work on a request before its work is cancelled, keyed by Flask endpoint
+# name. Endpoints without a deadline are still cancelled when the client disconnects.
+REQUEST_DEADLINES = {
+    "get_summaries": 120,
+    "stream_summaries": 180,
+    "get_resolutions": 30,
+    "get_download": 30 * 60,
+    "get_bulk_download": 4 * 60 * 60,
+    "get_creater_info": 180,
+    "stream_comments": 60,
+}
+
+# Seconds between checks for a disconnected client while sleeping
+CANCELLATION_POLL_INTERVAL = 0.25
+
+
+class RequestCancelled(Exception):
+    """
+    Raised inside work whose client disconnected or whose deadline passed.
+    """
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation of the work done for a request.
+
+    The token is cancelled explicitly, once its deadline passes, or once the
+    is_disconnected callback reports that the client went away (e.g. waitress's
+    waitress.client_disconnected). Long-running work polls it between steps, from
+    yt-dlp progress hooks, ffmpeg's progress output, before ChatGPT calls and while
+    sleeping between retries, and stops by raising RequestCancelled.
+    """
+
+    def __init__(self, timeout=None, is_disconnected=None):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.is_disconnected = is_disconnected
+        self.reason = None
+        self._cancelled = threading.Event()
+
+    def cancel(self, reason="cancelled"):
+        """
+        Cancel the token. The first reason given is kept.
+
+        Args:
+            reason (str, optional): Why the work was cancelled.
+
+        Returns:
+            None
+        """
+
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self._cancelled.set()
+
+    def cancelled(self):
+        """
+        Return whether the work should stop, cancelling the token if the deadline passed or the client left.
+
+        Returns:
+            bool: True if the token is cancelled.
+        """
+
+        if self._cancelled.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline exceeded")
+        elif self.is_disconnected is not None and self.is_disconnected():
+            self.cancel("client disconnected")
+        return self._cancelled.is_set()
+
+    def check(self):
+        """
+        Stop the work if the token is cancelled.
+
+        Returns:
+            None
+
+        Raises:
+            RequestCancelled: If the token is cancelled.
+        """
+
+        if self.cancelled():
+            raise RequestCancelled(self.reason)
+
+    def remaining(self):
+        """
+        Return the seconds left until the deadline.
+
+        Returns:
+            float: The seconds left, at least 0, or None if the token has no deadline.
+        """
+
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def sleep(self, seconds, poll_interval=CANCELLATION_POLL_INTERVAL):
+        """
+        Sleep between retries, waking up as soon as the token is cancelled.
+
+        Args:
+            seconds (float): The seconds to sleep.
+            poll_interval (float, optional): The seconds between checks for a disconnected client.
+
+        Returns:
+            None
+
+        Raises:
+            RequestCancelled: If the token is cancelled before or while sleeping.
+        """
+
+        wake_at = time.monotonic() + seconds
+        while True:
+            self.check()
+            now = time.monotonic()
+            if now >= wake_at:
+                return
+            timeout = min(wake_at - now, poll_interval)
+            remaining = self.remaining()
+            if remaining is not None:
+                timeout = min(timeout, remaining)
+            self._cancelled.wait(timeout)
+
+
+# Token of work done outside of a request, e.g. prefetching or refreshing profiles
+NEVER_CANCELLED = CancellationToken()
@@ -0,0 +1,50 @@
+import threading
+import time
+import pytest
+from cancellation import *
+
+
+def test_deadline_cancels_token():
+    token = CancellationToken(timeout=0)
+    with pytest.raises(RequestCancelled, match="deadline exceeded"):
+        token.check()
+    assert token.remaining() == 0
+
+
+def test_disconnected_client_cancels_token():
+    disconnected = []
+    token = CancellationToken(is_disconnected=lambda: bool(disconnected))
+    assert not token.cancelled()
+    disconnected.append(True)
+    assert token.cancelled()
+    assert token.reason == "client disconnected"
+
+
+def test_first_reason_is_kept():
+    token = CancellationToken()
+    token.cancel("client disconnected")
+    token.cancel("deadline exceeded")
+    assert token.reason == "client disconnected"
+    assert token.remaining() is None
+
+
+def test_sleep_wakes_up_when_cancelled():
+    token = CancellationToken()
+    threading.Timer(0.05, token.cancel).start()
+    start = time.monotonic()
+    with pytest.raises(RequestCancelled):
+        token.sleep(5)
+    assert time.monotonic() - start < 1
+
+
+def test_sleep_stops_at_deadline():
+    token = CancellationToken(timeout=0.05)
+    start = time.monotonic()
+    with pytest.raises(RequestCancelled):
+        token.sleep(5, poll_interval=1)
+    assert time.monotonic() - start < 1
+
+
+def test_sleep_without_cancellation():
+    NEVER_CANCELLED.sleep(0.01)
+    assert not NEVER_CANCELLED.cancelled()
@@ -0,0 +1,192 @@
+import random
+import re
+import zlib
+
+# Length of the character shingles used to compare comments
+SHINGLE_SIZE = 4
+
+# MinHash signature length, split into LSH bands of BAND_ROWS rows each.
+# With 32 hashes in 8 bands of 4 rows, pairs above ~0.6 similarity almost always collide.
+MINHASH_PERMUTATIONS = 32
+BAND_ROWS = 4
+
+# Estimated Jaccard similarity above which two comments are treated as duplicates
+SIMILARITY_THRESHOLD = 0.7
+
+# Large Mersenne prime for the universal hash family (a * x + b) mod p
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Fixed seed so signatures are stable across processes
+_rng = random.Random(1337)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+
+def normalize_comment(text):
+    """
+    Normalize a comment for duplicate detection.
+
+    Lowercases the text, drops punctuation and emoji, and collapses whitespace so that
+    "First!!!" and "first" compare equal.
+
+    Args:
+        text (str): The raw comment text.
+
+    Returns:
+        str: The normalized comment text.
+
+    Examples:
+        >>> normalize_comment("  FIRST!!!  ")
+        'first'
+    """
+
+    return " ".join(re.sub(r"[^\w\s]", " ", text.casefold()).split())
+
+
+def get_shingles(text):
+    """
+    Return the set of hashed character shingles of a normalized comment.
+
+    Args:
+        text (str): The normalized comment text.
+
+    Returns:
+        set: The CRC32 hashes of every SHINGLE_SIZE-character window of the text.
+    """
+
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode())}
+
+    return {
+        zlib.crc32(text[i : i + SHINGLE_SIZE].encode())
+        for i in range(len(text) - SHINGLE_SIZE + 1)
+    }
+
+
+def get_minhash_signature(shingles):
+    """
+    Compute the MinHash signature of a set of shingle hashes.
+
+    Args:
+        shingles (set): The hashed shingles of a comment.
+
+    Returns:
+        tuple: MINHASH_PERMUTATIONS minimum hash values.
+    """
+
+    return tuple(
+        min(((a * shingle + b) % _MERSENNE_PRIME) & _MAX_HASH for shingle in shingles)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimate_similarity(signature_a, signature_b):
+    """
+    Estimate the Jaccard similarity of two comments from their MinHash signatures.
+
+    Args:
+        signature_a (tuple): The signature of the first comment.
+        signature_b (tuple): The signature of the second comment.
+
+    Returns:
+        float: The fraction of matching signature values, between 0 and 1.
+    """
+
+    matches = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+    return matches / len(signature_a)
+
+
+def collapse_comments(texts, threshold=SIMILARITY_THRESHOLD):
+    """
+    Group near-duplicate comments and return one representative per group.
+
+    Exact duplicates (after normalization) are merged first. The remaining distinct
+    comments are bucketed with MinHash locality-sensitive hashing, and candidate
+    pairs that share a bucket are merged when their estimated similarity reaches the
+    threshold. The first comment of each group (the most popular one, when the input
+    is sorted by popularity) is kept as the representative.
+
+    Args:
+        texts (list): The comment texts, most important first.
+        threshold (float, optional): The minimum estimated similarity for two comments to
+            be collapsed. Defaults to SIMILARITY_THRESHOLD.
+
+    Returns:
+        list: (text, count) tuples in order of first appearance.
+
+    Examples:
+        >>> collapse_comments(["first!", "Great video", "FIRST", "first!!"])
+        [('first!', 3), ('Great video', 1)]
+    """
+
+    # Merge exact duplicates by their normalized text
+    groups, normalized_groups = [], {}
+    for text in texts:
+        normalized = normalize_comment(text)
+        group = normalized_groups.get(normalized)
+        if group is None:
+            normalized_groups[normalized] = len(groups)
+            groups.append([text, 1, normalized])
+        else:
+            groups[group][1] += 1
+
+    # Union-find over the distinct comments
+    parents = list(range(len(groups)))
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    # Bucket comments by LSH band and compare only the ones that collide
+    signatures = [get_minhash_signature(get_shingles(group[2])) for group in groups]
+    buckets = {}
+    for i, signature in enumerate(signatures):
+        for band in range(0, MINHASH_PERMUTATIONS, BAND_ROWS):
+            key = (band, signature[band : band + BAND_ROWS])
+            for j in buckets.setdefault(key, []):
+                root_i, root_j = find(i), find(j)
+                if root_i == root_j:
+                    continue
+                if estimate_similarity(signatures[i], signatures[j]) >= threshold:
+                    # Keep the earlier comment as the root of the group
+                    parents[max(root_i, root_j)] = min(root_i, root_j)
+            buckets[key].append(i)
+
+    counts = {}
+    for i, group in enumerate(groups):
+        root = find(i)
+        counts[root] = counts.get(root, 0) + group[1]
+
+    return [(groups[root][0], counts[root]) for root in sorted(counts)]
+
+
+def format_collapsed_comments(texts, threshold=SIMILARITY_THRESHOLD):
+    """
+    Format comments as a numbered prompt list with near-duplicates collapsed.
+
+    Args:
+        texts (list): The comment texts, most important first.
+        threshold (float, optional): The minimum estimated similarity for two comments to
+            be collapsed. Defaults to SIMILARITY_THRESHOLD.
+
+    Returns:
+        str: One numbered line per distinct comment, suffixed with "(xN)" when N
+            comments were collapsed into it.
+
+    Examples:
+        >>> print(format_collapsed_comments(["first!", "Great video", "FIRST"]))
+        1) first! (x2)
+        2) Great video
+    """
+
+    lines = []
+    for index, (text, count) in enumerate(collapse_comments(texts, threshold)):
+        suffix = f" (x{count})" if count > 1 else ""
+        lines.append(f"{index + 1}) {text}{suffix}")
+
+    return "\n".join(lines)
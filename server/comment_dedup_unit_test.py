@@ -0,0 +1,23 @@
+from comment_dedup import *
+
+
+def test_collapse_exact_duplicates_after_normalization():
+    comments = ["first!", "Great video", "FIRST", "first!!"]
+    assert collapse_comments(comments) == [("first!", 3), ("Great video", 1)]
+
+
+def test_collapse_near_duplicates():
+    comments = [
+        "This is the best video I have ever seen on this topic",
+        "Totally unrelated opinion about the pricing",
+        "this is the best video i've ever seen on this topic!!",
+    ]
+    assert collapse_comments(comments) == [
+        ("This is the best video I have ever seen on this topic", 2),
+        ("Totally unrelated opinion about the pricing", 1),
+    ]
+
+
+def test_format_collapsed_comments():
+    comments = ["first!", "Great video", "FIRST"]
+    assert format_collapsed_comments(comments) == "1) first! (x2)\n2) Great video"
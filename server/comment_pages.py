@@ -0,0 +1,204 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+from cancellation import NEVER_CANCELLED
+from ttl_cache import TTLCache
+
+# Comments per page, and the most a client may ask for
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Idle seconds after which a video's comment generator is dropped, and how many are kept open
+COMMENT_STREAM_TTL = 5 * 60
+MAX_COMMENT_STREAMS = 64
+
+# Key signing the cursors, so clients cannot forge deep offsets that make the server scrape every
+# comment of a video. Set it to keep cursors valid across restarts and processes.
+CURSOR_SECRET = os.getenv("COMMENT_CURSOR_SECRET", "").encode() or os.urandom(32)
+
+# Fields of a scraped comment sent to clients
+COMMENT_FIELDS = ("cid", "text", "author", "votes", "time", "photo", "heart", "reply")
+
+
+def _sign(payload, secret):
+    """
+    Return the URL-safe signature of a cursor payload.
+    """
+
+    digest = hmac.new(secret, payload.encode(), hashlib.sha256).digest()[:16]
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def encode_cursor(video_id, offset, secret=CURSOR_SECRET):
+    """
+    Encode the position of the next page as an opaque, signed cursor.
+
+    Args:
+        video_id (str): The ID of the YouTube video.
+        offset (int): The index of the first comment of the next page.
+        secret (bytes, optional): The signing key. Defaults to CURSOR_SECRET.
+
+    Returns:
+        str: The URL-safe cursor.
+
+    Examples:
+        >>> decode_cursor(encode_cursor("dQw4w9WgXcQ", 20))
+        ('dQw4w9WgXcQ', 20)
+    """
+
+    payload = json.dumps({"v": video_id, "o": offset}, separators=(",", ":"))
+    payload = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+    return f"{payload}.{_sign(payload, secret)}"
+
+
+def decode_cursor(cursor, secret=CURSOR_SECRET):
+    """
+    Decode a cursor from encode_cursor.
+
+    Args:
+        cursor (str): The cursor.
+        secret (bytes, optional): The signing key. Defaults to CURSOR_SECRET.
+
+    Returns:
+        tuple: The video ID and the offset of the next page.
+
+    Raises:
+        ValueError: If the cursor is malformed or its signature does not match.
+    """
+
+    payload, _, signature = cursor.partition(".")
+    if not hmac.compare_digest(signature, _sign(payload, secret)):
+        raise ValueError("Invalid cursor")
+
+    try:
+        padding = "=" * (-len(payload) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(payload + padding))
+        video_id, offset = payload["v"], payload["o"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(video_id, str) or not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor")
+    return video_id, offset
+
+
+class CommentStream:
+    """
+    Comments of a video pulled lazily from a scraping generator.
+
+    Every comment pulled so far is kept, so pages already fetched are served from
+    memory and deeper pages only pull the comments they are missing.
+    """
+
+    def __init__(self, comments):
+        self._comments = iter(comments)
+        self.fetched = []
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def read(self, offset, limit, cancellation=NEVER_CANCELLED):
+        """
+        Return a page of comments, pulling more from the generator if needed.
+
+        Args:
+            offset (int): The index of the first comment.
+            limit (int): The maximum number of comments.
+            cancellation (CancellationToken, optional): Stops pulling comments when cancelled.
+
+        Returns:
+            tuple: The comments of the page, and whether more comments may follow.
+
+        Raises:
+            RequestCancelled: If the token is cancelled while pulling comments.
+        """
+
+        with self._lock:
+            while not self.exhausted and len(self.fetched) < offset + limit:
+                cancellation.check()
+                try:
+                    comment = next(self._comments)
+                except StopIteration:
+                    self.exhausted = True
+                    break
+                self.fetched.append(
+                    {field: comment.get(field) for field in COMMENT_FIELDS}
+                )
+
+            page = self.fetched[offset : offset + limit]
+            has_more = not self.exhausted or len(self.fetched) > offset + limit
+            return page, has_more
+
+
+class CommentStreams:
+    """
+    Short-lived registry of the open comment stream of each video.
+
+    A stream is opened with open_stream on the first page request of a video and
+    dropped after it has been idle for the TTL, after which a deeper cursor re-scrapes
+    from the top.
+    """
+
+    def __init__(
+        self, open_stream, ttl=COMMENT_STREAM_TTL, max_streams=MAX_COMMENT_STREAMS
+    ):
+        self.open_stream = open_stream
+        self._streams = TTLCache(ttl, max_entries=max_streams)
+        self._lock = threading.Lock()
+
+    def get(self, video_id):
+        """
+        Return the stream of a video, opening it if needed and keeping it alive for another TTL.
+
+        Args:
+            video_id (str): The ID of the YouTube video.
+
+        Returns:
+            CommentStream: The stream of the video's comments.
+        """
+
+        with self._lock:
+            stream = self._streams.get(video_id)
+            if stream is None:
+                stream = CommentStream(self.open_stream(video_id))
+            self._streams.set(video_id, stream)
+            return stream
+
+    def pages(
+        self,
+        video_id,
+        offset=0,
+        page_size=DEFAULT_PAGE_SIZE,
+        max_pages=1,
+        cancellation=NEVER_CANCELLED,
+    ):
+        """
+        Yield consecutive pages of a video's comments.
+
+        Args:
+            video_id (str): The ID of the YouTube video.
+            offset (int, optional): The index of the first comment. Defaults to 0.
+            page_size (int, optional): The comments per page. Defaults to DEFAULT_PAGE_SIZE.
+            max_pages (int, optional): The number of pages to yield. Defaults to 1.
+            cancellation (CancellationToken, optional): Stops pulling comments when cancelled.
+
+        Yields:
+            dict: The comments of a page and the cursor of the next page (None after the last page).
+        """
+
+        for _ in range(max_pages):
+            try:
+                page, has_more = self.get(video_id).read(
+                    offset, page_size, cancellation
+                )
+            except Exception:
+                # A failed generator cannot be resumed, so the next request starts a fresh one
+                self._streams.delete(video_id)
+                raise
+            offset += len(page)
+            cursor = encode_cursor(video_id, offset) if has_more and page else None
+            yield {"comments": page, "cursor": cursor}
+            if cursor is None:
+                break
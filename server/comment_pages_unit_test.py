@@ -0,0 +1,73 @@
+import pytest
+from cancellation import CancellationToken, RequestCancelled
+from comment_pages import *
+
+
+def fake_comments(count, pulled):
+    for i in range(count):
+        pulled.append(i)
+        yield {"cid": str(i), "text": f"comment {i}", "votes": "1", "time_parsed": 0.0}
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor("abc123XYZ_-", 40)) == ("abc123XYZ_-", 40)
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+
+
+def test_forged_cursors_are_rejected():
+    cursor = encode_cursor("abc123XYZ_-", 40)
+    forged = encode_cursor("abc123XYZ_-", 10000000, secret=b"guess")
+    with pytest.raises(ValueError):
+        decode_cursor(forged)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor.split(".")[0])
+
+
+def test_cancelled_reads_stop_pulling():
+    pulled = []
+    stream = CommentStream(fake_comments(100, pulled))
+    token = CancellationToken()
+    token.cancel()
+    with pytest.raises(RequestCancelled):
+        stream.read(50, 10, token)
+    assert pulled == []
+
+
+def test_deeper_pages_continue_the_same_generator():
+    pulled, opened = [], []
+    streams = CommentStreams(
+        lambda video_id: opened.append(video_id) or fake_comments(5, pulled)
+    )
+
+    first = list(streams.pages("video", page_size=2))
+    assert [c["cid"] for c in first[0]["comments"]] == ["0", "1"]
+    assert pulled == [0, 1]
+
+    _, offset = decode_cursor(first[0]["cursor"])
+    rest = list(streams.pages("video", offset, page_size=2, max_pages=5))
+    assert [len(page["comments"]) for page in rest] == [2, 1]
+    assert rest[-1]["cursor"] is None
+    assert pulled == [0, 1, 2, 3, 4]
+    assert opened == ["video"]
+
+
+def test_only_client_fields_are_kept():
+    streams = CommentStreams(lambda video_id: fake_comments(1, []))
+    comment = next(streams.pages("video"))["comments"][0]
+    assert "time_parsed" not in comment
+    assert comment["text"] == "comment 0"
+
+
+def test_failed_generator_is_reopened():
+    def broken():
+        yield {"cid": "0"}
+        raise ConnectionError("blocked")
+
+    opened = []
+    streams = CommentStreams(lambda video_id: opened.append(video_id) or broken())
+    with pytest.raises(ConnectionError):
+        list(streams.pages("video", page_size=5))
+    with pytest.raises(ConnectionError):
+        list(streams.pages("video", page_size=5))
+    assert len(opened) == 2
@@ -0,0 +1,298 @@
+import threading
+import time
+
+# Weight of each stage in the combined download progress
+STAGE_WEIGHTS = {"video": 0.4, "audio": 0.4, "ffmpeg": 0.2}
+
+# Smoothing factor of the exponentially weighted throughput average
+THROUGHPUT_SMOOTHING = 0.3
+
+# Minimum seconds between snapshots published to the shared state store
+PUBLISH_INTERVAL = 0.5
+
+
+class StreamProgress:
+    """
+    Progress of a single stage of a download, in bytes or seconds of media.
+
+    Throughput is smoothed with an exponentially weighted moving average of the
+    rate between updates, and the ETA is the remaining amount over that rate.
+    """
+
+    def __init__(self):
+        self.done = 0
+        self.total = None
+        self.throughput = None
+        self.finished = False
+        self.updated_at = None
+
+    def update(self, done, total=None, rate=None, now=None):
+        """
+        Record the amount processed so far.
+
+        Args:
+            done (float): The bytes downloaded or seconds muxed so far.
+            total (float, optional): The total bytes or seconds, if known.
+            rate (float, optional): The instantaneous rate reported by the tool, used when
+                there is no previous update to measure against.
+            now (float, optional): The current monotonic time. Defaults to time.monotonic().
+
+        Returns:
+            None
+        """
+
+        now = time.monotonic() if now is None else now
+
+        if self.updated_at is not None and now > self.updated_at and done >= self.done:
+            rate = (done - self.done) / (now - self.updated_at)
+
+        if rate is not None:
+            if self.throughput is None:
+                self.throughput = rate
+            else:
+                self.throughput += THROUGHPUT_SMOOTHING * (rate - self.throughput)
+
+        self.done = done
+        if total:
+            self.total = total
+        self.updated_at = now
+
+    def finish(self):
+        """
+        Mark the stage as complete.
+
+        Returns:
+            None
+        """
+
+        if self.total:
+            self.done = self.total
+        self.finished = True
+
+    def percent(self):
+        """
+        Return the completion of the stage.
+
+        Returns:
+            float: The percentage complete, between 0 and 100.
+        """
+
+        if self.finished:
+            return 100.0
+        if not self.total:
+            return 0.0
+        return min(100.0, self.done / self.total * 100)
+
+    def eta(self):
+        """
+        Return the estimated seconds until the stage completes.
+
+        Returns:
+            float: The remaining seconds, or None if the total or throughput is unknown.
+        """
+
+        if self.finished:
+            return 0.0
+        if not self.total or not self.throughput:
+            return None
+        return max(0.0, (self.total - self.done) / self.throughput)
+
+    def snapshot(self):
+        """
+        Return the progress of the stage as a JSON-serializable dictionary.
+
+        Returns:
+            dict: The percentage, amount done, total, smoothed throughput, and ETA.
+        """
+
+        return {
+            "percent": round(self.percent(), 1),
+            "done": self.done,
+            "total": self.total,
+            "throughput": self.throughput,
+            "eta": self.eta(),
+        }
+
+
+class DownloadProgress:
+    """
+    Combined progress of the video download, audio download, and ffmpeg merge stages.
+
+    When a publish callback is given, snapshots are handed to it (e.g. to store them
+    under the job ID for other processes to serve) at most every publish_interval
+    seconds, and immediately when a stage finishes.
+    """
+
+    def __init__(
+        self, stages=STAGE_WEIGHTS, publish=None, publish_interval=PUBLISH_INTERVAL
+    ):
+        self.weights = dict(stages)
+        self.stages = {stage: StreamProgress() for stage in self.weights}
+        self.publish = publish
+        self.publish_interval = publish_interval
+        self._published_at = None
+        self._lock = threading.Lock()
+
+    def update(self, stage, done, total=None, rate=None):
+        """
+        Record the progress of a stage.
+
+        Args:
+            stage (str): The name of the stage, e.g. "video".
+            done (float): The bytes downloaded or seconds muxed so far.
+            total (float, optional): The total bytes or seconds, if known.
+            rate (float, optional): The instantaneous rate reported by the tool.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self.stages[stage].update(done, total, rate)
+        self._maybe_publish()
+
+    def finish(self, stage):
+        """
+        Mark a stage as complete.
+
+        Args:
+            stage (str): The name of the stage.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self.stages[stage].finish()
+        self.flush()
+
+    def flush(self):
+        """
+        Publish the current snapshot regardless of the publish interval.
+
+        Returns:
+            None
+        """
+
+        self._maybe_publish(force=True)
+
+    def _maybe_publish(self, force=False):
+        """
+        Publish the current snapshot unless one was published within the interval.
+        """
+
+        if self.publish is None:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            if (
+                not force
+                and self._published_at is not None
+                and now - self._published_at < self.publish_interval
+            ):
+                return
+            self._published_at = now
+
+        self.publish(self.snapshot())
+
+    def snapshot(self):
+        """
+        Return the combined and per-stage progress as a JSON-serializable dictionary.
+
+        Returns:
+            dict: The combined percentage and ETA, and the snapshot of every stage.
+        """
+
+        with self._lock:
+            stages = {stage: self.stages[stage].snapshot() for stage in self.weights}
+
+        # Stages run one after another, so the overall ETA is the sum of what is left
+        etas = [stage["eta"] for stage in stages.values()]
+        return {
+            "progress": round(
+                sum(stages[stage]["percent"] * w for stage, w in self.weights.items()),
+                1,
+            ),
+            "eta": None if None in etas else sum(etas),
+            "stages": stages,
+        }
+
+
+def make_ytdlp_hook(download_progress, stage):
+    """
+    Create a yt-dlp progress hook that records byte counts for a stage.
+
+    The hook reads the machine-readable downloaded_bytes, total_bytes (or
+    total_bytes_estimate) and speed fields of yt-dlp's status dictionary.
+
+    Args:
+        download_progress (DownloadProgress): The progress to update.
+        stage (str): The name of the stage, e.g. "video" or "audio".
+
+    Returns:
+        callable: The hook to pass in yt-dlp's progress_hooks option.
+    """
+
+    def hook(d):
+        if d["status"] == "downloading":
+            download_progress.update(
+                stage,
+                d.get("downloaded_bytes") or 0,
+                d.get("total_bytes") or d.get("total_bytes_estimate"),
+                d.get("speed"),
+            )
+        elif d["status"] == "finished":
+            download_progress.finish(stage)
+
+    return hook
+
+
+def parse_ffmpeg_progress(line):
+    """
+    Parse a line of ffmpeg's machine-readable -progress output.
+
+    Args:
+        line (str): A key=value line written by ffmpeg -progress pipe:1.
+
+    Returns:
+        tuple: (key, value) if the line is a progress field, otherwise (None, None).
+
+    Examples:
+        >>> parse_ffmpeg_progress("out_time_us=5000000\\n")
+        ('out_time_us', '5000000')
+        >>> parse_ffmpeg_progress("Stream mapping:")
+        (None, None)
+    """
+
+    key, separator, value = line.strip().partition("=")
+    if not separator or not key or " " in key:
+        return None, None
+    return key, value.strip()
+
+
+def record_ffmpeg_progress(download_progress, line, duration, stage="ffmpeg"):
+    """
+    Update the ffmpeg stage from a line of ffmpeg's -progress output.
+
+    Args:
+        download_progress (DownloadProgress): The progress to update.
+        line (str): A line of output from ffmpeg.
+        duration (float): The duration of the media being muxed, in seconds.
+        stage (str, optional): The name of the stage. Defaults to "ffmpeg".
+
+    Returns:
+        bool: True if the line was a progress field, False if it was regular output.
+    """
+
+    key, value = parse_ffmpeg_progress(line)
+    if key is None:
+        return False
+
+    if key in ("out_time_us", "out_time_ms") and value.isdigit():
+        # ffmpeg reports out_time_ms in microseconds as well
+        download_progress.update(stage, int(value) / 1_000_000, duration)
+    elif key == "progress" and value == "end":
+        download_progress.finish(stage)
+
+    return True
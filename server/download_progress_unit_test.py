@@ -0,0 +1,41 @@
+from download_progress import *
+
+
+def test_stream_progress_smooths_throughput_and_estimates_eta():
+    stream = StreamProgress()
+    stream.update(0, 1000, now=0)
+    stream.update(100, 1000, now=1)
+    assert stream.throughput == 100
+    stream.update(300, 1000, now=2)
+    assert stream.throughput == 100 + THROUGHPUT_SMOOTHING * 100
+    assert stream.percent() == 30
+    assert stream.eta() == 700 / stream.throughput
+
+
+def test_ytdlp_hook_reads_byte_counts():
+    progress = DownloadProgress()
+    hook = make_ytdlp_hook(progress, "video")
+    hook({"status": "downloading", "downloaded_bytes": 50, "total_bytes": 100})
+    assert progress.snapshot()["stages"]["video"]["percent"] == 50
+    hook({"status": "finished"})
+    assert progress.snapshot()["progress"] == 40
+
+
+def test_ffmpeg_progress_lines():
+    progress = DownloadProgress()
+    assert not record_ffmpeg_progress(progress, "Stream mapping:\n", 10)
+    assert record_ffmpeg_progress(progress, "out_time_us=5000000\n", 10)
+    assert progress.snapshot()["stages"]["ffmpeg"]["percent"] == 50
+    record_ffmpeg_progress(progress, "progress=end\n", 10)
+    assert progress.snapshot()["stages"]["ffmpeg"]["percent"] == 100
+
+
+def test_snapshots_are_published_throttled_and_on_finish():
+    published = []
+    progress = DownloadProgress(publish=published.append, publish_interval=60)
+    progress.update("video", 10, 100)
+    progress.update("video", 20, 100)
+    assert len(published) == 1
+    progress.finish("video")
+    assert len(published) == 2
+    assert published[-1]["stages"]["video"]["percent"] == 100
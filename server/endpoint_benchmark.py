@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+# Endpoints exercised by the benchmark, with the video and channel of the recorded fixtures
+BENCHMARK_VIDEO_ID = "E5BaGpnrgao"
+BENCHMARK_CHANNEL_URL = "https://www.youtube.com/@mrbeast"
+BENCHMARK_REQUESTS = {
+    "get_summaries": f"/api/get-summaries?video_url=https://www.youtube.com/watch?v={BENCHMARK_VIDEO_ID}",
+    "get_resolutions": f"/api/get-resolutions?video_id={BENCHMARK_VIDEO_ID}",
+    "search_transcript": f"/api/search-transcript?video_id={BENCHMARK_VIDEO_ID}&query=the",
+    "get_creator_info": f"/api/get-creator-info?channel_url={BENCHMARK_CHANNEL_URL}",
+}
+
+
+def run_benchmark(runs):
+    """
+    Time every benchmark request through the Flask test client.
+
+    The first run of each request is cold (empty caches) and the others are warm. The
+    SQLite state and LLM cache go to a fresh temporary directory, so state left by an
+    earlier record or replay run (e.g. saved creator profiles) never warms a cold request.
+
+    Args:
+        runs (int): The number of times each request is made.
+
+    Returns:
+        dict: The status, cold latency, and median and worst warm latency of each request in seconds.
+    """
+
+    state_dir = tempfile.mkdtemp(prefix="endpoint-benchmark-")
+    os.environ["STATE_SQLITE_PATH"] = os.path.join(state_dir, "state.sqlite3")
+    os.environ["LLM_CACHE_PATH"] = os.path.join(state_dir, "llm_cache.sqlite3")
+
+    import app
+
+    client = app.app.test_client()
+    results = {}
+    for name, url in BENCHMARK_REQUESTS.items():
+        latencies = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            response = client.get(url)
+            latencies.append(time.perf_counter() - start)
+
+        warm = latencies[1:] or latencies
+        results[name] = {
+            "status": response.status_code,
+            "cold": round(latencies[0], 4),
+            "warm_median": round(statistics.median(warm), 4),
+            "warm_max": round(max(warm), 4),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the endpoints offline against recorded fixtures."
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--mode",
+        choices=["replay", "record"],
+        default="replay",
+        help="Record fixtures from the network once, then replay them offline.",
+    )
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    # The replay layer, caches and proxies are configured from the environment on import
+    os.environ["REPLAY_MODE"] = args.mode
+    os.environ["REPLAY_LATENCY_SCALE"] = str(args.latency_scale)
+    os.environ.setdefault("ENV", "development")
+    os.environ.setdefault("LLM_CACHE_DISABLED", "true")
+    os.environ.setdefault("OPENAI_API_KEY", "replay")
+
+    print(json.dumps(run_benchmark(args.runs), indent=2))
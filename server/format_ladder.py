@@ -0,0 +1,182 @@
+# Range of video heights offered to users
+MIN_HEIGHT = 144
+MAX_HEIGHT = 1080
+
+
+def estimate_size(fmt, duration):
+    """
+    Estimate the size of a stream in bytes.
+
+    Uses the exact filesize when yt-dlp knows it, then its approximate filesize, and
+    finally the total bitrate multiplied by the duration.
+
+    Args:
+        fmt (dict): A format dictionary from yt-dlp's extract_info.
+        duration (float): The duration of the video in seconds.
+
+    Returns:
+        int: The estimated size in bytes, or None if it cannot be estimated.
+
+    Examples:
+        >>> estimate_size({"tbr": 800}, 60)
+        6000000
+    """
+
+    size = fmt.get("filesize") or fmt.get("filesize_approx")
+    if size:
+        return int(size)
+    if fmt.get("tbr") and duration:
+        return int(fmt["tbr"] * 1000 / 8 * duration)
+    return None
+
+
+def select_best_audio(formats):
+    """
+    Select the audio-only stream that is merged with every video stream.
+
+    Args:
+        formats (list): The format dictionaries from yt-dlp's extract_info.
+
+    Returns:
+        dict: The m4a audio-only format with the highest bitrate, or None if there is none.
+    """
+
+    audio_formats = [
+        f
+        for f in formats
+        if f.get("vcodec") == "none"
+        and f.get("acodec") not in (None, "none")
+        and f.get("ext") == "m4a"
+    ]
+    if not audio_formats:
+        return None
+    return max(audio_formats, key=lambda f: f.get("abr") or f.get("tbr") or 0)
+
+
+def build_format_ladder(info_dict):
+    """
+    Build the list of downloadable video streams of a video.
+
+    Each rung is a video-only stream between MIN_HEIGHT and MAX_HEIGHT, described with
+    its codec, frame rate, bitrate, and the estimated size of the merged download
+    (the video stream plus the best m4a audio stream).
+
+    Args:
+        info_dict (dict): The info dictionary from yt-dlp's extract_info.
+
+    Returns:
+        dict:
+            - "formats": The video rungs, sorted by height and then bitrate.
+            - "audio": The audio stream merged with every rung, or None.
+    """
+
+    formats = info_dict.get("formats", [])
+    duration = info_dict.get("duration") or 0
+
+    best_audio = select_best_audio(formats)
+    audio = None
+    if best_audio is not None:
+        audio = {
+            "format_id": best_audio["format_id"],
+            "acodec": best_audio.get("acodec"),
+            "ext": best_audio.get("ext"),
+            "bitrate": best_audio.get("abr") or best_audio.get("tbr"),
+            "size": estimate_size(best_audio, duration),
+        }
+
+    ladder = []
+    for f in formats:
+        height = f.get("height")
+        if height is None or not MIN_HEIGHT <= height <= MAX_HEIGHT:
+            continue
+        if f.get("vcodec") in (None, "none") or f.get("acodec") not in (None, "none"):
+            continue
+
+        size = estimate_size(f, duration)
+        if size is not None and audio is not None and audio["size"] is not None:
+            size += audio["size"]
+
+        ladder.append(
+            {
+                "format_id": f["format_id"],
+                "resolution": f"{height}p",
+                "height": height,
+                "fps": f.get("fps"),
+                "vcodec": f.get("vcodec"),
+                "ext": f.get("ext"),
+                "bitrate": f.get("vbr") or f.get("tbr"),
+                "size": size,
+            }
+        )
+
+    ladder.sort(key=lambda rung: (rung["height"], rung["bitrate"] or 0))
+    return {"formats": ladder, "audio": audio}
+
+
+def get_ladder_resolutions(ladder):
+    """
+    Return the distinct resolutions of a format ladder.
+
+    Args:
+        ladder (dict): The ladder returned by build_format_ladder.
+
+    Returns:
+        list: The resolutions in increasing order, e.g. ["360p", "720p"].
+    """
+
+    heights = sorted({rung["height"] for rung in ladder["formats"]})
+    return [f"{height}p" for height in heights]
+
+
+def find_format(ladder, format_id):
+    """
+    Look up a rung of a format ladder by its format ID.
+
+    Args:
+        ladder (dict): The ladder returned by build_format_ladder.
+        format_id (str): The yt-dlp format ID.
+
+    Returns:
+        dict: The matching rung, or None if the format is not in the ladder.
+    """
+
+    for rung in ladder["formats"]:
+        if rung["format_id"] == format_id:
+            return rung
+    return None
+
+
+def estimate_download_size(ladder, resolution=None, format_id=None):
+    """
+    Estimate the size of a download from its format ladder.
+
+    Mirrors the choice of the download: the exact rung of a format ID, otherwise the
+    largest H.264 rung (or any rung) up to the resolution, and the audio stream alone
+    when neither is given.
+
+    Args:
+        ladder (dict): The ladder returned by build_format_ladder.
+        resolution (str, optional): The maximum resolution of the video stream, e.g. "720p".
+        format_id (str, optional): The yt-dlp format ID of the video stream.
+
+    Returns:
+        int: The estimated size in bytes of the video and audio streams, or None if it is unknown.
+    """
+
+    rung = find_format(ladder, format_id) if format_id else None
+    if rung is not None:
+        return rung["size"]
+
+    if resolution is None:
+        audio = ladder["audio"]
+        return audio["size"] if audio is not None else None
+
+    height = int(resolution[:-1])
+    rungs = [
+        rung
+        for rung in ladder["formats"]
+        if rung["height"] <= height and rung["size"] is not None
+    ]
+    h264_rungs = [rung for rung in rungs if (rung["vcodec"] or "").startswith("avc1")]
+    rungs = h264_rungs or rungs
+    return max(rung["size"] for rung in rungs) if rungs else None
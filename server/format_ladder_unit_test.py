@@ -0,0 +1,83 @@
+from format_ladder import *
+
+
+info_dict = {
+    "duration": 100,
+    "formats": [
+        {
+            "format_id": "140",
+            "ext": "m4a",
+            "vcodec": "none",
+            "acodec": "mp4a.40.2",
+            "abr": 128,
+            "filesize": 1_600_000,
+        },
+        {
+            "format_id": "139",
+            "ext": "m4a",
+            "vcodec": "none",
+            "acodec": "mp4a.40.5",
+            "abr": 48,
+        },
+        {
+            "format_id": "18",
+            "ext": "mp4",
+            "height": 360,
+            "vcodec": "avc1",
+            "acodec": "mp4a.40.2",
+            "tbr": 500,
+        },
+        {
+            "format_id": "134",
+            "ext": "mp4",
+            "height": 360,
+            "vcodec": "avc1.4d401e",
+            "acodec": "none",
+            "tbr": 400,
+        },
+        {
+            "format_id": "136",
+            "ext": "mp4",
+            "height": 720,
+            "fps": 30,
+            "vcodec": "avc1.4d401f",
+            "acodec": "none",
+            "vbr": 1200,
+            "filesize_approx": 15_000_000,
+        },
+        {
+            "format_id": "137",
+            "ext": "mp4",
+            "height": 2160,
+            "vcodec": "vp9",
+            "acodec": "none",
+            "tbr": 9000,
+        },
+    ],
+}
+
+
+def test_build_format_ladder_keeps_video_only_streams_in_range():
+    ladder = build_format_ladder(info_dict)
+    assert [rung["format_id"] for rung in ladder["formats"]] == ["134", "136"]
+    assert ladder["audio"]["format_id"] == "140"
+    assert get_ladder_resolutions(ladder) == ["360p", "720p"]
+
+
+def test_build_format_ladder_estimates_merged_size():
+    ladder = build_format_ladder(info_dict)
+    assert find_format(ladder, "134")["size"] == 400 * 1000 // 8 * 100 + 1_600_000
+    assert find_format(ladder, "136")["size"] == 15_000_000 + 1_600_000
+    assert find_format(ladder, "137") is None
+
+
+def test_estimate_download_size_mirrors_the_chosen_stream():
+    ladder = build_format_ladder(info_dict)
+    assert estimate_download_size(ladder) == 1_600_000
+    assert estimate_download_size(ladder, "480p") == find_format(ladder, "134")["size"]
+    assert estimate_download_size(ladder, "1080p") == 15_000_000 + 1_600_000
+    assert (
+        estimate_download_size(ladder, "1080p", "134")
+        == find_format(ladder, "134")["size"]
+    )
+    assert estimate_download_size(ladder, "144p") is None
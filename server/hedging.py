@@ -0,0 +1,188 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import math
+import os
+import threading
+import time
+
+# Hedged requests are opt-in since every hedge costs an extra proxied request
+HEDGE_ENABLED = os.getenv("HEDGE_TRANSCRIPTS", "") == "1"
+
+# Percentile of recent attempt latencies after which a hedge is fired
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 95))
+
+# Share of calls allowed to fire a hedge, plus a small burst allowance
+HEDGE_BUDGET = float(os.getenv("HEDGE_BUDGET", 0.1))
+HEDGE_BURST = 3
+
+# Hedge delay used until enough latencies are recorded, and its lower bound
+HEDGE_DEFAULT_DELAY = 2.0
+HEDGE_MIN_DELAY = 0.2
+
+# Recent attempt latencies kept, and how many are needed before trusting the percentile
+HEDGE_LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+# Threads running attempts; each hedged call uses at most two
+HEDGE_WORKERS = 32
+
+
+class HedgedRequests:
+    """
+    Run a request with a backup attempt to cut tail latency.
+
+    The primary attempt is started first. If it has not finished within the delay
+    (a percentile of recent attempt latencies), a hedge attempt is started, e.g.
+    through another proxy, and whichever succeeds first wins. The other attempt is
+    cancelled if it has not started yet; one already running cannot be interrupted,
+    so its result is discarded. Hedges are capped at a share of all calls so a slow
+    upstream cannot double the proxy traffic.
+    """
+
+    def __init__(
+        self,
+        enabled=HEDGE_ENABLED,
+        percentile=HEDGE_PERCENTILE,
+        budget=HEDGE_BUDGET,
+        burst=HEDGE_BURST,
+        default_delay=HEDGE_DEFAULT_DELAY,
+        min_delay=HEDGE_MIN_DELAY,
+        window=HEDGE_LATENCY_WINDOW,
+        min_samples=HEDGE_MIN_SAMPLES,
+        workers=HEDGE_WORKERS,
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget
+        self.burst = burst
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="hedge"
+        )
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "hedged": 0,
+            "primary_wins": 0,
+            "hedge_wins": 0,
+            "budget_denied": 0,
+            "failures": 0,
+        }
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def delay(self):
+        """
+        Return the seconds to wait on the primary attempt before hedging.
+
+        Returns:
+            float: The configured percentile of recent attempt latencies, or the default delay
+                while there are too few samples.
+        """
+
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        if len(latencies) < self.min_samples:
+            return self.default_delay
+
+        index = max(math.ceil(self.percentile / 100 * len(latencies)) - 1, 0)
+        return max(latencies[index], self.min_delay)
+
+    def _reserve_hedge(self):
+        """
+        Take a hedge from the budget.
+
+        Returns:
+            bool: True if the budget allows another hedge.
+        """
+
+        with self._lock:
+            if self._stats["hedged"] >= self.budget * self._stats["calls"] + self.burst:
+                self._stats["budget_denied"] += 1
+                return False
+            self._stats["hedged"] += 1
+            return True
+
+    def _submit(self, fn):
+        """
+        Start an attempt and record its latency if it succeeds.
+
+        Returns:
+            Future: The running attempt.
+        """
+
+        start = time.monotonic()
+
+        def record(future):
+            if not future.cancelled() and future.exception() is None:
+                with self._lock:
+                    self._latencies.append(time.monotonic() - start)
+
+        future = self._executor.submit(fn)
+        future.add_done_callback(record)
+        return future
+
+    def run(self, primary, hedge):
+        """
+        Run a request, hedging it if the primary attempt is slow.
+
+        Args:
+            primary (callable): The first attempt, taking no arguments.
+            hedge (callable): The backup attempt, taking no arguments.
+
+        Returns:
+            The result of the first attempt to succeed.
+
+        Raises:
+            Exception: The primary attempt's exception if every attempt failed.
+        """
+
+        self._count("calls")
+        if not self.enabled:
+            return primary()
+
+        first = self._submit(primary)
+        done, _ = wait([first], timeout=self.delay())
+        if done or not self._reserve_hedge():
+            try:
+                return first.result()
+            except Exception:
+                self._count("failures")
+                raise
+
+        attempts = {first: "primary_wins", self._submit(hedge): "hedge_wins"}
+        pending = set(attempts)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    self._count(attempts[future])
+                    return future.result()
+
+        self._count("failures")
+        return first.result()
+
+    def metrics(self):
+        """
+        Return the hedging counters and the current hedge delay.
+
+        Returns:
+            dict: The number of calls, hedges fired, wins of each attempt, hedges denied by the
+                budget, failed calls, and the delay in seconds.
+        """
+
+        delay = self.delay()
+        with self._lock:
+            return {
+                **self._stats,
+                "enabled": self.enabled,
+                "delay": round(delay, 3),
+            }
@@ -0,0 +1,79 @@
+import threading
+import time
+import pytest
+from hedging import *
+
+
+def make_hedger(**kwargs):
+    return HedgedRequests(enabled=True, default_delay=0.05, min_delay=0, **kwargs)
+
+
+def test_fast_primary_is_not_hedged():
+    hedger = make_hedger()
+    assert hedger.run(lambda: "primary", lambda: "hedge") == "primary"
+    assert hedger.metrics()["hedged"] == 0
+
+
+def test_slow_primary_loses_to_hedge():
+    hedger = make_hedger()
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "primary"
+
+    assert hedger.run(slow, lambda: "hedge") == "hedge"
+    release.set()
+    metrics = hedger.metrics()
+    assert metrics["hedged"] == 1
+    assert metrics["hedge_wins"] == 1
+
+
+def test_failed_hedge_waits_for_primary():
+    hedger = make_hedger()
+
+    def slow():
+        time.sleep(0.15)
+        return "primary"
+
+    def failing():
+        raise ConnectionError("proxy refused")
+
+    assert hedger.run(slow, failing) == "primary"
+    assert hedger.metrics()["primary_wins"] == 1
+
+
+def test_primary_error_is_raised_when_every_attempt_fails():
+    hedger = make_hedger()
+
+    def slow_failure():
+        time.sleep(0.1)
+        raise TimeoutError("primary")
+
+    def failing():
+        raise ConnectionError("hedge")
+
+    with pytest.raises(TimeoutError):
+        hedger.run(slow_failure, failing)
+    assert hedger.metrics()["failures"] == 1
+
+
+def test_budget_caps_hedges():
+    hedger = make_hedger(budget=0, burst=1)
+
+    def slow():
+        time.sleep(0.1)
+        return "primary"
+
+    hedger.run(slow, lambda: "hedge")
+    assert hedger.run(slow, lambda: "hedge") == "primary"
+    metrics = hedger.metrics()
+    assert metrics["hedged"] == 1
+    assert metrics["budget_denied"] == 1
+
+
+def test_delay_follows_latency_percentile():
+    hedger = make_hedger(percentile=50, min_samples=4)
+    for _ in range(4):
+        hedger.run(lambda: None, lambda: None)
+    assert hedger.delay() < 0.05
@@ -0,0 +1,77 @@
+import importlib
+import threading
+
+# Sentinel marking a value that has not been created yet
+_UNSET = object()
+
+
+class Lazy:
+    """
+    Value created by a factory on first use, exactly once even under concurrent access.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._value = _UNSET
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Return the value, creating it on the first call.
+
+        Returns:
+            The value returned by the factory.
+
+        Raises:
+            Exception: Whatever the factory raised; the next call tries again.
+        """
+
+        value = self._value
+        if value is _UNSET:
+            with self._lock:
+                if self._value is _UNSET:
+                    self._value = self.factory()
+                value = self._value
+        return value
+
+    @property
+    def initialized(self):
+        return self._value is not _UNSET
+
+
+class LazyModule:
+    """
+    Module imported on first attribute access, e.g. `yt_dlp = LazyModule("yt_dlp")`.
+
+    Heavy third-party modules are deferred this way so importing the app stays fast
+    and a process can start serving before they are needed.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = Lazy(lambda: importlib.import_module(name))
+
+    def __getattr__(self, attr):
+        return getattr(self._module.get(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module.initialized else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def preload(*modules):
+    """
+    Import lazy modules now, e.g. from a background thread after startup.
+
+    Args:
+        *modules (LazyModule): The modules to import.
+
+    Returns:
+        None
+    """
+
+    for module in modules:
+        try:
+            module._module.get()
+        except ImportError as e:
+            print(f"Error preloading {module._name}: {str(e)}")
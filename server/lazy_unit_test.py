@@ -0,0 +1,49 @@
+import sys
+import threading
+from lazy import *
+
+
+def test_factory_runs_once_under_concurrency():
+    calls = []
+    barrier = threading.Barrier(8)
+    value = Lazy(lambda: calls.append(1) or object())
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(value.get())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_failed_factory_is_retried():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("client secrets missing")
+        return "flow"
+
+    value = Lazy(factory)
+    try:
+        value.get()
+    except RuntimeError:
+        pass
+    assert not value.initialized
+    assert value.get() == "flow"
+
+
+def test_module_is_imported_on_first_attribute_access():
+    sys.modules.pop("colorsys", None)
+    colorsys = LazyModule("colorsys")
+    assert "colorsys" not in sys.modules
+    assert colorsys.rgb_to_hsv(1, 0, 0) == (0, 1, 1)
+    assert "colorsys" in sys.modules
@@ -0,0 +1,187 @@
+from collections import defaultdict, deque
+import threading
+import time
+
+# USD per million prompt and completion tokens of each model
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+# Length of each aggregation window in seconds, and how many windows are kept
+USAGE_WINDOW = 60
+USAGE_WINDOWS_KEPT = 60
+
+
+def get_cost(model, prompt_tokens, completion_tokens):
+    """
+    Price the tokens of a completion.
+
+    Args:
+        model (str): The OpenAI model name.
+        prompt_tokens (int): The tokens of the prompt.
+        completion_tokens (int): The tokens of the completion.
+
+    Returns:
+        float: The cost in USD, or 0 for a model without a known price.
+
+    Examples:
+        >>> get_cost("gpt-3.5-turbo", 1_000_000, 0)
+        0.5
+    """
+
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0, 0))
+    return (
+        prompt_tokens * prompt_price + completion_tokens * completion_price
+    ) / 1_000_000
+
+
+def _empty_usage():
+    return {
+        "calls": 0,
+        "cached": 0,
+        "errors": 0,
+        "retries": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cost": 0.0,
+        "latency": 0.0,
+    }
+
+
+def _add_usage(usage, record):
+    """
+    Add a call record to an aggregate.
+    """
+
+    usage["calls"] += 1
+    usage["cached"] += record["cached"]
+    usage["errors"] += record["error"]
+    usage["retries"] += record["retry"]
+    usage["prompt_tokens"] += record["prompt_tokens"]
+    usage["completion_tokens"] += record["completion_tokens"]
+    usage["cost"] += record["cost"]
+    usage["latency"] += record["latency"]
+
+
+def _summarize(usage):
+    """
+    Return an aggregate with the average latency of the calls that reached OpenAI.
+    """
+
+    requested = usage["calls"] - usage["cached"]
+    return {
+        **{key: value for key, value in usage.items() if key != "latency"},
+        "cost": round(usage["cost"], 6),
+        "average_latency": (
+            round(usage["latency"] / requested, 3) if requested else None
+        ),
+    }
+
+
+class LLMUsageLedger:
+    """
+    Accounting of the tokens, cost, latency and retries of every ChatGPT call.
+
+    Calls are aggregated per endpoint and call site (e.g. get_creater_info and
+    credibility) and per model route since startup, and per endpoint in fixed time
+    windows so recent spend can be told apart from the total.
+    """
+
+    def __init__(self, window=USAGE_WINDOW, windows_kept=USAGE_WINDOWS_KEPT):
+        self.window = window
+        self._totals = defaultdict(_empty_usage)
+        self._routes = defaultdict(_empty_usage)
+        self._windows = deque(maxlen=windows_kept)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        endpoint,
+        call_site,
+        model,
+        prompt_tokens=0,
+        completion_tokens=0,
+        latency=0.0,
+        cached=False,
+        error=False,
+        retry=False,
+        route=None,
+        now=None,
+    ):
+        """
+        Record a ChatGPT call.
+
+        Args:
+            endpoint (str): The Flask endpoint that made the call, or "background".
+            call_site (str): The step of the pipeline, e.g. "video_summary".
+            model (str): The OpenAI model name.
+            prompt_tokens (int, optional): The tokens of the prompt.
+            completion_tokens (int, optional): The tokens of the completion.
+            latency (float, optional): The duration of the call in seconds.
+            cached (bool, optional): Whether the response came from the LLM cache.
+            error (bool, optional): Whether the call failed.
+            retry (bool, optional): Whether the call retried a previous attempt.
+            route (str, optional): The name of the model route the call took.
+            now (float, optional): The time of the call. Defaults to time.time().
+
+        Returns:
+            None
+        """
+
+        now = time.time() if now is None else now
+        record = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost": get_cost(model, prompt_tokens, completion_tokens),
+            "latency": latency,
+            "cached": int(cached),
+            "error": int(error),
+            "retry": int(retry),
+        }
+        window_start = now - now % self.window
+
+        with self._lock:
+            _add_usage(self._totals[(endpoint, call_site)], record)
+            if route is not None:
+                _add_usage(self._routes[route], record)
+
+            if not self._windows or self._windows[-1][0] != window_start:
+                self._windows.append((window_start, defaultdict(_empty_usage)))
+            _add_usage(self._windows[-1][1][endpoint], record)
+
+    def report(self):
+        """
+        Return the aggregated usage as a JSON-serializable dictionary.
+
+        Returns:
+            dict:
+                - "totals": The usage of each call site of each endpoint since startup.
+                - "routes": The usage, latency and cost of each model route since startup.
+                - "windows": The usage of each endpoint in each recent window, oldest first.
+        """
+
+        with self._lock:
+            totals = defaultdict(dict)
+            for (endpoint, call_site), usage in self._totals.items():
+                totals[endpoint][call_site] = _summarize(usage)
+
+            windows = [
+                {
+                    "start": start,
+                    "endpoints": {
+                        endpoint: _summarize(usage)
+                        for endpoint, usage in endpoints.items()
+                    },
+                }
+                for start, endpoints in self._windows
+            ]
+            routes = {route: _summarize(usage) for route, usage in self._routes.items()}
+
+        return {
+            "window": self.window,
+            "totals": dict(totals),
+            "routes": routes,
+            "windows": windows,
+        }
@@ -0,0 +1,47 @@
+from llm_accounting import *
+
+
+def test_cost_uses_model_prices():
+    assert get_cost("gpt-4o-mini", 1_000_000, 1_000_000) == 0.75
+    assert get_cost("unknown-model", 1000, 1000) == 0
+
+
+def test_usage_is_aggregated_per_call_site():
+    ledger = LLMUsageLedger()
+    ledger.record("get_creater_info", "credibility", "gpt-3.5-turbo", 100, 20, 1.0)
+    ledger.record(
+        "get_creater_info", "credibility", "gpt-3.5-turbo", 100, 20, 3.0, retry=True
+    )
+    ledger.record("get_creater_info", "credibility", "gpt-3.5-turbo", cached=True)
+
+    usage = ledger.report()["totals"]["get_creater_info"]["credibility"]
+    assert usage["calls"] == 3
+    assert usage["cached"] == 1
+    assert usage["retries"] == 1
+    assert usage["prompt_tokens"] == 200
+    assert usage["average_latency"] == 2.0
+
+
+def test_windows_split_usage_by_time():
+    ledger = LLMUsageLedger(window=60, windows_kept=2)
+    for now in (0, 30, 61, 125):
+        ledger.record("get_summaries", "video_summary", "gpt-3.5-turbo", 10, 5, now=now)
+
+    windows = ledger.report()["windows"]
+    assert [window["start"] for window in windows] == [60, 120]
+    assert windows[0]["endpoints"]["get_summaries"]["calls"] == 1
+
+
+def test_usage_is_aggregated_per_route():
+    ledger = LLMUsageLedger()
+    ledger.record(
+        "get_creater_info", "engagement", "gpt-4o-mini", 300, 2, 0.4, route="score"
+    )
+    ledger.record(
+        "get_creater_info", "content_quality", "gpt-4o-mini", 300, 2, 0.6, route="score"
+    )
+
+    route = ledger.report()["routes"]["score"]
+    assert route["calls"] == 2
+    assert route["average_latency"] == 0.5
+    assert route["cost"] == round(get_cost("gpt-4o-mini", 600, 4), 6)
@@ -0,0 +1,237 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Default cache settings, overridable through environment variables
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 60 * 60))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", 512))
+LLM_CACHE_DISK_BYTES = int(os.getenv("LLM_CACHE_DISK_BYTES", 64 * 1024 * 1024))
+LLM_CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLED", "") == "true"
+
+
+def get_cache_key(model, system_role, prompt, temperature, max_tokens):
+    """
+    Hash the parameters of a ChatGPT request into a cache key.
+
+    Args:
+        model (str): The OpenAI model name.
+        system_role (str): The system role of the conversation.
+        prompt (str): The user's input prompt.
+        temperature (float): The sampling temperature.
+        max_tokens (int): The maximum number of tokens in the response.
+
+    Returns:
+        str: The SHA-256 hex digest of the request parameters.
+    """
+
+    payload = json.dumps([model, system_role, prompt, temperature, max_tokens])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache of ChatGPT responses.
+
+    Responses are kept in a bounded in-memory LRU tier in front of an SQLite tier on
+    disk, so they survive restarts and are shared by every process on the host. Both
+    tiers expire entries after the TTL. The disk tier evicts the least recently used
+    entries once the stored responses exceed the byte limit.
+
+    When a shared state store is given (e.g. a networked key-value server), it
+    replaces the SQLite tier so the cache is shared across hosts; its entries
+    expire after the TTL and size limits are left to the store.
+    """
+
+    def __init__(
+        self,
+        path=LLM_CACHE_PATH,
+        ttl=LLM_CACHE_TTL,
+        memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+        disk_bytes=LLM_CACHE_DISK_BYTES,
+        store=None,
+    ):
+        self.path = path
+        self.store = store
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        """
+        Open the SQLite database on first use and create the cache table.
+
+        Returns:
+            sqlite3.Connection: The shared connection to the cache database.
+        """
+
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_accessed_at ON llm_cache (accessed_at)"
+            )
+            connection.commit()
+            self._connection = connection
+
+        return self._connection
+
+    def _remember(self, key, response, created_at):
+        """
+        Store a response in the memory tier, evicting the least recently used entry if full.
+        """
+
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): The cache key from get_cache_key.
+
+        Returns:
+            str: The cached response, or None if it is missing or expired.
+        """
+
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response, created_at = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    return response
+                del self._memory[key]
+
+            if self.store is not None:
+                stored = self.store.get(key)
+                if stored is None:
+                    return None
+                response, created_at = stored
+                self._remember(key, response, created_at)
+                return response
+
+            try:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                response, created_at = row
+                if now - created_at >= self.ttl:
+                    connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    connection.commit()
+                    return None
+
+                connection.execute(
+                    "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                connection.commit()
+            except sqlite3.Error as e:
+                print(f"Error reading LLM cache: {str(e)}")
+                return None
+
+            self._remember(key, response, created_at)
+            return response
+
+    def set(self, key, response):
+        """
+        Store a response in both cache tiers.
+
+        Args:
+            key (str): The cache key from get_cache_key.
+            response (str): The response from ChatGPT.
+
+        Returns:
+            None
+        """
+
+        now = time.time()
+        size = len(response.encode())
+        with self._lock:
+            self._remember(key, response, now)
+
+            if self.store is not None:
+                self.store.set(key, [response, now], ttl=self.ttl)
+                return
+
+            try:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                    (key, response, size, now, now),
+                )
+                self._evict(connection, now)
+                connection.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing LLM cache: {str(e)}")
+
+    def _evict(self, connection, now):
+        """
+        Delete expired entries, then the least recently used ones until under the byte limit.
+        """
+
+        connection.execute(
+            "DELETE FROM llm_cache WHERE created_at <= ?", (now - self.ttl,)
+        )
+        total_size = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()[0]
+        if total_size <= self.disk_bytes:
+            return
+
+        rows = connection.execute(
+            "SELECT key, size FROM llm_cache ORDER BY accessed_at"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total_size <= self.disk_bytes:
+                break
+            evicted.append((key,))
+            total_size -= size
+            self._memory.pop(key, None)
+        connection.executemany("DELETE FROM llm_cache WHERE key = ?", evicted)
+
+    def clear(self):
+        """
+        Remove every entry from both cache tiers. Entries in a shared state store are left to expire.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._memory.clear()
+            if self.store is not None:
+                return
+
+            try:
+                connection = self._connect()
+                connection.execute("DELETE FROM llm_cache")
+                connection.commit()
+            except sqlite3.Error as e:
+                print(f"Error clearing LLM cache: {str(e)}")
@@ -0,0 +1,40 @@
+from llm_cache import *
+
+
+def test_cache_key_depends_on_every_parameter():
+    key = get_cache_key("gpt-3.5-turbo", "role", "prompt", 0.7, 500)
+    assert key == get_cache_key("gpt-3.5-turbo", "role", "prompt", 0.7, 500)
+    assert key != get_cache_key("gpt-3.5-turbo", "role", "prompt", 0.7, 400)
+    assert key != get_cache_key("gpt-4o-mini", "role", "prompt", 0.7, 500)
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite3")
+    LLMCache(path=path).set("key", "response")
+    assert LLMCache(path=path).get("key") == "response"
+
+
+def test_expired_entries_are_missing(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "llm_cache.sqlite3"), ttl=0)
+    cache.set("key", "response")
+    assert cache.get("key") is None
+
+
+def test_size_eviction_drops_least_recently_used(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite3")
+    cache = LLMCache(path=path, memory_entries=0, disk_bytes=10)
+    cache.set("old", "12345")
+    cache.set("new", "67890")
+    cache.set("newest", "abcde")
+    assert cache.get("old") is None
+    assert cache.get("newest") == "abcde"
+
+
+def test_shared_store_replaces_disk_tier(tmp_path):
+    from state_store import MemoryStore
+
+    store = MemoryStore("llm")
+    path = str(tmp_path / "llm_cache.sqlite3")
+    LLMCache(path=path, store=store).set("key", "response")
+    assert LLMCache(path=path, memory_entries=0, store=store).get("key") == "response"
+    assert LLMCache(path=path).get("key") is None
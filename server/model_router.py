@@ -0,0 +1,114 @@
+import json
+import os
+
+# Candidate models of each task, in order of preference. A prompt goes to the first route whose
+# context window fits the prompt and the response. MODEL_ROUTES may override the routes of some
+# tasks as JSON; the other tasks keep their defaults.
+DEFAULT_MODEL_ROUTES = {
+    # Transcript and comment summaries; very long transcripts move to the large-context model
+    "summary": [
+        {
+            "name": "summary",
+            "model": "gpt-3.5-turbo",
+            "max_tokens": 500,
+            "context_limit": 16385,
+            "temperature": 0.7,
+        },
+        {
+            "name": "summary_long",
+            "model": "gpt-4o-mini",
+            "max_tokens": 500,
+            "context_limit": 128000,
+            "temperature": 0.7,
+        },
+    ],
+    # Free-text creator background and the JSON credibility analysis
+    "analysis": [
+        {
+            "name": "analysis",
+            "model": "gpt-3.5-turbo",
+            "max_tokens": 500,
+            "context_limit": 16385,
+            "temperature": 0.7,
+        },
+    ],
+    # Prompts answered with a single number, on the cheapest and fastest model
+    "score": [
+        {
+            "name": "score",
+            "model": "gpt-4o-mini",
+            "max_tokens": 16,
+            "context_limit": 128000,
+            "temperature": 0.2,
+        },
+    ],
+}
+
+
+def load_model_routes():
+    """
+    Return the routing table, with the tasks in the MODEL_ROUTES environment variable overridden.
+
+    Returns:
+        dict: The candidate routes of each task.
+    """
+
+    routes = os.getenv("MODEL_ROUTES")
+    return (
+        {**DEFAULT_MODEL_ROUTES, **json.loads(routes)}
+        if routes
+        else DEFAULT_MODEL_ROUTES
+    )
+
+
+class ModelRouter:
+    """
+    Choose the model, response limit and context limit of a ChatGPT call by task and prompt size.
+
+    The router is created with the tasks its caller uses and refuses to start if any
+    of them has no route, so a bad MODEL_ROUTES fails at startup instead of per request.
+    """
+
+    def __init__(self, routes=None, tasks=()):
+        self.routes = load_model_routes() if routes is None else routes
+        missing = [task for task in tasks if not self.routes.get(task)]
+        if missing:
+            raise ValueError(f"No model routes for tasks: {', '.join(missing)}")
+
+    def counting_model(self, task):
+        """
+        Return the model whose tokenizer counts the prompt tokens of a task.
+
+        Args:
+            task (str): The task, e.g. "summary".
+
+        Returns:
+            str: The model of the task's preferred route.
+        """
+
+        return self.routes[task][0]["model"]
+
+    def route(self, task, prompt_tokens):
+        """
+        Choose the route of a prompt.
+
+        Args:
+            task (str): The task, e.g. "summary".
+            prompt_tokens (int): The tokens of the system role and prompt.
+
+        Returns:
+            dict: The first route of the task whose context fits the prompt and its response, or None
+                if the prompt is too long for every route.
+
+        Raises:
+            KeyError: If the task has no routes.
+
+        Examples:
+            >>> ModelRouter().route("summary", 20000)["name"]
+            'summary_long'
+        """
+
+        for route in self.routes[task]:
+            if prompt_tokens + route["max_tokens"] <= route["context_limit"]:
+                return route
+        return None
@@ -0,0 +1,33 @@
+import pytest
+from model_router import *
+
+
+def test_prompts_go_to_the_first_route_that_fits():
+    router = ModelRouter(DEFAULT_MODEL_ROUTES)
+    assert router.route("summary", 1000)["model"] == "gpt-3.5-turbo"
+    assert router.route("summary", 16000)["name"] == "summary_long"
+    assert router.route("summary", 200000) is None
+
+
+def test_scores_use_the_cheap_route():
+    route = ModelRouter(DEFAULT_MODEL_ROUTES).route("score", 300)
+    assert route["model"] == "gpt-4o-mini"
+    assert route["max_tokens"] < 50
+
+
+def test_routes_can_be_overridden(monkeypatch):
+    monkeypatch.setenv(
+        "MODEL_ROUTES",
+        '{"score": [{"name": "s", "model": "m", "max_tokens": 1, "context_limit": 10, "temperature": 0}]}',
+    )
+    router = ModelRouter(tasks=DEFAULT_MODEL_ROUTES)
+    assert router.counting_model("score") == "m"
+    assert router.route("summary", 10)["name"] == "summary"
+
+
+def test_tasks_without_routes_are_rejected():
+    with pytest.raises(ValueError, match="analysis"):
+        ModelRouter(
+            {"summary": DEFAULT_MODEL_ROUTES["summary"], "analysis": []},
+            tasks=["analysis"],
+        )
@@ -0,0 +1,323 @@
+from contextlib import contextmanager
+import heapq
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+import time
+from cancellation import NEVER_CANCELLED
+
+# Most ffmpeg merges running at once, one per core so concurrent downloads do not thrash the CPU
+MUX_SLOTS = int(os.getenv("MUX_SLOTS", os.cpu_count() or 1))
+
+# Priorities of merges, lower first: a user waiting on one download before bulk archives
+MUX_PRIORITY_INTERACTIVE = 0
+MUX_PRIORITY_BULK = 1
+
+# Seconds between checks for cancellation while a merge waits for a slot
+MUX_POLL_INTERVAL = 0.25
+
+# Free space that must remain in the downloads directory after every reservation
+DISK_HEADROOM = int(os.getenv("DISK_HEADROOM_MB", 512)) * 1024 * 1024
+
+# Temporary files of a download: the separate streams before the merge, and yt-dlp's partial files
+ORPHAN_SUFFIXES = ("_video.mp4", "_audio.m4a", ".part", ".ytdl")
+
+# Prefix of the private directory each download writes its files to
+SCRATCH_PREFIX = "job-"
+
+# Age after which a temporary file no running download owns is deleted, and seconds between sweeps
+ORPHAN_MAX_AGE = 60 * 60
+ORPHAN_SWEEP_INTERVAL = 10 * 60
+
+
+class InsufficientDiskSpace(Exception):
+    """
+    Raised when a download would leave less free space than the headroom.
+    """
+
+
+class MuxScheduler:
+    """
+    Cap on the ffmpeg merges running at once, with a priority queue.
+
+    Merges wait for a free slot in priority order, and in arrival order within a
+    priority, so a single interactive download is not stuck behind a bulk archive
+    while the number of ffmpeg processes never exceeds the number of cores.
+    """
+
+    def __init__(self, slots=MUX_SLOTS, poll_interval=MUX_POLL_INTERVAL):
+        self.slots = slots
+        self.poll_interval = poll_interval
+        self.running = 0
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, priority=MUX_PRIORITY_INTERACTIVE, cancellation=NEVER_CANCELLED):
+        """
+        Wait for a free slot.
+
+        Args:
+            priority (int, optional): The priority of the merge; lower runs first.
+            cancellation (CancellationToken, optional): Stops waiting when cancelled.
+
+        Returns:
+            None
+
+        Raises:
+            RequestCancelled: If the token is cancelled while waiting.
+        """
+
+        ticket = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while self.running >= self.slots or self._queue[0] != ticket:
+                    self._condition.wait(self.poll_interval)
+                    cancellation.check()
+            except BaseException:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+                raise
+            heapq.heappop(self._queue)
+            self.running += 1
+
+    def release(self):
+        """
+        Free the slot of a finished merge.
+
+        Returns:
+            None
+        """
+
+        with self._condition:
+            self.running -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, priority=MUX_PRIORITY_INTERACTIVE, cancellation=NEVER_CANCELLED):
+        """
+        Hold a slot for the duration of a merge.
+
+        Args:
+            priority (int, optional): The priority of the merge; lower runs first.
+            cancellation (CancellationToken, optional): Stops waiting when cancelled.
+
+        Yields:
+            None
+        """
+
+        self.acquire(priority, cancellation)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def metrics(self):
+        """
+        Return the number of running and waiting merges.
+
+        Returns:
+            dict: The "slots", "running" and "queued" merges.
+        """
+
+        with self._condition:
+            return {
+                "slots": self.slots,
+                "running": self.running,
+                "queued": len(self._queue),
+            }
+
+
+class DiskGuard:
+    """
+    Disk space reservations and cleanup of the downloads directory.
+
+    A download reserves the estimated size of its files before it starts and is
+    refused if the free space minus every outstanding reservation would drop below
+    the headroom. Space already written by running downloads is counted both as
+    used and as reserved, which errs on the side of refusing. Each download writes to
+    its own scratch directory, so concurrent downloads of the same video never share a
+    path. The sweeper deletes temporary files and scratch directories left behind by
+    crashed requests, skipping those of running downloads.
+    """
+
+    def __init__(
+        self,
+        directory,
+        headroom=DISK_HEADROOM,
+        disk_usage=shutil.disk_usage,
+    ):
+        self.directory = directory
+        self.headroom = headroom
+        self.disk_usage = disk_usage
+        self._reservations = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+    def make_scratch_dir(self):
+        """
+        Create a private directory for the files of one download.
+
+        Returns:
+            str: The path of the new directory inside the downloads directory.
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+        return tempfile.mkdtemp(prefix=SCRATCH_PREFIX, dir=self.directory)
+
+    def reserve(self, size, paths=()):
+        """
+        Reserve space for a download.
+
+        Args:
+            size (int): The bytes the download will write.
+            paths (iterable, optional): The files the download writes, protected from the sweeper.
+
+        Returns:
+            int: The ID of the reservation, to pass to release.
+
+        Raises:
+            InsufficientDiskSpace: If the reservation would leave less than the headroom free.
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            reserved = sum(
+                reservation[0] for reservation in self._reservations.values()
+            )
+            free = self.disk_usage(self.directory).free - reserved
+            if free - size < self.headroom:
+                raise InsufficientDiskSpace(
+                    f"{size} bytes needed, {max(0, free - self.headroom)} bytes available"
+                )
+            reservation_id = next(self._sequence)
+            self._reservations[reservation_id] = (size, frozenset(paths))
+            return reservation_id
+
+    def release(self, reservation_id):
+        """
+        Release a reservation once its download finished or failed.
+
+        Args:
+            reservation_id (int): The ID returned by reserve.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._reservations.pop(reservation_id, None)
+
+    @contextmanager
+    def reservation(self, size, paths=()):
+        """
+        Hold a reservation for the duration of a download.
+
+        Args:
+            size (int): The bytes the download will write.
+            paths (iterable, optional): The files the download writes.
+
+        Yields:
+            int: The ID of the reservation.
+        """
+
+        reservation_id = self.reserve(size, paths)
+        try:
+            yield reservation_id
+        finally:
+            self.release(reservation_id)
+
+    def sweep(self, max_age=ORPHAN_MAX_AGE, now=None):
+        """
+        Delete orphaned temporary files.
+
+        Args:
+            max_age (float, optional): The seconds since a file was last written before it is orphaned.
+            now (float, optional): The current time. Defaults to time.time().
+
+        Returns:
+            list: The paths of the deleted files.
+        """
+
+        now = time.time() if now is None else now
+        with self._lock:
+            owned = set().union(*(paths for _, paths in self._reservations.values()))
+
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        removed = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if name.startswith(SCRATCH_PREFIX) and os.path.isdir(path):
+                if path not in owned and self._sweep_scratch_dir(path, max_age, now):
+                    removed.append(path)
+                continue
+            if not name.endswith(ORPHAN_SUFFIXES):
+                continue
+            # yt-dlp writes its partial files next to the path the download owns
+            if path.removesuffix(".part").removesuffix(".ytdl") in owned:
+                continue
+            try:
+                if now - os.path.getmtime(path) < max_age:
+                    continue
+                os.remove(path)
+                removed.append(path)
+            except OSError as e:
+                print(f"Error sweeping {path}: {str(e)}")
+        return removed
+
+    def _sweep_scratch_dir(self, path, max_age, now):
+        """
+        Delete a scratch directory once nothing in it was written for max_age seconds.
+        """
+
+        try:
+            newest = max(
+                [os.path.getmtime(path)]
+                + [os.path.getmtime(entry.path) for entry in os.scandir(path)]
+            )
+            if now - newest < max_age:
+                return False
+            shutil.rmtree(path)
+            return True
+        except OSError as e:
+            print(f"Error sweeping {path}: {str(e)}")
+            return False
+
+    def start_sweeper(self, interval=ORPHAN_SWEEP_INTERVAL, max_age=ORPHAN_MAX_AGE):
+        """
+        Sweep orphaned files now and then periodically on a daemon thread.
+
+        Args:
+            interval (float, optional): Seconds between sweeps.
+            max_age (float, optional): The seconds since a file was last written before it is orphaned.
+
+        Returns:
+            None
+        """
+
+        if self._sweeper is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    removed = self.sweep(max_age)
+                    if removed:
+                        print(f"Swept {len(removed)} orphaned download files")
+                except Exception as e:
+                    print(f"Error sweeping downloads: {str(e)}")
+                time.sleep(interval)
+
+        self._sweeper = threading.Thread(
+            target=run, name="download-sweeper", daemon=True
+        )
+        self._sweeper.start()
@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from cancellation import CancellationToken, RequestCancelled
+from mux_scheduler import *
+
+
+def test_slots_go_to_the_highest_priority_first():
+    scheduler = MuxScheduler(slots=1, poll_interval=0.01)
+    scheduler.acquire()
+    order = []
+
+    def merge(name, priority):
+        with scheduler.slot(priority):
+            order.append(name)
+
+    bulk = threading.Thread(target=merge, args=("bulk", MUX_PRIORITY_BULK))
+    bulk.start()
+    while scheduler.metrics()["queued"] < 1:
+        pass
+    interactive = threading.Thread(
+        target=merge, args=("interactive", MUX_PRIORITY_INTERACTIVE)
+    )
+    interactive.start()
+    while scheduler.metrics()["queued"] < 2:
+        pass
+
+    scheduler.release()
+    bulk.join(5)
+    interactive.join(5)
+    assert order == ["interactive", "bulk"]
+    assert scheduler.metrics() == {"slots": 1, "running": 0, "queued": 0}
+
+
+def test_cancelled_merge_leaves_the_queue():
+    scheduler = MuxScheduler(slots=1, poll_interval=0.01)
+    scheduler.acquire()
+    token = CancellationToken(timeout=0.05)
+    with pytest.raises(RequestCancelled):
+        scheduler.acquire(cancellation=token)
+    assert scheduler.metrics()["queued"] == 0
+
+
+def test_reservations_keep_headroom(tmp_path):
+    guard = DiskGuard(
+        str(tmp_path), headroom=100, disk_usage=lambda path: SimpleNamespace(free=1000)
+    )
+    first = guard.reserve(600)
+    with pytest.raises(InsufficientDiskSpace):
+        guard.reserve(400)
+    guard.release(first)
+    with guard.reservation(900):
+        pass
+    guard.reserve(900)
+
+
+def test_sweep_removes_only_old_unowned_temporary_files(tmp_path):
+    guard = DiskGuard(
+        str(tmp_path), disk_usage=lambda path: SimpleNamespace(free=10**12)
+    )
+    names = [
+        "a_video.mp4",
+        "a_audio.m4a.part",
+        "b_video.mp4",
+        "b [720p].mp4",
+        "c_audio.m4a",
+    ]
+    for name in names:
+        (tmp_path / name).write_bytes(b"x")
+    os.utime(tmp_path / "c_audio.m4a", (1000, 1000))
+    guard.reserve(0, paths=[str(tmp_path / "b_video.mp4")])
+
+    removed = guard.sweep(
+        max_age=60, now=os.path.getmtime(tmp_path / "a_video.mp4") + 120
+    )
+    assert sorted(os.path.basename(path) for path in removed) == [
+        "a_audio.m4a.part",
+        "a_video.mp4",
+        "c_audio.m4a",
+    ]
+    assert guard.sweep(max_age=60) == []
+    assert sorted(os.listdir(tmp_path)) == ["b [720p].mp4", "b_video.mp4"]
+
+
+def test_sweep_removes_old_unowned_scratch_dirs(tmp_path):
+    guard = DiskGuard(
+        str(tmp_path), disk_usage=lambda path: SimpleNamespace(free=10**12)
+    )
+    orphaned, running = guard.make_scratch_dir(), guard.make_scratch_dir()
+    for directory in (orphaned, running):
+        open(os.path.join(directory, "abc_video.mp4"), "wb").close()
+    assert orphaned != running
+    guard.reserve(0, paths=[running])
+
+    removed = guard.sweep(max_age=60, now=time.time() + 120)
+    assert removed == [orphaned]
+    assert os.listdir(tmp_path) == [os.path.basename(running)]
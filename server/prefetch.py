@@ -0,0 +1,146 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+
+# Background workers warming caches; kept small so prefetching never crowds out requests
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", 2))
+
+# Prefetches allowed to wait for a worker before new ones are dropped
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", 16))
+
+# Niceness added to prefetch threads so the OS schedules request threads first
+PREFETCH_NICENESS = 10
+
+
+def lower_thread_priority():
+    """
+    Lower the scheduling priority of the current thread where the OS supports it.
+
+    On Linux each thread has its own niceness, so this only affects the prefetch workers.
+
+    Returns:
+        None
+    """
+
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PREFETCH_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+class Prefetcher:
+    """
+    Low-priority, bounded background pool that warms caches ahead of requests.
+
+    Each prefetch is a list of steps run in order for a key (e.g. a video ID). A key
+    that is already pending is not queued twice, prefetches beyond the pending limit
+    are dropped, and a prefetch can be cancelled: a queued one never starts and a
+    running one stops before its next step. Steps are also skipped while should_run
+    reports that the server is busy with foreground requests.
+    """
+
+    def __init__(
+        self,
+        workers=PREFETCH_WORKERS,
+        max_pending=PREFETCH_MAX_PENDING,
+        should_run=None,
+    ):
+        self.max_pending = max_pending
+        self.should_run = should_run or (lambda: True)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="prefetch",
+            initializer=lower_thread_priority,
+        )
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, steps):
+        """
+        Queue a prefetch for a key.
+
+        Args:
+            key (hashable): The key of the prefetch, e.g. a video ID.
+            steps (list): Callables taking no arguments, run in order.
+
+        Returns:
+            bool: True if the prefetch was queued, False if it was already pending or the queue is full.
+        """
+
+        with self._lock:
+            if key in self._pending or len(self._pending) >= self.max_pending:
+                return False
+
+            cancelled = threading.Event()
+            future = self._executor.submit(self._run, key, steps, cancelled)
+            self._pending[key] = (future, cancelled)
+            return True
+
+    def cancel(self, key):
+        """
+        Cancel the prefetch of a key.
+
+        Args:
+            key (hashable): The key of the prefetch.
+
+        Returns:
+            bool: True if a pending prefetch was cancelled.
+        """
+
+        with self._lock:
+            entry = self._pending.pop(key, None)
+
+        if entry is None:
+            return False
+
+        future, cancelled = entry
+        cancelled.set()
+        future.cancel()
+        return True
+
+    def pending(self):
+        """
+        Return the number of prefetches queued or running.
+
+        Returns:
+            int: The number of pending prefetches.
+        """
+
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self, key, steps, cancelled):
+        """
+        Run the steps of a prefetch until they finish or the prefetch is cancelled.
+        """
+
+        try:
+            for step in steps:
+                if cancelled.is_set() or not self.should_run():
+                    break
+                try:
+                    step()
+                except Exception as e:
+                    print(f"Prefetch step failed for {key}: {str(e)}")
+        finally:
+            with self._lock:
+                entry = self._pending.get(key)
+                if entry is not None and entry[1] is cancelled:
+                    del self._pending[key]
+
+    def shutdown(self):
+        """
+        Cancel queued prefetches and stop the workers.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            entries = list(self._pending.values())
+            self._pending.clear()
+
+        for future, cancelled in entries:
+            cancelled.set()
+            future.cancel()
+        self._executor.shutdown(wait=False)
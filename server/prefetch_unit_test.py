@@ -0,0 +1,48 @@
+import threading
+from prefetch import *
+
+
+def test_prefetch_runs_steps_and_dedupes_keys():
+    release = threading.Event()
+    ran = []
+    prefetcher = Prefetcher(workers=1)
+
+    assert prefetcher.submit("dQw4w9WgXcQ", [release.wait, lambda: ran.append("ok")])
+    future = prefetcher._pending["dQw4w9WgXcQ"][0]
+    assert not prefetcher.submit("dQw4w9WgXcQ", [lambda: ran.append("again")])
+    release.set()
+    future.result()
+
+    assert ran == ["ok"]
+    assert prefetcher.pending() == 0
+    prefetcher.shutdown()
+
+
+def test_cancelled_prefetch_stops_before_next_step():
+    started, release = threading.Event(), threading.Event()
+    ran = []
+    prefetcher = Prefetcher(workers=1)
+
+    def first_step():
+        started.set()
+        release.wait()
+
+    prefetcher.submit("abc123XYZ00", [first_step, lambda: ran.append("comments")])
+    future = prefetcher._pending["abc123XYZ00"][0]
+    started.wait()
+    assert prefetcher.cancel("abc123XYZ00")
+    release.set()
+    future.result()
+
+    assert ran == []
+    prefetcher.shutdown()
+
+
+def test_prefetch_skips_steps_when_busy():
+    ran = []
+    prefetcher = Prefetcher(workers=1, should_run=lambda: False)
+    prefetcher.submit("abc123XYZ00", [lambda: ran.append("transcript")])
+    prefetcher._pending["abc123XYZ00"][0].result()
+
+    assert ran == []
+    prefetcher.shutdown()
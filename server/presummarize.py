@@ -0,0 +1,227 @@
+import os
+import re
+import numpy as np
+
+# Transcripts longer than this many tokens are shrunk before the summary prompt; 0 disables shrinking
+PRESUMMARY_TOKEN_BUDGET = int(os.getenv("PRESUMMARY_TOKEN_BUDGET", 3000))
+
+# Longest transcript, in words, that is pre-summarized; longer ones are rejected outright
+PRESUMMARY_MAX_WORDS = int(os.getenv("PRESUMMARY_MAX_WORDS", 150000))
+
+# Words per span when captions carry no sentence punctuation (auto-generated captions)
+SPAN_WORDS = 30
+
+# Most spans ranked at once; adjacent spans are merged above it so the similarity matrix stays small
+MAX_SPANS = 1000
+
+# Damping factor and iterations of the TextRank power iteration
+DAMPING = 0.85
+TEXTRANK_ITERATIONS = 30
+
+# Filler words that carry no information about the topic of a span
+STOPWORDS = frozenset(
+    """
+    a about all also an and any are as at be because been but by can could did do does
+    doing don't just for from get got gonna had has have he her here him his how i i'm if
+    in into is it it's its know let's like me more my not now of oh okay on one or our out
+    really right she so some that that's the their them then there these they this to too
+    uh um up us very was we we're well what when which who will with would yeah you you're
+    your
+    """.split()
+)
+
+
+class TranscriptTooLong(ValueError):
+    """
+    Raised when a transcript is too long to pre-summarize.
+    """
+
+
+_SENTENCE_END = re.compile(r"[.!?][\"')\]]?$")
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def estimate_tokens(text):
+    """
+    Estimate the tokens of a text without a tokenizer, at about 4 tokens per 3 words.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The estimated token count.
+    """
+
+    return (len(text.split()) * 4 + 2) // 3
+
+
+def split_spans(texts, span_words=SPAN_WORDS):
+    """
+    Group caption texts into spans of about a sentence each.
+
+    A span ends at sentence punctuation, or once it reaches span_words words when the
+    captions are unpunctuated.
+
+    Args:
+        texts (list): The caption texts in order.
+        span_words (int, optional): The maximum words of an unpunctuated span.
+
+    Returns:
+        list: The spans as strings, in order.
+    """
+
+    spans, words = [], []
+    for text in texts:
+        for word in text.split():
+            words.append(word)
+            if _SENTENCE_END.search(word) or len(words) >= span_words:
+                spans.append(" ".join(words))
+                words = []
+    if words:
+        spans.append(" ".join(words))
+    return spans
+
+
+def merge_spans(spans, max_spans=MAX_SPANS):
+    """
+    Merge runs of adjacent spans so there are at most max_spans of them.
+
+    Args:
+        spans (list): The spans as strings, in order.
+        max_spans (int, optional): The most spans to return.
+
+    Returns:
+        list: The spans, merged in order into groups of equal count if there were too many.
+
+    Examples:
+        >>> merge_spans(["a.", "b.", "c."], max_spans=2)
+        ['a. b.', 'c.']
+    """
+
+    if len(spans) <= max_spans:
+        return spans
+    group = -(-len(spans) // max_spans)
+    return [" ".join(spans[i : i + group]) for i in range(0, len(spans), group)]
+
+
+def tfidf_matrix(spans):
+    """
+    Build the L2-normalized TF-IDF matrix of spans, restricted to words shared by several spans.
+
+    The weights are computed from the sparse (span, word) counts. Words that occur in a
+    single span count towards its norm but cannot make two spans similar, so they are
+    left out of the dense matrix, which keeps it far smaller than spans x vocabulary.
+
+    Args:
+        spans (list): The spans as strings.
+
+    Returns:
+        np.ndarray: A float32 (spans x shared words) matrix; rows of spans without shared words are zero.
+    """
+
+    n = len(spans)
+    tokenized = [
+        [word for word in _WORD.findall(span.lower()) if word not in STOPWORDS]
+        for span in spans
+    ]
+    words = [word for tokens in tokenized for word in tokens]
+    if not words:
+        return np.zeros((n, 0), dtype=np.float32)
+
+    vocabulary, word_ids = np.unique(np.array(words), return_inverse=True)
+    span_ids = np.repeat(np.arange(n), [len(tokens) for tokens in tokenized])
+
+    # Count each (span, word) pair once, as sparse entries
+    pairs, counts = np.unique(span_ids * len(vocabulary) + word_ids, return_counts=True)
+    pair_spans, pair_words = np.divmod(pairs, len(vocabulary))
+
+    document_frequency = np.bincount(pair_words, minlength=len(vocabulary))
+    idf = np.log((1 + n) / (1 + document_frequency)) + 1
+    weights = counts * idf[pair_words]
+    norms = np.sqrt(np.bincount(pair_spans, weights=weights**2, minlength=n))
+
+    shared = document_frequency > 1
+    columns = np.cumsum(shared) - 1
+    keep = shared[pair_words]
+    matrix = np.zeros((n, int(shared.sum())), dtype=np.float32)
+    matrix[pair_spans[keep], columns[pair_words[keep]]] = (
+        weights[keep] / norms[pair_spans[keep]]
+    )
+    return matrix
+
+
+def textrank_scores(matrix, damping=DAMPING, iterations=TEXTRANK_ITERATIONS):
+    """
+    Rank spans by TextRank over the cosine similarity of their TF-IDF vectors.
+
+    Args:
+        matrix (np.ndarray): The normalized TF-IDF matrix from tfidf_matrix, at most MAX_SPANS rows.
+        damping (float, optional): The PageRank damping factor.
+        iterations (int, optional): The power iterations to run.
+
+    Returns:
+        np.ndarray: The score of every span; higher is more central to the transcript.
+    """
+
+    n = matrix.shape[0]
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0)
+
+    # Spans similar to nothing spread their rank evenly instead of dropping it
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(
+        similarity, row_sums, out=np.full_like(similarity, 1 / n), where=row_sums > 0
+    )
+
+    scores = np.full(n, 1 / n)
+    for _ in range(iterations):
+        scores = (1 - damping) / n + damping * (transition.T @ scores)
+    return scores
+
+
+def presummarize(
+    texts,
+    token_budget=PRESUMMARY_TOKEN_BUDGET,
+    count_tokens=estimate_tokens,
+    max_words=PRESUMMARY_MAX_WORDS,
+):
+    """
+    Shrink a transcript to its most informative spans within a token budget.
+
+    Spans are ranked with TextRank over TF-IDF vectors, the best ones are taken until
+    the budget is spent, and they are returned in their original order. A transcript
+    already within the budget is returned whole. Long transcripts are ranked in at
+    most MAX_SPANS merged spans, and ones over max_words are refused.
+
+    Args:
+        texts (list): The caption texts in order.
+        token_budget (int, optional): The maximum tokens of the result. 0 disables shrinking.
+        count_tokens (callable, optional): Counts the tokens of a string. Defaults to estimate_tokens.
+        max_words (int, optional): The longest transcript accepted, in words.
+
+    Returns:
+        str: The transcript, or the selected spans joined in order.
+
+    Raises:
+        TranscriptTooLong: If the transcript has more than max_words words.
+    """
+
+    transcript = " ".join(texts)
+    word_count = len(transcript.split())
+    if word_count > max_words:
+        raise TranscriptTooLong(f"{word_count} words, at most {max_words} accepted")
+    if token_budget <= 0 or count_tokens(transcript) <= token_budget:
+        return transcript
+
+    spans = merge_spans(split_spans(texts))
+    scores = textrank_scores(tfidf_matrix(spans))
+
+    selected, used = [], 0
+    for index in np.argsort(-scores, kind="stable"):
+        tokens = count_tokens(spans[index])
+        if used + tokens > token_budget:
+            continue
+        selected.append(index)
+        used += tokens
+
+    return " ".join(spans[index] for index in sorted(selected))
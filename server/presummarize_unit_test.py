@@ -0,0 +1,56 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+from presummarize import *
+
+
+topic = [
+    "Photosynthesis converts sunlight into chemical energy in plant leaves.",
+    "Chlorophyll in the leaves absorbs sunlight for photosynthesis.",
+    "The chemical energy from photosynthesis is stored as glucose in plants.",
+]
+filler = [
+    "Um so yeah don't forget to like and subscribe.",
+    "Okay let's see here.",
+]
+
+
+def test_short_transcripts_are_returned_whole():
+    assert presummarize(["hello there", "general kenobi"], token_budget=100) == (
+        "hello there general kenobi"
+    )
+
+
+def test_spans_split_at_punctuation_or_length():
+    assert split_spans(["one two.", "three four five"], span_words=2) == [
+        "one two.",
+        "three four",
+        "five",
+    ]
+
+
+def test_central_spans_are_kept_in_order_within_budget():
+    texts = filler[:1] + topic + filler[1:]
+    budget = sum(estimate_tokens(span) for span in topic)
+    summary = presummarize(texts, token_budget=budget)
+    assert summary == " ".join(topic)
+
+
+def test_textrank_prefers_spans_similar_to_many_others():
+    scores = textrank_scores(tfidf_matrix(topic + filler))
+    assert scores[:3].min() > scores[3:].max()
+
+
+def test_long_transcripts_are_merged_or_rejected():
+    spans = [f"span {i}." for i in range(2500)]
+    merged = merge_spans(spans, max_spans=1000)
+    assert len(merged) <= 1000
+    assert " ".join(merged) == " ".join(spans)
+    with pytest.raises(TranscriptTooLong):
+        presummarize(["word"] * 11, token_budget=1, max_words=10)
+
+
+def test_words_of_a_single_span_are_left_out_of_the_matrix():
+    matrix = tfidf_matrix(["solar panels", "solar power", "banana"])
+    assert matrix.shape == (3, 1)
+    assert not matrix[2].any()
@@ -0,0 +1,226 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import random
+import threading
+import time
+
+# Age after which a profile is refreshed in the background, and after which it is dropped entirely
+PROFILE_SOFT_TTL = float(os.getenv("PROFILE_SOFT_TTL", 6 * 60 * 60))
+PROFILE_HARD_TTL = float(os.getenv("PROFILE_HARD_TTL", 7 * 24 * 60 * 60))
+
+# Fraction by which each soft TTL is randomly shortened or extended so refreshes spread out
+PROFILE_TTL_JITTER = 0.2
+
+# Concurrent background refreshes, and seconds between scheduler rounds
+PROFILE_REFRESH_WORKERS = int(os.getenv("PROFILE_REFRESH_WORKERS", 2))
+PROFILE_REFRESH_TICK = 5
+
+# Seconds before a failed refresh is retried
+PROFILE_RETRY_DELAY = 5 * 60
+
+# Profiles not requested for this long are no longer refreshed
+PROFILE_IDLE_SECONDS = 24 * 60 * 60
+
+
+class ProfileStore:
+    """
+    Stale-while-revalidate store of computed profiles, e.g. creator analyses.
+
+    A stored profile is returned immediately, even when it is older than its soft
+    TTL; only a profile that was never computed (or outlived the hard TTL) is
+    computed on the request path. A scheduler thread refreshes stale profiles on a
+    bounded pool, the most requested first, and stops refreshing profiles nobody
+    has asked for in a while, so compute scales with the number of active profiles
+    rather than the number of requests. Soft TTLs are jittered so profiles computed
+    together are not all refreshed together.
+    """
+
+    def __init__(
+        self,
+        store,
+        compute,
+        soft_ttl=PROFILE_SOFT_TTL,
+        jitter=PROFILE_TTL_JITTER,
+        workers=PROFILE_REFRESH_WORKERS,
+        retry_delay=PROFILE_RETRY_DELAY,
+        idle_seconds=PROFILE_IDLE_SECONDS,
+    ):
+        self.store = store
+        self.compute = compute
+        self.soft_ttl = soft_ttl
+        self.jitter = jitter
+        self.workers = workers
+        self.retry_delay = retry_delay
+        self.idle_seconds = idle_seconds
+        self._known = {}
+        self._refreshing = set()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="profile-refresh"
+        )
+        self._lock = threading.Lock()
+        self._scheduler = None
+
+    def _stale_at(self, now):
+        """
+        Return when a profile computed now becomes stale, with jitter.
+        """
+
+        return now + self.soft_ttl * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _save(self, key, body, now):
+        """
+        Store a freshly computed profile.
+        """
+
+        stale_at = self._stale_at(now)
+        self.store.set(key, {"body": body, "refreshed_at": now, "stale_at": stale_at})
+        with self._lock:
+            known = self._known.get(key)
+            if known is not None:
+                known["stale_at"] = stale_at
+                known["hits"] = 0
+
+    def get(self, key, *args):
+        """
+        Return the profile of a key, computing it only if none is stored.
+
+        Args:
+            key (str): The key of the profile, e.g. a channel ID.
+            *args: Passed to compute after the key, on a miss and on every refresh.
+
+        Returns:
+            tuple:
+                - dict: The profile, or an error message.
+                - int: The HTTP status code of the profile. Only 200 profiles are stored.
+        """
+
+        now = time.time()
+        entry = self.store.get(key)
+
+        with self._lock:
+            known = self._known.setdefault(
+                key, {"args": args, "hits": 0, "stale_at": None}
+            )
+            known["hits"] += 1
+            known["requested_at"] = now
+            if entry is not None:
+                known["stale_at"] = entry["stale_at"]
+
+        if entry is not None:
+            return entry["body"], 200
+
+        body, status = self.compute(key, *args)
+        if status == 200:
+            self._save(key, body, now)
+        return body, status
+
+    def due(self, now=None):
+        """
+        Return the keys of stale profiles that should be refreshed, most requested first.
+
+        Profiles idle for longer than idle_seconds are forgotten instead.
+
+        Args:
+            now (float, optional): The current time. Defaults to time.time().
+
+        Returns:
+            list: The keys to refresh.
+        """
+
+        now = time.time() if now is None else now
+        with self._lock:
+            for key in [
+                key
+                for key, known in self._known.items()
+                if now - known["requested_at"] > self.idle_seconds
+            ]:
+                del self._known[key]
+
+            due = [
+                (known["hits"], key)
+                for key, known in self._known.items()
+                if known["stale_at"] is not None
+                and known["stale_at"] <= now
+                and key not in self._refreshing
+            ]
+
+        return [key for _, key in sorted(due, key=lambda item: -item[0])]
+
+    def _refresh(self, key, args):
+        """
+        Recompute a profile, keeping the stale one and retrying later if it fails.
+        """
+
+        try:
+            now = time.time()
+            try:
+                body, status = self.compute(key, *args)
+            except Exception as e:
+                print(f"Error refreshing profile {key}: {str(e)}")
+                status = None
+
+            if status == 200:
+                self._save(key, body, now)
+            else:
+                with self._lock:
+                    known = self._known.get(key)
+                    if known is not None:
+                        known["stale_at"] = now + self.retry_delay
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def run_pending(self, now=None):
+        """
+        Start refreshing the most requested stale profiles on the free workers.
+
+        Args:
+            now (float, optional): The current time. Defaults to time.time().
+
+        Returns:
+            list: The keys whose refresh was started.
+        """
+
+        with self._lock:
+            free = self.workers - len(self._refreshing)
+        if free <= 0:
+            return []
+
+        started = []
+        for key in self.due(now)[:free]:
+            with self._lock:
+                known = self._known.get(key)
+                if known is None:
+                    continue
+                self._refreshing.add(key)
+                args = known["args"]
+            self._executor.submit(self._refresh, key, args)
+            started.append(key)
+        return started
+
+    def start(self, tick=PROFILE_REFRESH_TICK):
+        """
+        Run the refresh scheduler on a daemon thread.
+
+        Args:
+            tick (float, optional): Seconds between scheduler rounds, jittered by up to half.
+
+        Returns:
+            None
+        """
+
+        if self._scheduler is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(tick * random.uniform(0.5, 1.5))
+                try:
+                    self.run_pending()
+                except Exception as e:
+                    print(f"Error scheduling profile refreshes: {str(e)}")
+
+        self._scheduler = threading.Thread(
+            target=run, name="profile-scheduler", daemon=True
+        )
+        self._scheduler.start()
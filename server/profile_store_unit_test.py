@@ -0,0 +1,53 @@
+import time
+from profile_store import *
+from state_store import MemoryStore
+
+
+def make_profiles(compute, **kwargs):
+    return ProfileStore(MemoryStore("profiles"), compute, jitter=0, **kwargs)
+
+
+def test_profile_is_computed_once_then_served_from_store():
+    calls = []
+    profiles = make_profiles(lambda key, url: calls.append(url) or ({"url": url}, 200))
+    assert profiles.get("@a", "url-a") == ({"url": "url-a"}, 200)
+    assert profiles.get("@a", "url-a") == ({"url": "url-a"}, 200)
+    assert calls == ["url-a"]
+
+
+def test_errors_are_not_stored():
+    calls = []
+    profiles = make_profiles(
+        lambda key: calls.append(key) or ({"error": "Channel not found!"}, 400)
+    )
+    profiles.get("@a")
+    profiles.get("@a")
+    assert calls == ["@a", "@a"]
+
+
+def test_stale_profiles_are_refreshed_most_requested_first():
+    profiles = make_profiles(lambda key: ({"key": key}, 200), soft_ttl=60)
+    profiles.get("@rare")
+    for _ in range(3):
+        profiles.get("@popular")
+
+    assert profiles.due() == []
+    assert profiles.due(time.time() + 61) == ["@popular", "@rare"]
+
+
+def test_refresh_replaces_stale_profile_in_background():
+    version = [1]
+    profiles = make_profiles(lambda key: ({"version": version[0]}, 200), soft_ttl=60)
+    profiles.get("@a")
+    version[0] = 2
+
+    assert profiles.run_pending(time.time() + 61) == ["@a"]
+    profiles._executor.shutdown(wait=True)
+    assert profiles.get("@a") == ({"version": 2}, 200)
+    assert profiles.due() == []
+
+
+def test_idle_profiles_are_forgotten():
+    profiles = make_profiles(lambda key: ({}, 200), soft_ttl=60, idle_seconds=120)
+    profiles.get("@a")
+    assert profiles.due(time.time() + 121) == []
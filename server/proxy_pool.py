@@ -0,0 +1,302 @@
+import os
+import random
+import threading
+import time
+
+# Smoothing factor of each proxy's exponentially weighted latency average
+LATENCY_SMOOTHING = 0.2
+
+# Latency assumed for a proxy before it has served any request
+INITIAL_LATENCY = 1.0
+
+# Consecutive failures after which a proxy is ejected, and for how long
+EJECT_AFTER_FAILURES = 3
+EJECT_SECONDS = 2 * 60
+
+# Seconds between active health checks of every proxy
+HEALTH_CHECK_INTERVAL = 60
+
+# Sentinel telling call() to pick the proxy itself, since None means a direct connection
+_SELECT = object()
+
+
+def get_proxy_urls():
+    """
+    Read the proxy endpoints from the environment.
+
+    PROXY_POOL holds a comma-separated list of proxy URLs. When it is unset, the single
+    ROTATING_RESIDENTIAL_PROXY is used. In development, scraping goes direct.
+
+    Returns:
+        list: The proxy URLs, empty to connect directly.
+    """
+
+    if os.getenv("ENV", "") == "development":
+        return []
+
+    urls = os.getenv("PROXY_POOL", "") or os.getenv("ROTATING_RESIDENTIAL_PROXY", "")
+    return [url.strip() for url in urls.split(",") if url.strip()]
+
+
+class ProxyEndpoint:
+    """
+    A proxy exit with its latency average, failure streak, and request and health check metrics.
+
+    The latency average and request counts only cover real requests; health checks
+    are counted apart so synthetic probes do not skew the selection weights.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.latency = INITIAL_LATENCY
+        self.consecutive_failures = 0
+        self.ejected_until = 0
+        self.requests = 0
+        self.failures = 0
+        self.health_checks = 0
+        self.health_check_failures = 0
+        self.health_check_latency = None
+
+    def is_healthy(self, now):
+        """
+        Return whether the endpoint is in rotation, i.e. not ejected.
+        """
+
+        return now >= self.ejected_until
+
+    def as_proxies(self):
+        """
+        Return the endpoint in the proxies format of requests and the transcript API.
+
+        Returns:
+            dict: The proxy URL for both http and https traffic.
+        """
+
+        return {"http": self.url, "https": self.url}
+
+    def snapshot(self, now):
+        """
+        Return the metrics of the endpoint as a JSON-serializable dictionary.
+
+        The proxy URL is left out since it carries the proxy credentials.
+
+        Returns:
+            dict: The health, latency average, request and failure counts, and health check
+                counts and latency of the last check.
+        """
+
+        return {
+            "healthy": self.is_healthy(now),
+            "latency": round(self.latency, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "health_checks": self.health_checks,
+            "health_check_failures": self.health_check_failures,
+            "health_check_latency": (
+                round(self.health_check_latency, 3)
+                if self.health_check_latency is not None
+                else None
+            ),
+        }
+
+
+class ProxyPool:
+    """
+    Pool of proxy exits with latency-weighted selection and failure ejection.
+
+    Each request picks a healthy proxy at random with a probability inversely
+    proportional to its EWMA latency, so fast exits take most of the traffic while
+    slow ones still get sampled. A proxy that fails several times in a row is ejected
+    for a while, and an active health check re-admits it early once it responds. An
+    empty pool means scraping connects directly.
+    """
+
+    def __init__(
+        self,
+        urls,
+        eject_after=EJECT_AFTER_FAILURES,
+        eject_seconds=EJECT_SECONDS,
+    ):
+        self.endpoints = [ProxyEndpoint(url) for url in urls]
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self._lock = threading.Lock()
+        self._health_thread = None
+
+    def select(self, exclude=()):
+        """
+        Pick a proxy for the next request.
+
+        Args:
+            exclude (tuple, optional): Endpoints to avoid, e.g. one that is already being tried.
+
+        Returns:
+            ProxyEndpoint: The chosen proxy, or None to connect directly.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e not in exclude]
+            if not candidates:
+                return None
+
+            healthy = [e for e in candidates if e.is_healthy(now)]
+            if not healthy:
+                # Every exit is ejected, so fall back to the one due back soonest
+                return min(candidates, key=lambda e: e.ejected_until)
+
+            weights = [1 / max(e.latency, 0.001) for e in healthy]
+            return random.choices(healthy, weights=weights)[0]
+
+    def record_success(self, endpoint, latency):
+        """
+        Record a successful request through a proxy.
+
+        Args:
+            endpoint (ProxyEndpoint): The proxy used, or None for a direct request.
+            latency (float): The duration of the request in seconds.
+
+        Returns:
+            None
+        """
+
+        if endpoint is None:
+            return
+
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.consecutive_failures = 0
+            endpoint.ejected_until = 0
+            endpoint.latency += LATENCY_SMOOTHING * (latency - endpoint.latency)
+
+    def record_failure(self, endpoint):
+        """
+        Record a failed request through a proxy, ejecting it after too many failures in a row.
+
+        Args:
+            endpoint (ProxyEndpoint): The proxy used, or None for a direct request.
+
+        Returns:
+            None
+        """
+
+        if endpoint is None:
+            return
+
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.failures += 1
+            self._extend_failure_streak(endpoint)
+
+    def _extend_failure_streak(self, endpoint):
+        """
+        Count a failure towards ejection, ejecting the proxy after too many in a row. Holds the lock.
+        """
+
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.eject_after:
+            endpoint.ejected_until = time.monotonic() + self.eject_seconds
+            print(f"Ejected proxy after {endpoint.consecutive_failures} failures")
+
+    def call(self, fn, endpoint=_SELECT, ok_errors=()):
+        """
+        Run a request through a proxy and record its outcome.
+
+        Args:
+            fn (callable): Called with the chosen ProxyEndpoint (None for a direct connection).
+            endpoint (ProxyEndpoint, optional): The proxy to use, or None to connect directly.
+                Defaults to select().
+            ok_errors (tuple, optional): Exception types that mean the proxy worked but the content
+                is unavailable (e.g. a video without captions), so they do not count as proxy failures.
+
+        Returns:
+            The return value of fn.
+
+        Raises:
+            Exception: Whatever fn raised, after recording the failure.
+        """
+
+        if endpoint is _SELECT:
+            endpoint = self.select()
+
+        start = time.monotonic()
+        try:
+            result = fn(endpoint)
+        except ok_errors:
+            self.record_success(endpoint, time.monotonic() - start)
+            raise
+        except Exception:
+            self.record_failure(endpoint)
+            raise
+
+        self.record_success(endpoint, time.monotonic() - start)
+        return result
+
+    def check_health(self, check):
+        """
+        Actively check every proxy once.
+
+        A passing check re-admits an ejected proxy and a failing one counts towards
+        ejection, but neither touches the latency average or the request counts.
+
+        Args:
+            check (callable): Called with a ProxyEndpoint; raises or returns False if the proxy is down.
+
+        Returns:
+            None
+        """
+
+        for endpoint in list(self.endpoints):
+            start = time.monotonic()
+            try:
+                healthy = check(endpoint) is not False
+            except Exception:
+                healthy = False
+
+            with self._lock:
+                endpoint.health_checks += 1
+                endpoint.health_check_latency = time.monotonic() - start
+                if healthy:
+                    endpoint.consecutive_failures = 0
+                    endpoint.ejected_until = 0
+                else:
+                    endpoint.health_check_failures += 1
+                    self._extend_failure_streak(endpoint)
+
+    def start_health_checks(self, check, interval=HEALTH_CHECK_INTERVAL):
+        """
+        Check every proxy right away and then periodically on a daemon thread.
+
+        Args:
+            check (callable): Called with a ProxyEndpoint; raises or returns False if the proxy is down.
+            interval (float, optional): Seconds between rounds. Defaults to HEALTH_CHECK_INTERVAL.
+
+        Returns:
+            None
+        """
+
+        if self._health_thread is not None or not self.endpoints:
+            return
+
+        def run():
+            while True:
+                self.check_health(check)
+                time.sleep(interval)
+
+        self._health_thread = threading.Thread(
+            target=run, name="proxy-health", daemon=True
+        )
+        self._health_thread.start()
+
+    def metrics(self):
+        """
+        Return the metrics of every proxy.
+
+        Returns:
+            list: One snapshot per proxy, in configuration order.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            return [endpoint.snapshot(now) for endpoint in self.endpoints]
@@ -0,0 +1,86 @@
+import threading
+import pytest
+from proxy_pool import *
+
+
+def test_empty_pool_connects_directly():
+    pool = ProxyPool([])
+    assert pool.select() is None
+    assert pool.call(lambda proxy: proxy) is None
+
+
+def test_faster_proxy_takes_most_traffic():
+    pool = ProxyPool(["http://fast:1", "http://slow:1"])
+    fast, slow = pool.endpoints
+    fast.latency, slow.latency = 0.1, 10.0
+    picks = [pool.select() for _ in range(1000)]
+    assert picks.count(fast) > 900
+
+
+def test_proxy_is_ejected_after_consecutive_failures():
+    pool = ProxyPool(["http://a:1", "http://b:1"], eject_after=2)
+    a, b = pool.endpoints
+
+    def fail(proxy):
+        raise ConnectionError("proxy refused")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            pool.call(fail, endpoint=a)
+
+    assert all(pool.select() is b for _ in range(50))
+    assert pool.metrics()[0] == {
+        "healthy": False,
+        "latency": INITIAL_LATENCY,
+        "requests": 2,
+        "failures": 2,
+        "consecutive_failures": 2,
+        "health_checks": 0,
+        "health_check_failures": 0,
+        "health_check_latency": None,
+    }
+
+
+def test_successful_health_check_readmits_proxy():
+    pool = ProxyPool(["http://a:1"], eject_after=1)
+    pool.record_failure(pool.endpoints[0])
+    assert not pool.metrics()[0]["healthy"]
+    pool.check_health(lambda proxy: True)
+    assert pool.metrics()[0]["healthy"]
+
+
+def test_health_checks_are_tracked_apart_from_requests():
+    pool = ProxyPool(["http://a:1"], eject_after=2)
+    for _ in range(2):
+        pool.check_health(lambda proxy: False)
+
+    metrics = pool.metrics()[0]
+    assert not metrics["healthy"]
+    assert metrics["latency"] == INITIAL_LATENCY
+    assert (metrics["requests"], metrics["failures"]) == (0, 0)
+    assert (metrics["health_checks"], metrics["health_check_failures"]) == (2, 2)
+
+
+def test_health_checks_start_right_away():
+    pool = ProxyPool(["http://a:1"])
+    checked = threading.Event()
+    pool.start_health_checks(lambda proxy: checked.set(), interval=60)
+    assert checked.wait(1)
+
+
+def test_ok_errors_do_not_count_as_proxy_failures():
+    pool = ProxyPool(["http://a:1"])
+
+    def no_captions(proxy):
+        raise LookupError("no transcript")
+
+    with pytest.raises(LookupError):
+        pool.call(no_captions, ok_errors=(LookupError,))
+    assert pool.metrics()[0]["failures"] == 0
+
+
+def test_exclude_skips_endpoints():
+    pool = ProxyPool(["http://a:1", "http://b:1"])
+    a, b = pool.endpoints
+    assert all(pool.select(exclude=(a,)) is b for _ in range(20))
+    assert pool.select(exclude=(a, b)) is None
@@ -0,0 +1,284 @@
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+# "record" saves the responses of outbound calls as fixtures, "replay" serves them without network
+REPLAY_MODE = os.getenv("REPLAY_MODE", "off")
+REPLAY_FIXTURES = os.getenv("REPLAY_FIXTURES", "fixtures")
+
+# Multiplier of the recorded latencies when replaying; 0 replays instantly
+REPLAY_LATENCY_SCALE = float(os.getenv("REPLAY_LATENCY_SCALE", 1.0))
+
+
+class MissingFixtureError(LookupError):
+    """
+    Raised when replaying a call that was never recorded.
+    """
+
+
+class ReplayedError(Exception):
+    """
+    Raised when replaying a call whose recording failed, carrying the original error.
+
+    Replayed errors are also instances of the recorded exception class when it can be
+    imported, so code that catches a specific type takes the same path as when live.
+    """
+
+
+_replayed_error_types = {}
+
+
+def get_error_type(error):
+    """
+    Return the importable name of an exception's class.
+
+    Args:
+        error (Exception): The exception.
+
+    Returns:
+        str: The module and qualified name of the class, e.g. "openai.RateLimitError".
+    """
+
+    return f"{type(error).__module__}:{type(error).__qualname__}"
+
+
+def get_replayed_error_type(error_type):
+    """
+    Return the exception class raised when replaying a recorded error of a class.
+
+    Args:
+        error_type (str): The recorded class name from get_error_type, or None.
+
+    Returns:
+        type: A subclass of both ReplayedError and the recorded class, or ReplayedError if the
+            recorded class cannot be imported.
+    """
+
+    if error_type not in _replayed_error_types:
+        replayed = ReplayedError
+        try:
+            module, qualname = error_type.split(":")
+            cls = importlib.import_module(module)
+            for attribute in qualname.split("."):
+                cls = getattr(cls, attribute)
+            if isinstance(cls, type) and issubclass(cls, Exception):
+                # Client errors often require response objects, so only the message is kept
+                replayed = type(
+                    cls.__name__,
+                    (ReplayedError, cls),
+                    {
+                        "__init__": ReplayedError.__init__,
+                        "__str__": ReplayedError.__str__,
+                    },
+                )
+        except (AttributeError, ImportError, TypeError, ValueError):
+            pass
+        _replayed_error_types[error_type] = replayed
+    return _replayed_error_types[error_type]
+
+
+def replay_error(fixture):
+    """
+    Build the exception to raise for a recorded failure.
+
+    Args:
+        fixture (dict): The recorded fixture, with an "error" and possibly an "error_type".
+
+    Returns:
+        ReplayedError: The exception, an instance of the recorded class when it can be imported.
+    """
+
+    return get_replayed_error_type(fixture.get("error_type"))(fixture["error"])
+
+
+def get_fixture_key(name, key):
+    """
+    Hash the identity of a call into a fixture file name.
+
+    Only the hash is stored, so keys may contain secrets such as API keys in URLs.
+
+    Args:
+        name (str): The kind of call, e.g. "openai".
+        key: The JSON-serializable arguments that identify the call.
+
+    Returns:
+        str: The SHA-256 hex digest of the call.
+    """
+
+    payload = json.dumps([name, key], sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def to_namespace(value):
+    """
+    Convert recorded JSON into objects with attribute access, like the client objects it came from.
+
+    Args:
+        value: A JSON value.
+
+    Returns:
+        The value with every dictionary turned into a SimpleNamespace.
+    """
+
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [to_namespace(item) for item in value]
+    return value
+
+
+class Recorder:
+    """
+    Record/replay layer for outbound calls.
+
+    With mode "off" calls run unchanged. With "record" each call runs for real and
+    its result (or error) and latency are saved as a JSON fixture named by a hash of
+    the call. With "replay" the fixture is returned instead, after sleeping for the
+    recorded latency times latency_scale, so end-to-end runs are deterministic and
+    work offline. Streams are recorded item by item with the delay before each item.
+    """
+
+    def __init__(
+        self,
+        mode=REPLAY_MODE,
+        directory=REPLAY_FIXTURES,
+        latency_scale=REPLAY_LATENCY_SCALE,
+    ):
+        if mode not in ("off", "record", "replay"):
+            raise ValueError(f"Unknown replay mode: {mode}")
+        self.mode = mode
+        self.directory = directory
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+
+    def _path(self, name, key):
+        return os.path.join(self.directory, name, f"{get_fixture_key(name, key)}.json")
+
+    def _save(self, name, key, fixture):
+        path = self._path(name, key)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(fixture, f)
+
+    def _load(self, name, key):
+        try:
+            with open(self._path(name, key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise MissingFixtureError(
+                f"No {name} fixture recorded for {key!r}"
+            ) from None
+
+    def _sleep(self, latency):
+        if self.latency_scale > 0 and latency > 0:
+            time.sleep(latency * self.latency_scale)
+
+    def call(self, name, key, fn, encode=None, decode=None):
+        """
+        Run, record or replay a call.
+
+        Args:
+            name (str): The kind of call, e.g. "transcript". Fixtures are grouped by it.
+            key: The JSON-serializable arguments that identify the call.
+            fn (callable): Makes the real call, taking no arguments.
+            encode (callable, optional): Converts the result to JSON when recording.
+            decode (callable, optional): Converts the recorded JSON back when replaying.
+
+        Returns:
+            The result of the call, or its recording.
+
+        Raises:
+            MissingFixtureError: If replaying a call that was never recorded.
+            ReplayedError: If replaying a call whose recording raised, also an instance of the
+                recorded exception class when it can be imported.
+        """
+
+        if self.mode == "off":
+            return fn()
+
+        if self.mode == "replay":
+            fixture = self._load(name, key)
+            self._sleep(fixture["latency"])
+            if "error" in fixture:
+                raise replay_error(fixture)
+            return decode(fixture["result"]) if decode else fixture["result"]
+
+        start = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            self._save(
+                name,
+                key,
+                {
+                    "latency": time.monotonic() - start,
+                    "error": f"{type(e).__name__}: {e}",
+                    "error_type": get_error_type(e),
+                },
+            )
+            raise
+
+        self._save(
+            name,
+            key,
+            {
+                "latency": time.monotonic() - start,
+                "result": encode(result) if encode else result,
+            },
+        )
+        return result
+
+    def stream(self, name, key, fn, encode=None, decode=None):
+        """
+        Run, record or replay a call that returns an iterator.
+
+        Only the items actually consumed are recorded, so a scraper that is read
+        partially is recorded partially.
+
+        Args:
+            name (str): The kind of call, e.g. "comments".
+            key: The JSON-serializable arguments that identify the call.
+            fn (callable): Makes the real call, taking no arguments and returning an iterable.
+            encode (callable, optional): Converts each item to JSON when recording.
+            decode (callable, optional): Converts each recorded item back when replaying.
+
+        Returns:
+            iterator: The items of the call, or their recording.
+        """
+
+        if self.mode == "off":
+            return fn()
+        if self.mode == "replay":
+            return self._replay_stream(self._load(name, key), decode)
+        return self._record_stream(name, key, fn, encode)
+
+    def _replay_stream(self, fixture, decode):
+        for delay, item in fixture["items"]:
+            self._sleep(delay)
+            yield decode(item) if decode else item
+        if "error" in fixture:
+            raise replay_error(fixture)
+
+    def _record_stream(self, name, key, fn, encode):
+        items, fixture = [], {}
+        last = time.monotonic()
+        try:
+            for item in fn():
+                items.append(
+                    [time.monotonic() - last, encode(item) if encode else item]
+                )
+                yield item
+                # Time spent by the consumer between items is not part of the latency
+                last = time.monotonic()
+        except Exception as e:
+            fixture["error"] = f"{type(e).__name__}: {e}"
+            fixture["error_type"] = get_error_type(e)
+            raise
+        finally:
+            fixture["items"] = items
+            self._save(name, key, fixture)
@@ -0,0 +1,76 @@
+import pytest
+from replay import *
+
+
+def test_off_mode_calls_through(tmp_path):
+    recorder = Recorder("off", str(tmp_path))
+    assert recorder.call("transcript", "abc", lambda: [1]) == [1]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_recorded_calls_replay_offline(tmp_path):
+    Recorder("record", str(tmp_path)).call("googleapis", "url", lambda: {"items": []})
+
+    def offline():
+        raise ConnectionError("no network")
+
+    replayer = Recorder("replay", str(tmp_path), latency_scale=0)
+    assert replayer.call("googleapis", "url", offline) == {"items": []}
+    with pytest.raises(MissingFixtureError):
+        replayer.call("googleapis", "other url", offline)
+
+
+def test_recorded_errors_are_raised_on_replay(tmp_path):
+    def failing():
+        raise TimeoutError("slow upstream")
+
+    with pytest.raises(TimeoutError):
+        Recorder("record", str(tmp_path)).call("transcript", "abc", failing)
+    with pytest.raises(ReplayedError, match="slow upstream") as replayed:
+        Recorder("replay", str(tmp_path), latency_scale=0).call(
+            "transcript", "abc", failing
+        )
+    assert isinstance(replayed.value, TimeoutError)
+
+
+class UpstreamError(Exception):
+    def __init__(self, message, response):
+        super().__init__(message)
+        self.response = response
+
+
+def test_replayed_errors_match_recorded_class(tmp_path):
+    def failing():
+        raise UpstreamError("rate limited", response=object())
+
+    with pytest.raises(UpstreamError):
+        next(Recorder("record", str(tmp_path)).stream("comments", "video", failing))
+    replayed = Recorder("replay", str(tmp_path), latency_scale=0).stream(
+        "comments", "video", failing
+    )
+    with pytest.raises(UpstreamError, match="rate limited"):
+        list(replayed)
+    assert get_replayed_error_type("missing_module:Error") is ReplayedError
+
+
+def test_streams_record_only_consumed_items(tmp_path):
+    stream = Recorder("record", str(tmp_path)).stream(
+        "comments", "video", lambda: iter([{"text": "a"}, {"text": "b"}, {"text": "c"}])
+    )
+    assert next(stream) == {"text": "a"}
+    stream.close()
+
+    replayed = Recorder("replay", str(tmp_path), latency_scale=0).stream(
+        "comments", "video", lambda: iter([])
+    )
+    assert list(replayed) == [{"text": "a"}]
+
+
+def test_decoded_results_have_attribute_access(tmp_path):
+    completion = {"choices": [{"message": {"content": "summary"}}], "usage": None}
+    Recorder("record", str(tmp_path)).call("openai", {"model": "m"}, lambda: completion)
+    replayed = Recorder("replay", str(tmp_path), latency_scale=0).call(
+        "openai", {"model": "m"}, None, decode=to_namespace
+    )
+    assert replayed.choices[0].message.content == "summary"
+    assert replayed.usage is None
@@ -0,0 +1,90 @@
+import threading
+
+
+class _Call:
+    """
+    An in-flight computation that concurrent callers can wait on.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into a single computation.
+
+    The first caller for a key runs the function while every caller that arrives
+    before it finishes waits and receives the same result (or exception). Once the
+    computation finishes the key is released, so later calls compute afresh; caching
+    of finished results is left to the caller.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key (hashable): The key identifying identical work, e.g. a video ID.
+            fn (callable): The function to run.
+            *args: Positional arguments for fn.
+            **kwargs: Keyword arguments for fn.
+
+        Returns:
+            tuple:
+                - The result of fn.
+                - bool: True if this caller shared another caller's computation.
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every waiting caller.
+
+        Examples:
+            >>> flights = SingleFlight()
+            >>> flights.do("dQw4w9WgXcQ", lambda: "summary")
+            ('summary', False)
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def in_flight(self):
+        """
+        Return the number of computations currently running.
+
+        Returns:
+            int: The number of keys with an in-flight computation.
+        """
+
+        with self._lock:
+            return len(self._calls)
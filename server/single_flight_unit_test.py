@@ -0,0 +1,43 @@
+import threading
+import time
+from single_flight import *
+
+
+def test_concurrent_calls_share_one_computation():
+    flights = SingleFlight()
+    calls = []
+    results = []
+
+    def summarize():
+        calls.append(1)
+        time.sleep(0.1)
+        return "summary"
+
+    def request():
+        results.append(flights.do("dQw4w9WgXcQ", summarize))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert all(result == "summary" for result, _ in results)
+    assert flights.in_flight() == 0
+
+
+def test_errors_propagate_and_release_the_key():
+    flights = SingleFlight()
+
+    def fail():
+        raise ValueError("transcript unavailable")
+
+    try:
+        flights.do("abc123XYZ00", fail)
+        assert False
+    except ValueError:
+        pass
+
+    assert flights.do("abc123XYZ00", lambda: "retry") == ("retry", False)
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from endpoint_benchmark import BENCHMARK_REQUESTS
+
+# Request timed as the first one after startup; it loads every lazily imported module and client
+FIRST_REQUEST = BENCHMARK_REQUESTS["get_summaries"]
+
+# Code run in a fresh interpreter for every measurement. Importing the app starts no background
+# threads, so only the import, the optional preload and the request itself are timed.
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+if sys.argv[1] == "preload":
+    app.warm_up()
+preloaded = time.perf_counter()
+response = app.app.test_client().get(sys.argv[2])
+first_request = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "preload": preloaded - imported,
+    "first_request": first_request - preloaded,
+    "status": response.status_code,
+}))
+"""
+
+
+def run_interpreter(mode, env):
+    """
+    Import the app and serve the first request in a fresh interpreter.
+
+    Args:
+        mode (str): "preload" to import the lazy modules before the request, "lazy" otherwise.
+        env (dict): The environment of the interpreter.
+
+    Returns:
+        dict: The seconds spent importing, preloading and serving the first request, and its status.
+    """
+
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE, mode, FIRST_REQUEST],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_startup(runs):
+    """
+    Measure the cold start of the server in fresh interpreters, replaying recorded fixtures.
+
+    The first request is a real summary request served from the replay fixtures with no recorded
+    latency, so it measures the cost of loading the lazy modules and clients rather than the network.
+    Each run starts one interpreter that loads them on the request and one that preloads them first.
+
+    Args:
+        runs (int): The number of runs.
+
+    Returns:
+        dict: The median seconds spent importing app.py, serving the first request with lazy
+            loading, preloading, and serving the first request after preloading, and the statuses
+            of the requests.
+    """
+
+    samples = {"lazy": [], "preload": []}
+    for _ in range(runs):
+        for mode, mode_samples in samples.items():
+            # Fresh persistent state, so no run is warmed by an earlier one
+            state_dir = tempfile.mkdtemp(prefix="startup-benchmark-")
+            env = {
+                **os.environ,
+                "REPLAY_MODE": "replay",
+                "REPLAY_LATENCY_SCALE": "0",
+                "ENV": "development",
+                "LLM_CACHE_DISABLED": "true",
+                "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "replay"),
+                "STATE_SQLITE_PATH": os.path.join(state_dir, "state.sqlite3"),
+                "LLM_CACHE_PATH": os.path.join(state_dir, "llm_cache.sqlite3"),
+            }
+            mode_samples.append(run_interpreter(mode, env))
+
+    def median(mode, key):
+        return round(statistics.median(sample[key] for sample in samples[mode]), 3)
+
+    return {
+        "import": median("lazy", "import"),
+        "first_request": median("lazy", "first_request"),
+        "preload": median("preload", "preload"),
+        "first_request_preloaded": median("preload", "first_request"),
+        "statuses": sorted(
+            {sample["status"] for mode in samples.values() for sample in mode}
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the server cold start against recorded fixtures. "
+        "Record them first with endpoint_benchmark.py --mode record."
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps(measure_startup(args.runs), indent=2))
@@ -0,0 +1,282 @@
+from abc import ABC, abstractmethod
+import importlib.util
+import json
+import os
+import sqlite3
+import threading
+import time
+from ttl_cache import TTLCache
+
+# Backend of the shared state: "memory" (one process), "sqlite" (processes on one host)
+# or "redis" (processes on any number of hosts)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+STATE_SQLITE_PATH = os.getenv("STATE_SQLITE_PATH", "state.sqlite3")
+STATE_REDIS_URL = os.getenv("STATE_REDIS_URL", "redis://localhost:6379/0")
+
+# Lifetime of entries stored without a TTL
+DEFAULT_STATE_TTL = 24 * 60 * 60
+
+
+class StateStore(ABC):
+    """
+    Key-value store of runtime state shared by the server processes.
+
+    Keys are strings scoped by the store's namespace, values must be
+    JSON-serializable, and every entry expires after its TTL. Tuples come back
+    as lists from the shared backends.
+    """
+
+    def __init__(self, namespace, ttl=DEFAULT_STATE_TTL):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    @abstractmethod
+    def get(self, key, default=None):
+        """
+        Return the stored value for a key.
+
+        Args:
+            key (str): The key within the namespace.
+            default (optional): The value returned on a miss. Defaults to None.
+
+        Returns:
+            The stored value, or default if it is missing or expired.
+        """
+
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        """
+        Store a value.
+
+        Args:
+            key (str): The key within the namespace.
+            value: The JSON-serializable value to store.
+            ttl (float, optional): The time-to-live of this entry in seconds. Defaults to the store's TTL.
+
+        Returns:
+            None
+        """
+
+    @abstractmethod
+    def delete(self, key):
+        """
+        Remove a key if present.
+
+        Args:
+            key (str): The key within the namespace.
+
+        Returns:
+            None
+        """
+
+
+class MemoryStore(StateStore):
+    """
+    State held in the memory of the current process.
+
+    Values are stored as is, without serialization, in a bounded TTL cache.
+    """
+
+    def __init__(self, namespace, ttl=DEFAULT_STATE_TTL, max_entries=1024):
+        super().__init__(namespace, ttl)
+        self._cache = TTLCache(ttl, max_entries=max_entries)
+
+    def get(self, key, default=None):
+        return self._cache.get(self._key(key), default)
+
+    def set(self, key, value, ttl=None):
+        self._cache.set(self._key(key), value, ttl=ttl)
+
+    def delete(self, key):
+        self._cache.delete(self._key(key))
+
+
+class SQLiteStore(StateStore):
+    """
+    State stored in an SQLite database shared by every process on the host.
+
+    Expired entries are deleted when a read finds them, in batches on write, and
+    once when the database is opened, so rarely written stores do not pile them up.
+    """
+
+    # Writes between sweeps of expired entries
+    SWEEP_EVERY = 256
+
+    def __init__(self, namespace, ttl=DEFAULT_STATE_TTL, path=STATE_SQLITE_PATH):
+        super().__init__(namespace, ttl)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = None
+        self._writes = 0
+
+    def _connect(self):
+        """
+        Open the SQLite database on first use and create the state table.
+
+        Returns:
+            sqlite3.Connection: The shared connection to the state database.
+        """
+
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                "DELETE FROM state WHERE expires_at <= ?", (time.time(),)
+            )
+            connection.commit()
+            self._connection = connection
+
+        return self._connection
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT value, expires_at FROM state WHERE key = ?",
+                    (self._key(key),),
+                ).fetchone()
+                if row is not None and time.time() >= row[1]:
+                    # Only delete the row read, in case another process rewrote it meanwhile
+                    connection.execute(
+                        "DELETE FROM state WHERE key = ? AND expires_at = ?",
+                        (self._key(key), row[1]),
+                    )
+                    connection.commit()
+                    row = None
+            except sqlite3.Error as e:
+                print(f"Error reading state: {str(e)}")
+                return default
+
+        if row is None:
+            return default
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            try:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO state VALUES (?, ?, ?)",
+                    (self._key(key), json.dumps(value), expires_at),
+                )
+                self._writes += 1
+                if self._writes % self.SWEEP_EVERY == 0:
+                    connection.execute(
+                        "DELETE FROM state WHERE expires_at <= ?", (now,)
+                    )
+                connection.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing state: {str(e)}")
+
+    def delete(self, key):
+        with self._lock:
+            try:
+                connection = self._connect()
+                connection.execute("DELETE FROM state WHERE key = ?", (self._key(key),))
+                connection.commit()
+            except sqlite3.Error as e:
+                print(f"Error deleting state: {str(e)}")
+
+
+class RedisStore(StateStore):
+    """
+    State stored in a networked key-value server shared by every host.
+
+    The client defaults to redis-py, imported on first use so the other backends
+    do not need it installed. Any client with redis-py's get, set (with ex) and
+    delete methods works, e.g. a local stand-in in tests. TTLs are enforced by
+    the server.
+    """
+
+    def __init__(
+        self, namespace, ttl=DEFAULT_STATE_TTL, url=STATE_REDIS_URL, client=None
+    ):
+        super().__init__(namespace, ttl)
+        # Fail at startup rather than turning every read into a logged miss
+        if client is None and importlib.util.find_spec("redis") is None:
+            raise ImportError("The redis state backend requires the redis package")
+        self.url = url
+        self._client = client
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """
+        Create the client on first use.
+
+        Returns:
+            The key-value client.
+        """
+
+        with self._lock:
+            if self._client is None:
+                import redis
+
+                self._client = redis.Redis.from_url(self.url)
+            return self._client
+
+    def get(self, key, default=None):
+        try:
+            value = self._connect().get(self._key(key))
+        except Exception as e:
+            print(f"Error reading state: {str(e)}")
+            return default
+
+        if value is None:
+            return default
+        return json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            self._connect().set(self._key(key), json.dumps(value), ex=max(1, int(ttl)))
+        except Exception as e:
+            print(f"Error writing state: {str(e)}")
+
+    def delete(self, key):
+        try:
+            self._connect().delete(self._key(key))
+        except Exception as e:
+            print(f"Error deleting state: {str(e)}")
+
+
+def get_state_store(namespace, ttl=DEFAULT_STATE_TTL, max_entries=1024, backend=None):
+    """
+    Create a store for a namespace on the configured backend.
+
+    Args:
+        namespace (str): The prefix of every key of the store, e.g. "transcripts".
+        ttl (float, optional): The default time-to-live of entries in seconds.
+        max_entries (int, optional): The capacity of the in-memory backend.
+        backend (str, optional): "memory", "sqlite" or "redis". Defaults to STATE_BACKEND.
+
+    Returns:
+        StateStore: The store.
+
+    Raises:
+        ValueError: If the backend is unknown.
+        ImportError: If the backend is "redis" and the redis package is not installed.
+    """
+
+    backend = backend or STATE_BACKEND
+    if backend == "memory":
+        return MemoryStore(namespace, ttl, max_entries=max_entries)
+    if backend == "sqlite":
+        return SQLiteStore(namespace, ttl)
+    if backend == "redis":
+        return RedisStore(namespace, ttl)
+    raise ValueError(f"Unknown state backend: {backend}")
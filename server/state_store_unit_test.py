@@ -0,0 +1,85 @@
+import pytest
+from state_store import *
+
+
+class LocalKV:
+    """
+    In-process stand-in for a networked key-value client.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_store(request, tmp_path):
+    kv = LocalKV()
+
+    def make(namespace, ttl=DEFAULT_STATE_TTL):
+        if request.param == "memory":
+            return MemoryStore(namespace, ttl)
+        if request.param == "sqlite":
+            return SQLiteStore(namespace, ttl, path=str(tmp_path / "state.sqlite3"))
+        return RedisStore(namespace, ttl, client=kv)
+
+    return make
+
+
+def test_round_trip_and_delete(make_store):
+    store = make_store("jobs")
+    assert store.get("a", "missing") == "missing"
+    store.set("a", {"progress": 40.0, "stages": {"video": {"eta": None}}})
+    assert store.get("a") == {"progress": 40.0, "stages": {"video": {"eta": None}}}
+    store.delete("a")
+    assert store.get("a") is None
+
+
+def test_namespaces_do_not_collide(make_store):
+    make_store("transcripts").set("abc", "transcript")
+    assert make_store("comments").get("abc") is None
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    SQLiteStore("jobs", path=path).set("a", [1, 2])
+    assert SQLiteStore("jobs", path=path).get("a") == [1, 2]
+
+
+def test_sqlite_entries_expire(tmp_path):
+    store = SQLiteStore("jobs", path=str(tmp_path / "state.sqlite3"))
+    store.set("a", 1, ttl=0)
+    assert store.get("a") is None
+    rows = store._connect().execute("SELECT COUNT(*) FROM state").fetchone()[0]
+    assert rows == 0
+
+
+def test_sqlite_expired_entries_are_deleted_on_open(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    SQLiteStore("jobs", path=path).set("a", 1, ttl=0)
+    store = SQLiteStore("other", path=path)
+    assert store._connect().execute("SELECT COUNT(*) FROM state").fetchone()[0] == 0
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        get_state_store("jobs", backend="carrier-pigeon")
+
+
+def test_redis_backend_requires_redis_package(monkeypatch):
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(ImportError, match="redis"):
+        get_state_store("jobs", backend="redis")
+
+
+def test_state_store_is_abstract():
+    with pytest.raises(TypeError):
+        StateStore("jobs")
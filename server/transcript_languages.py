@@ -0,0 +1,156 @@
+import os
+import re
+
+# Transcript languages used when a request names none, most preferred first
+DEFAULT_TRANSCRIPT_LANGUAGES = tuple(
+    language.strip() for language in os.getenv("TRANSCRIPT_LANGUAGES", "en").split(",")
+)
+
+# Most languages a request may list
+MAX_TRANSCRIPT_LANGUAGES = 5
+
+# BCP 47 style language codes as YouTube uses them, e.g. "en", "pt-BR", "zh-Hans"
+_LANGUAGE_CODE = re.compile(r"^[A-Za-z]{2,3}(?:-[A-Za-z0-9]{2,8})*$")
+
+
+def parse_languages(value, default=DEFAULT_TRANSCRIPT_LANGUAGES):
+    """
+    Parse a comma-separated list of preferred transcript languages.
+
+    Args:
+        value (str): The languages, most preferred first, e.g. "de,en". May be None or empty.
+        default (tuple, optional): The languages used when none are given.
+
+    Returns:
+        tuple: The language codes in order of preference, without duplicates.
+
+    Raises:
+        ValueError: If a language code is malformed or too many languages are given.
+
+    Examples:
+        >>> parse_languages("de, en")
+        ('de', 'en')
+        >>> parse_languages(None)
+        ('en',)
+    """
+
+    if not value:
+        return default
+
+    languages = []
+    for language in value.split(","):
+        language = language.strip()
+        if not _LANGUAGE_CODE.match(language):
+            raise ValueError(f"Invalid language code: {language!r}")
+        if language not in languages:
+            languages.append(language)
+
+    if len(languages) > MAX_TRANSCRIPT_LANGUAGES:
+        raise ValueError(f"At most {MAX_TRANSCRIPT_LANGUAGES} languages can be given")
+    return tuple(languages)
+
+
+def describe_transcript(transcript):
+    """
+    Describe a transcript of youtube-transcript-api's transcript list as JSON.
+
+    The description keeps the caption URL, so the transcript (or a translation of it) can be
+    fetched later without listing the transcripts of the video again.
+
+    Args:
+        transcript (Transcript): A transcript from YouTubeTranscriptApi.list_transcripts.
+
+    Returns:
+        dict: The language, language code, whether it is auto-generated, the languages it can be
+            translated to, and its caption URL.
+    """
+
+    return {
+        "language": transcript.language,
+        "language_code": transcript.language_code,
+        "is_generated": transcript.is_generated,
+        "translation_languages": list(transcript.translation_languages),
+        # The URL is not part of the library's public interface, but it is what a fetch requests
+        "url": transcript._url,
+    }
+
+
+def _matches(code, language, exact):
+    """
+    Return whether a track's language code matches a requested language.
+    """
+
+    if exact:
+        return code.lower() == language.lower()
+    return code.split("-")[0].lower() == language.split("-")[0].lower()
+
+
+def select_transcript(tracks, languages):
+    """
+    Choose the transcript to fetch for the preferred languages.
+
+    In order: a manually created track in one of the languages, an auto-generated
+    track in one of them, a translation of a track into one of them (translating a
+    manual track rather than a generated one), and finally the first manual or
+    generated track in its original language. Within each step the languages are
+    tried in order of preference, exact codes before regional variants (e.g. "en-GB"
+    for "en").
+
+    Args:
+        tracks (list): The track descriptions from describe_transcript.
+        languages (tuple): The language codes, most preferred first.
+
+    Returns:
+        dict: The "track" to fetch, the "translate_to" language code or None, and the "language"
+            of the resulting transcript. None if the video has no tracks.
+    """
+
+    manual = [track for track in tracks if not track["is_generated"]]
+    generated = [track for track in tracks if track["is_generated"]]
+
+    for group in (manual, generated):
+        for language in languages:
+            for exact in (True, False):
+                for track in group:
+                    if _matches(track["language_code"], language, exact):
+                        return {
+                            "track": track,
+                            "translate_to": None,
+                            "language": track["language_code"],
+                        }
+
+    # Fall back to YouTube's server-side translation
+    for language in languages:
+        for track in manual + generated:
+            for translation in track["translation_languages"]:
+                if _matches(translation["language_code"], language, exact=True):
+                    return {
+                        "track": track,
+                        "translate_to": translation["language_code"],
+                        "language": translation["language_code"],
+                    }
+
+    if not tracks:
+        return None
+    track = (manual + generated)[0]
+    return {"track": track, "translate_to": None, "language": track["language_code"]}
+
+
+def get_transcript_key(video_id, language):
+    """
+    Return the cache key of a video's transcript in a language.
+
+    Args:
+        video_id (str): The ID of the YouTube video.
+        language (str): The language code of the transcript, or a comma-separated list of preferred
+            languages for data derived from whichever transcript they select (e.g. search indexes).
+
+    Returns:
+        str: The cache key.
+
+    Examples:
+        >>> get_transcript_key("dQw4w9WgXcQ", "de")
+        'dQw4w9WgXcQ:de'
+    """
+
+    return f"{video_id}:{language}"
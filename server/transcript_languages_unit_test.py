@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+import pytest
+from transcript_languages import *
+
+
+def track(code, generated=False, translations=()):
+    return {
+        "language": code,
+        "language_code": code,
+        "is_generated": generated,
+        "translation_languages": [
+            {"language": language, "language_code": language}
+            for language in translations
+        ],
+        "url": f"https://www.youtube.com/api/timedtext?lang={code}",
+    }
+
+
+def test_parse_languages():
+    assert parse_languages("de, en,de") == ("de", "en")
+    assert parse_languages("") == DEFAULT_TRANSCRIPT_LANGUAGES
+    with pytest.raises(ValueError):
+        parse_languages("en;drop")
+    with pytest.raises(ValueError):
+        parse_languages("a1,b2")
+
+
+def test_describe_transcript_keeps_the_caption_url():
+    transcript = SimpleNamespace(
+        language="English",
+        language_code="en",
+        is_generated=True,
+        translation_languages=[{"language": "German", "language_code": "de"}],
+        _url="https://www.youtube.com/api/timedtext?v=abc",
+    )
+    assert describe_transcript(transcript)["url"] == transcript._url
+
+
+def test_manual_tracks_win_over_generated_ones():
+    tracks = [track("en", generated=True), track("fr"), track("en-GB")]
+    selection = select_transcript(tracks, ("en",))
+    assert selection["track"]["language_code"] == "en-GB"
+    assert selection["translate_to"] is None
+
+    selection = select_transcript(tracks, ("de", "en"))
+    assert selection["language"] == "en-GB"
+
+
+def test_generated_track_before_translation():
+    tracks = [track("es", translations=["en"]), track("en", generated=True)]
+    assert select_transcript(tracks, ("en",))["track"]["is_generated"]
+
+
+def test_translation_prefers_manual_tracks():
+    tracks = [
+        track("es", generated=True, translations=["de"]),
+        track("fr", translations=["de"]),
+    ]
+    selection = select_transcript(tracks, ("de",))
+    assert selection["track"]["language_code"] == "fr"
+    assert selection["translate_to"] == "de"
+    assert get_transcript_key("abc", selection["language"]) == "abc:de"
+
+
+def test_untranslatable_tracks_fall_back_to_original_language():
+    tracks = [track("ja", generated=True), track("ko")]
+    assert select_transcript(tracks, ("en",))["language"] == "ko"
+    assert select_transcript([], ("en",)) is None
@@ -0,0 +1,217 @@
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+import re
+import threading
+import unicodedata
+
+# Maximum number of per-video indexes kept in memory before evicting the least recently used
+MAX_CACHED_INDEXES = 256
+
+# Words are runs of letters/digits, optionally joined by apostrophes (e.g. "don't")
+TOKEN_REGEX = re.compile(r"\w+(?:'\w+)*")
+
+# Cache of built transcript indexes keyed by video ID
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def normalize_token(token):
+    """
+    Normalize a single word for indexing and querying.
+
+    Tokens are case-folded, stripped of accents and apostrophes so that "Don't",
+    "dont" and "DONT" all map to the same index entry.
+
+    Args:
+        token (str): The raw word.
+
+    Returns:
+        str: The normalized token.
+
+    Examples:
+        >>> normalize_token("Café")
+        'cafe'
+        >>> normalize_token("Don't")
+        'dont'
+    """
+
+    decomposed = unicodedata.normalize("NFKD", token.casefold())
+    return "".join(
+        char for char in decomposed if not unicodedata.combining(char) and char != "'"
+    )
+
+
+def tokenize(text):
+    """
+    Split text into a list of normalized tokens.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list: The normalized tokens in order of appearance.
+
+    Examples:
+        >>> tokenize("Hello, World! It's me.")
+        ['hello', 'world', 'its', 'me']
+    """
+
+    return [normalize_token(token) for token in TOKEN_REGEX.findall(text)]
+
+
+class TranscriptIndex:
+    """
+    Inverted index over the captions of a single video.
+
+    Every token of the transcript is given a global position. The postings for each
+    token are stored as a sorted array of positions, and a second array maps each
+    position back to the caption it came from. Single words are answered straight
+    from the postings, and phrases are answered by intersecting the postings of
+    consecutive words, so phrases that span two captions are still found.
+    """
+
+    def __init__(self, captions):
+        self.captions = captions
+        self.starts = array("d")
+        self.durations = array("d")
+        self.position_captions = array("I")
+        self.postings = {}
+
+        position = 0
+        for offset, caption in enumerate(captions):
+            self.starts.append(float(caption.get("start", 0.0)))
+            self.durations.append(float(caption.get("duration", 0.0)))
+            for token in tokenize(caption.get("text", "")):
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = array("I")
+                postings.append(position)
+                self.position_captions.append(offset)
+                position += 1
+
+        self.token_count = position
+
+    def _phrase_positions(self, tokens):
+        """
+        Yield the positions at which the given tokens appear consecutively.
+
+        Args:
+            tokens (list): The normalized tokens of the phrase.
+
+        Yields:
+            int: The position of the first token of each match, in increasing order.
+        """
+
+        postings = [self.postings.get(token) for token in tokens]
+        if any(p is None for p in postings):
+            return
+
+        # Walk the rarest token's postings and verify the rest with binary search
+        anchor = min(range(len(tokens)), key=lambda i: len(postings[i]))
+        for anchor_position in postings[anchor]:
+            start = anchor_position - anchor
+            if start < 0:
+                continue
+            for i, token_postings in enumerate(postings):
+                if i == anchor:
+                    continue
+                target = start + i
+                j = bisect_left(token_postings, target)
+                if j == len(token_postings) or token_postings[j] != target:
+                    break
+            else:
+                yield start
+
+    def search(self, query, limit=None):
+        """
+        Find the captions where a word or phrase is mentioned.
+
+        Args:
+            query (str): A word or a phrase to look up.
+            limit (int, optional): The maximum number of hits to return. Defaults to all hits.
+
+        Returns:
+            list: Hit dictionaries with the caption offset, start time, duration and text,
+                ordered by start time.
+
+        Examples:
+            >>> index = TranscriptIndex([{"start": 0.0, "duration": 2.0, "text": "Hello world"}])
+            >>> index.search("world")
+            [{'offset': 0, 'start': 0.0, 'duration': 2.0, 'text': 'Hello world'}]
+        """
+
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        if len(tokens) == 1:
+            positions = self.postings.get(tokens[0], ())
+        else:
+            positions = self._phrase_positions(tokens)
+
+        hits, last_offset = [], None
+        for position in positions:
+            if limit is not None and len(hits) >= limit:
+                break
+            offset = self.position_captions[position]
+            if offset == last_offset:
+                continue
+            last_offset = offset
+            hits.append(
+                {
+                    "offset": offset,
+                    "start": self.starts[offset],
+                    "duration": self.durations[offset],
+                    "text": self.captions[offset].get("text", ""),
+                }
+            )
+
+        return hits
+
+
+def cache_transcript_index(video_id, captions):
+    """
+    Build the index for a video's captions and keep it in the index cache.
+
+    Args:
+        video_id (str): The ID of the YouTube video.
+        captions (list): The caption dictionaries returned by fetch_transcript.
+
+    Returns:
+        TranscriptIndex: The newly built index.
+    """
+
+    index = TranscriptIndex(captions)
+    with _index_cache_lock:
+        _index_cache[video_id] = index
+        _index_cache.move_to_end(video_id)
+        while len(_index_cache) > MAX_CACHED_INDEXES:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def get_transcript_index(video_id, load_captions):
+    """
+    Return the cached index for a video, building it on first use.
+
+    Args:
+        video_id (str): The ID of the YouTube video.
+        load_captions (callable): Called with the video ID on a cache miss; returns the
+            list of captions or None if they cannot be retrieved.
+
+    Returns:
+        TranscriptIndex: The index for the video, or None if no captions are available.
+    """
+
+    with _index_cache_lock:
+        index = _index_cache.get(video_id)
+        if index is not None:
+            _index_cache.move_to_end(video_id)
+            return index
+
+    captions = load_captions(video_id)
+    if captions is None:
+        return None
+
+    return cache_transcript_index(video_id, captions)
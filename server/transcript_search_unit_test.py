@@ -0,0 +1,51 @@
+from transcript_search import *
+
+
+captions = [
+    {"start": 0.0, "duration": 2.5, "text": "Welcome back to the channel"},
+    {"start": 2.5, "duration": 3.0, "text": "today we're talking about"},
+    {"start": 5.5, "duration": 2.0, "text": "inverted indexes. Inverted"},
+    {"start": 7.5, "duration": 4.0, "text": "Indexes are fast, café owners"},
+]
+
+
+def test_tokenize_normalizes_case_accents_and_apostrophes():
+    assert tokenize("We're at the Café!") == ["were", "at", "the", "cafe"]
+
+
+def test_search_single_word():
+    index = TranscriptIndex(captions)
+    hits = index.search("INVERTED")
+    assert [hit["start"] for hit in hits] == [5.5]
+
+
+def test_search_respects_limit():
+    index = TranscriptIndex(captions)
+    assert [hit["offset"] for hit in index.search("indexes", limit=1)] == [2]
+    assert index.search("indexes", limit=0) == []
+
+
+def test_search_phrase_across_captions():
+    index = TranscriptIndex(captions)
+    hits = index.search("inverted indexes")
+    assert [hit["offset"] for hit in hits] == [2]
+    assert index.search("talking about inverted")[0]["start"] == 2.5
+
+
+def test_search_missing_phrase():
+    index = TranscriptIndex(captions)
+    assert index.search("indexes welcome") == []
+    assert index.search("podcast") == []
+
+
+def test_get_transcript_index_builds_once():
+    calls = []
+
+    def load_captions(video_id):
+        calls.append(video_id)
+        return captions
+
+    first = get_transcript_index("abc123XYZ00", load_captions)
+    second = get_transcript_index("abc123XYZ00", load_captions)
+    assert first is second
+    assert calls == ["abc123XYZ00"]
@@ -0,0 +1,83 @@
+from collections import OrderedDict
+import threading
+import time
+
+# Sentinel distinguishing a missing key from a cached None
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache whose entries expire after a time-to-live.
+
+    The cache holds at most max_entries items and evicts the least recently used
+    one when full.
+    """
+
+    def __init__(self, ttl, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for a key.
+
+        Args:
+            key (hashable): The cache key.
+            default (optional): The value returned on a miss. Defaults to None.
+
+        Returns:
+            The cached value, or default if it is missing or expired.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value in the cache.
+
+        Args:
+            key (hashable): The cache key.
+            value: The value to cache.
+            ttl (float, optional): The time-to-live of this entry in seconds. Defaults to the cache's TTL.
+
+        Returns:
+            None
+        """
+
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """
+        Remove a key from the cache if present.
+
+        Args:
+            key (hashable): The cache key.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
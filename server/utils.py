@@ -2,9 +2,11 @@ from youtube_transcript_api import YouTubeTranscriptApi
 import os
 import re
 from dotenv import load_dotenv
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import Flow
 import webbrowser
+from lazy import Lazy, LazyModule
+
+# The Google API client is heavy and only needed for the captions API, so import it on first use
+discovery = LazyModule("googleapiclient.discovery")
 
 load_dotenv()
 
@@ -16,8 +18,24 @@ SCOPES = [
 ]
 REDIRECT_URI = "http://127.0.0.1:8000/callback"
 
-flow = Flow.from_client_secrets_file(CLIENT_SECRETS_FILE, scopes=SCOPES)
-flow.redirect_uri = REDIRECT_URI
+
+def create_flow():
+    """
+    Build the OAuth flow from the client secrets file.
+
+    Returns:
+        Flow: The OAuth flow of the YouTube Data API.
+    """
+
+    from google_auth_oauthlib.flow import Flow
+
+    flow = Flow.from_client_secrets_file(CLIENT_SECRETS_FILE, scopes=SCOPES)
+    flow.redirect_uri = REDIRECT_URI
+    return flow
+
+
+# Built on first use so importing this module does not need client_secret.json
+flow = Lazy(create_flow)
 
 # Rotating residential proxies to avoid IP bans for web-scraping
 PROXIES = {
@@ -122,7 +140,7 @@ def fetch_transcript_with_proxy(video_id):
 
 
 def authenticate_youtube():
-    authorization_url, state = flow.authorization_url(
+    authorization_url, state = flow.get().authorization_url(
         # Recommended, enable offline access so that you can refresh an access token without
         # re-prompting the user for permission. Recommended for web server apps.
         access_type="offline",
@@ -135,8 +153,8 @@ def authenticate_youtube():
         prompt="consent",
     )
 
-    credentials = flow.run_local_server(port=0)
-    return build("youtube", "v3", credentials=credentials)
+    credentials = flow.get().run_local_server(port=0)
+    return discovery.build("youtube", "v3", credentials=credentials)
 
 
 def fetch_transcript_with_google_api(video_id):